@@ -0,0 +1,251 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+asyncio front-end for AutoItX3.
+
+AsyncAutoItX3 owns a worker thread with its own COM apartment and its own AutoItX3 object. Every AutoItX3 method is
+mirrored as a coroutine that queues the call for the worker, so blocking calls such as process_wait or run_wait do
+not block the event loop:
+
+    async with AsyncAutoItX3() as autoit:
+        pid = await autoit.run("calc.exe")
+        await autoit.process_wait_close(pid, timeout=60)
+
+Calls are executed one at a time in submission order. A call that is cancelled or times out before the worker picks
+it up is never executed; one that is already running cannot be interrupted and its result is discarded.
+
+wait_async waits on autoit.wait conditions with one worker round trip per polling round, and launch_async runs an
+autoit.launcher.Launcher.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import queue
+import threading
+from .autoitx import AutoItX3, wrapper_methods
+from .batch import Batch, execute_batch
+from .dispatch import initialize_apartment, uninitialize_apartment
+from .wait import ANY, WaitEngine, probe_values
+
+
+class AsyncAutoItX3(object):
+    """AutoItX3 methods as coroutines, executed on an owned worker thread."""
+
+    def __init__(self, backend=None, timeout=None, **options):
+        """
+        :param backend: Optional object providing the AutoItX3.Control method surface, see AutoItX3. If omitted the
+                        COM object is bound inside the worker's apartment.
+        :param timeout: Default timeout in seconds for each call, None waits indefinitely.
+        :param options: further AutoItX3 arguments (cache_dispids, checked).
+        """
+        self.timeout = timeout
+        self._factory = functools.partial(AutoItX3, backend, **options)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def pending(self):
+        """Number of calls waiting for the worker.
+        :rtype: int
+        """
+        return self._queue.qsize()
+
+    def _start(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AsyncAutoItX3 is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="AutoItX3 worker")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _work(self):
+        initialized = initialize_apartment()
+        autoit = None
+        try:
+            try:
+                autoit = self._factory()
+                failure = None
+            except Exception as e:
+                autoit, failure = None, e
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                future, fn = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if failure is not None:
+                    future.set_exception(failure)
+                    continue
+                try:
+                    result = fn(autoit)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            # the COM object must be released inside the apartment it was created in
+            if autoit is not None:
+                autoit._release()
+            autoit = None
+            if initialized:
+                uninitialize_apartment()
+
+    def submit(self, fn):
+        """Queues fn(autoit) for the worker thread.
+
+        :param fn: callable receiving the worker's AutoItX3 instance.
+        :return: future of the result
+        :rtype: concurrent.futures.Future
+        """
+        self._start()
+        future = concurrent.futures.Future()
+        self._queue.put((future, fn))
+        return future
+
+    async def _await(self, fn, timeout):
+        future = asyncio.wrap_future(self.submit(fn))
+        if timeout is None:
+            timeout = self.timeout
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout)
+
+    async def call(self, method, *args, **kwargs):
+        """Calls an AutoItX3 method on the worker.
+
+        :param method: AutoItX3 method name, e.g. "process_wait".
+        :param call_timeout: Optional keyword: timeout in seconds for this call, overriding the default.
+        :return: the method's result
+        """
+        timeout = kwargs.pop("call_timeout", None)
+        return await self._await(functools.partial(_call_method, method, args, kwargs), timeout)
+
+    async def get(self, name, call_timeout=None):
+        """Reads an AutoItX3.Control property ("error" or "version") on the worker."""
+        return await self._await(functools.partial(_get_property, name), call_timeout)
+
+    def batch(self, stop_on_error=False, read_errors=True):
+        """Queues calls and runs them in one worker round trip when the async with block exits, see autoit.batch.
+
+        :param read_errors: read the error flag after each call, see autoit.batch.execute_batch.
+        :rtype: AsyncBatch
+        """
+        return AsyncBatch(self, stop_on_error=stop_on_error, read_errors=read_errors)
+
+    def close(self):
+        """Stops the worker thread after the queued calls have run."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+        return False
+
+
+class AsyncBatch(Batch):
+    """Batch for AsyncAutoItX3, used with async with. The queued calls run on the worker in one round trip."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.run()
+        return False
+
+    async def run(self, call_timeout=None):
+        calls, self.calls = self.calls, []
+        self.results = await self._autoit._await(
+            functools.partial(_execute_batch, calls, self.stop_on_error, self.read_errors), call_timeout)
+        return self.results
+
+
+async def wait_async(autoit, conditions, mode=ANY, timeout=None, interval=0.05, max_interval=0.25):
+    """Awaits conditions like autoit.wait.wait, running the probes due in a round as one batch on the worker, without
+    reading the error flag after each probe. Other coroutines, including other waits, run while the wait sleeps
+    between rounds.
+
+    :param autoit: AsyncAutoItX3.
+    :return: WaitResult, false if the timeout expired first
+    :rtype: WaitResult
+    """
+    engine = WaitEngine(conditions, mode, timeout, interval, max_interval)
+    while True:
+        probes = engine.due()
+        batch = autoit.batch(read_errors=False)
+        for method, args in probes:
+            getattr(batch, method)(*args)
+        engine.update(probes, probe_values(await batch.run()))
+        if engine.done:
+            return engine.result()
+        await asyncio.sleep(engine.delay())
+
+
+async def launch_async(launcher, timeout=None, wait=1.0, executor=None):
+    """Runs an autoit.launcher.Launcher like Launcher.run without blocking the event loop. Each step, which starts
+    queued programs and waits on all running ones together for up to wait seconds, runs in executor: by default a
+    thread of its own that enters a COM apartment, so every backend call of the run is made on that thread. A local
+    AutoItX3 binds its COM object on its first call, so one behind an AutoItBackend must not have been used yet.
+
+    :param wait: longest time in seconds one step waits for running programs.
+    :param executor: concurrent.futures.Executor to run the steps in; its threads must be able to use the backend.
+    :return: results in the order the jobs were added, None for jobs still running at the timeout
+    :rtype: list
+    """
+    loop = asyncio.get_running_loop()
+    owned = executor is None
+    if owned:
+        executor = concurrent.futures.ThreadPoolExecutor(1, "AutoItX3 launcher", initialize_apartment)
+    try:
+        deadline = None if timeout is None else loop.time() + timeout
+        while not launcher.done:
+            remaining = wait if deadline is None else min(wait, deadline - loop.time())
+            if remaining <= 0:
+                launcher.cancel()
+                break
+            await loop.run_in_executor(executor, launcher.step, remaining)
+    finally:
+        if owned:
+            executor.shutdown(wait=False)
+    return list(launcher.results)
+
+
+def _call_method(method, args, kwargs, autoit):
+    return getattr(autoit, method)(*args, **kwargs)
+
+
+def _get_property(name, autoit):
+    return autoit._get(name)
+
+
+def _execute_batch(calls, stop_on_error, read_errors, autoit):
+    return execute_batch(autoit, calls, stop_on_error, read_errors)
+
+
+def _mirror(name):
+    wrapped = getattr(AutoItX3, name)
+
+    async def method(self, *args, **kwargs):
+        return await self.call(name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = wrapped.__doc__
+    return method
+
+
+for _name in wrapper_methods():
+    setattr(AsyncAutoItX3, _name, _mirror(_name))
+del _name
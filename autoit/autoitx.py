@@ -1,7 +1,22 @@
 ﻿from __future__ import absolute_import, division, print_function
 __author__ = 'florian.schaeffeler'
-import win32com.client
-import pywintypes
+import inspect
+import time
+from .batch import Batch, call_reader
+from .dispatch import CachedInvoker, DynamicInvoker
+from .errors import AutoItXBindError, MEMBER_SEMANTICS, check_result
+from .handles import CLOSING_MEMBERS, HandleCache, WINDOW_MEMBERS, handle_title
+from .keys import DEFAULT_KEY_DELAY, DEFAULT_KEY_DOWN_DELAY, compile_keys
+from .launcher import AutoItBackend, Launcher
+from .listview import iter_list_view_rows
+from .processes import ProcessIndex
+from .registry import reg_snapshot, reg_walk
+from .snapshot import CONTROL_RECT_MEMBERS, MOUSE_POS_MEMBERS, WINDOW_RECT_MEMBERS, ControlState, read_fields, read_rect
+from .tail import follow_control_text
+from .textentry import type_text
+from .treeview import TreeView
+from .watch import Watcher
+from .window import Window
 """
 Before you can use the COM interface to AutoItX it needs to be "registered" (This is done automatically when you install
 the full version of AutoIt but you may need to do it manually if you are using AutoItX seperately).
@@ -14,6 +29,28 @@ The name of the AutoItX control is AutoItX3.Control
 """
 
 
+def dispatch_autoitx():
+    """Binds a new AutoItX3.Control COM object.
+    win32com is imported here so importing this module neither needs pywin32 nor activates the COM server.
+
+    :return: late-bound dispatch of AutoItX3.Control
+    """
+    import win32com.client
+    import pywintypes
+    try:
+        return win32com.client.Dispatch("AutoItX3.Control")
+    except pywintypes.com_error as e:
+        print("Could not bind AutoItX, call failed with code %d: %s" % (e.hresult, e.strerror))
+        if e.excepinfo is None:
+            print("There is no extended error information")
+        else:
+            wcode, source, text, helpFile, helpId, scode = e.excepinfo
+            print("The source of the error is", source)
+            print("The error message is", text)
+            print("More info can be found in %s (id=%d)" % (helpFile, helpId))
+        raise AutoItXBindError("Could not bind AutoItX, you may have to register AutoItX.dll\n%s" % 'regsvr32.exe "<path_to>\\AutoItX3.dll"')
+
+
 class AutoItX3():
     """A simple wrapper for the AutoItX COM interface
 
@@ -41,64 +78,189 @@ class AutoItX3():
                         it to its original size and position. An application should specify this flag when displaying
                         the window for the first time.
     """
-    try:
-        _aux3 = win32com.client.Dispatch("AutoItX3.Control")
-    except pywintypes.com_error as e:
-        print("Could not bind AutoItX, call failed with code %d: %s" % (e.hr, e.msg))
-        if e.exc is None:
-            print("There is no extended error information")
-        else:
-             wcode, source, text, helpFile, helpId, scode = e.exc
-             print("The source of the error is", source)
-             print("The error message is", text)
-             print("More info can be found in %s (id=%d)" % (helpFile, helpId))
-        raise Exception("Could not bind AutoItX, you may have to register AutoItX.dll\n%s" % 'regsvr32.exe "<path_to>\AutoItX3.dll"')
-    SW_HIDE = _aux3.SW_HIDE
-    SW_MAXIMIZE = _aux3.SW_MAXIMIZE
-    SW_MINIMIZE = _aux3.SW_MINIMIZE
-    SW_RESTORE = _aux3.SW_RESTORE
-    SW_SHOW = _aux3.SW_SHOW
-    SW_SHOWDEFAULT = _aux3.SW_SHOWDEFAULT
-    SW_SHOWMAXIMIZED = _aux3.SW_SHOWMAXIMIZED
-    SW_SHOWMINIMIZED = _aux3.SW_SHOWMINIMIZED
-    SW_SHOWMINNOACTIVE = _aux3.SW_SHOWMINNOACTIVE
-    SW_SHOWNA = _aux3.SW_SHOWNA
-    SW_SHOWNOACTIVATE = _aux3.SW_SHOWNOACTIVATE
-    SW_SHOWNORMAL = _aux3.SW_SHOWNORMAL
+    SW_HIDE = 0
+    SW_SHOWNORMAL = 1
+    SW_SHOWMINIMIZED = 2
+    SW_SHOWMAXIMIZED = 3
+    SW_MAXIMIZE = 3
+    SW_SHOWNOACTIVATE = 4
+    SW_SHOW = 5
+    SW_MINIMIZE = 6
+    SW_SHOWMINNOACTIVE = 7
+    SW_SHOWNA = 8
+    SW_RESTORE = 9
+    SW_SHOWDEFAULT = 10
     LOWEST_INT = -2147483647
     LEFT = "left"
     RIGHT = "right"
     MIDDLE = "middle"
+    # methods returning objects tied to this instance, not mirrored by proxies running the wrapper elsewhere
+    _LOCAL_METHODS = ("batch", "follow_control_text", "iter_list_view_rows", "reg_walk", "run_many", "tree_view",
+                      "watch", "window")
+
+    def __init__(self, backend=None, cache_dispids=False, checked=False, handle_cache=None):
+        """
+        :param backend: Optional object providing the AutoItX3.Control method surface (ControlClick, WinExists,
+                        error, ...). If omitted the AutoItX3.Control COM object is bound on first use.
+        :param cache_dispids: Resolve the DISPID of each member once and invoke it directly instead of resolving the
+                              name on every call. Members that cannot be resolved use the dynamic path.
+        :type cache_dispids: bool
+        :param checked: Raise autoit.errors.AutoItXError subclasses when a call fails, following the convention of
+                        each method in autoit.errors.ERROR_SEMANTICS. The error property is only read for methods
+                        that set it.
+        :type checked: bool
+        :param handle_cache: Resolve window titles to handles once and address windows as "[HANDLE:...]" in later
+                             window and control calls, see autoit.handles. True uses a HandleCache with defaults.
+        :type handle_cache: HandleCache or bool
+        """
+        self._backend = backend
+        self._owns_backend = backend is None
+        self._cache_dispids = cache_dispids
+        self._invoker = None
+        self._checked = checked
+        if handle_cache is True:
+            handle_cache = HandleCache()
+        self.handle_cache = handle_cache or None
+        #: options set through auto_it_set_option, keyed by lower-case option name
+        self.options = {}
+        #: ProcessIndex answering process_exists_many and process_close_many; created on first use when the instance
+        #: binds the local COM object
+        self.process_index = None
+        #: Watcher serving watch, created and started on first use
+        self.watcher = None
+        # error flag of the last call, kept when a handle revalidation after it overwrote the flag
+        self._error = None
+        if checked or self.handle_cache is not None:
+            self._call = self._layered_call
+
+    @property
+    def _aux3(self):
+        """The bound AutoItX3.Control object, dispatched on first access."""
+        if self._backend is None:
+            self._backend = dispatch_autoitx()
+        return self._backend
+
+    def _bind(self):
+        if self._cache_dispids:
+            self._invoker = CachedInvoker(self._aux3)
+        else:
+            self._invoker = DynamicInvoker(self._aux3)
+        return self._invoker
+
+    def _release(self):
+        """Drops the bound COM object, e.g. before its apartment is left; the next call binds a new one."""
+        self._invoker = None
+        if self._owns_backend:
+            self._backend = None
+
+    def _call(self, name, *args):
+        invoker = self._invoker
+        if invoker is None:
+            invoker = self._bind()
+        return invoker.call(name, args)
+
+    def _raw_call(self, name, *args):
+        return AutoItX3._call(self, name, *args)
+
+    def _layered_call(self, name, *args):
+        self._error = None
+        handle_cache = self.handle_cache
+        called = args
+        if handle_cache is not None:
+            if name in WINDOW_MEMBERS:
+                called = handle_cache.rewrite(self._raw_call, args)
+            elif name == "AutoItSetOption":
+                handle_cache.clear()
+        result = AutoItX3._call(self, name, *called)
+        if called is not args:
+            handle = called[0][len("[HANDLE:"):-1]
+            if name in CLOSING_MEMBERS:
+                handle_cache.evict_handle(handle)
+            elif not result:
+                result = self._revalidate(name, args, handle, result)
+        if self._checked:
+            entry = MEMBER_SEMANTICS.get(name)
+            if entry is not None:
+                method, semantics = entry
+                check_result(method, semantics, result, lambda: self._get("error"))
+        return result
+
+    def _revalidate(self, name, args, handle, result):
+        # a false result with the error flag set may come from a cached handle whose window is gone
+        error = self._error = AutoItX3._get(self, "error")
+        if not error or self._raw_call("WinExists", handle_title(handle), ""):
+            return result
+        self.handle_cache.evict_handle(handle)
+        self._error = None
+        return AutoItX3._call(self, name, *self.handle_cache.rewrite(self._raw_call, args))
+
+    def _clone(self):
+        """New instance with the same constructor arguments and options, binding its own COM object."""
+        autoit = AutoItX3(cache_dispids=self._cache_dispids, checked=self._checked, handle_cache=self.handle_cache)
+        for option, param in list(self.options.items()):
+            autoit.auto_it_set_option(option, param)
+        return autoit
+
+    def _get(self, name):
+        if name == "error" and self._error is not None:
+            return self._error
+        invoker = self._invoker
+        if invoker is None:
+            invoker = self._bind()
+        return invoker.get(name)
+
+    def batch(self, executor=None, stop_on_error=False, read_errors=True):
+        """Queues calls and runs them back-to-back when the with block exits, see autoit.batch.
+
+        :param executor: Optional callable (calls, stop_on_error) -> results running the calls elsewhere.
+        :param stop_on_error: Stop at the first call that sets the error flag.
+        :param read_errors: Read the error flag after each call; with False each error is None.
+        :return: Batch whose results attribute holds one (value, error) pair per call after the block
+        :rtype: Batch
+        """
+        return Batch(self, executor, stop_on_error, read_errors)
 
-    def __init__(self):
-        pass
+    def window(self, title, text=""):
+        """Lightweight object for a window, resolving its handle once and fetching attributes lazily, see
+        autoit.window.
+
+        :param title: The title of the window.
+        :param text: Optional: The text of the window.
+        :rtype: Window
+        """
+        return Window(self, title, text)
 
     @property
     def error(self):
         """Status of the error flag (equivalent to the @error macro in AutoIt v3)
         :rtype: int
         """
-        return self._aux3.error
+        return self._get("error")
 
     @property
     def version(self):
         """autoitX dll version (equivalent to @autoitversion macro in AutoIt v3)
         :rtype: unicode
         """
-        return self._aux3.version
+        return self._get("version")
 
     def auto_it_set_option(self, option, param):
         """Changes the operation of various AutoIt functions/parameters."""
-        return self._aux3.AutoItSetOption(option, param)
+        self.options[str(option).lower()] = param
+        return self._call("AutoItSetOption", option, param)
+
+    def block_input(self, flag=1):
+        """BlockInput Disable/enable the mouse and keyboard.
 
-    def block_input(self):
-        """BlockInput Disable/enable the mouse and keyboard."""
-        return self._aux3.block_input()
+        :param flag: 1 = Disable user input, 0 = Enable user input
+        :type flag: int
+        """
+        return self._call("BlockInput", flag)
 
     def cd_tray(self, drive, status):
         """Opens or closes the CD tray.
         :rtype: int"""
-        return self._aux3.CDTray(drive, status)
+        return self._call("CDTray", drive, status)
 
     def clip_get(self):
         """Retrieves text from the clipboard.
@@ -106,7 +268,7 @@ class AutoItX3():
         :returns: On Success str containing the text on the clipboard
         :rtype: str
         """
-        return self._aux3.ClipGet()
+        return self._call("ClipGet")
 
     def clip_put(self, value):
         """Writes text to the clipboard.
@@ -116,7 +278,7 @@ class AutoItX3():
         :returns: 1 Success 0 Failure
         :rtype: int
         """
-        return self._aux3.ClipPut(value)
+        return self._call("ClipPut", value)
 
     def control_click(self, title, text, controlId, button=LEFT, clicks=1, x=LOWEST_INT, y=LOWEST_INT):
         """Sends a mouse click command to a given control.
@@ -137,7 +299,7 @@ class AutoItX3():
         :return: 1 Success 0 Failure
         :rtype: int
         """
-        return self._aux3.ControlClick(title, text, controlId, button, clicks, x, y)
+        return self._call("ControlClick", title, text, controlId, button, clicks, x, y)
 
     def control_command(self, title, text, controlId, command, option):
         """Sends a command to a control.
@@ -153,7 +315,7 @@ class AutoItX3():
         :param command: The command to send to the control.
         :param option: Additional parameter required by some commands; use "" if parameter is not required.
         """
-        return self._aux3.ControlCommand(title, text, controlId, command, option)
+        return self._call("ControlCommand", title, text, controlId, command, option)
 
     def control_disable(self, title, text, controlId):
         """Disables or "grays-out" a control.
@@ -169,7 +331,7 @@ class AutoItX3():
         :return: 1 Success 0 Failure
         :rtype: int
         """
-        return self._aux3.ControlDisable(title, text, controlId)
+        return self._call("ControlDisable", title, text, controlId)
 
     def control_enable(self, title, text, controlId):
         """Enables a "grayed-out" control.
@@ -182,7 +344,7 @@ class AutoItX3():
         :return: 1 Success 0 Failure
         :rtype: int
         """
-        return self._aux3.ControlEnable(title, text, controlId)
+        return self._call("ControlEnable", title, text, controlId)
 
     def control_focus(self, title, text, controlId):
         """Sets input focus to a given control on a window.
@@ -195,7 +357,7 @@ class AutoItX3():
         :return: 1 Success 0 Failure
         :rtype: int
         """
-        return self._aux3.ControlFocus(title, text, controlId)
+        return self._call("ControlFocus", title, text, controlId)
 
     def control_get_focus(self, title, text=""):
         """Returns the ControlRef# of the control that has keyboard focus within a specified window.
@@ -206,7 +368,7 @@ class AutoItX3():
         :return: Success ControlRef# of the control   Failure  a blank string and sets error to 1 if window is not found
         :rtype: unicode
         """
-        return self._aux3.ControlGetFocus(title, text)
+        return self._call("ControlGetFocus", title, text)
 
     def control_get_handle(self, title, text, controlId):
         """Retrieves the internal handle of a control.
@@ -219,7 +381,7 @@ class AutoItX3():
         :return: Success Returns a string containing the control handle value.
                  Returns "" (blank string) and sets oAutoIt.error to 1 if no window matches the criteria.
         """
-        return self._aux3.ControlGetHandle(title, text, controlId)
+        return self._call("ControlGetHandle", title, text, controlId)
 
     def control_get_pos_height(self, title, text, controlId):
         """Retrieves the position and size of a control relative to it's window.
@@ -232,7 +394,7 @@ class AutoItX3():
         :return: Returns the height of the control.  Failure sets error to 1.
         :rtype: int
         """
-        return self._aux3.ControlGetPosHeight(title, text, controlId)
+        return self._call("ControlGetPosHeight", title, text, controlId)
 
     def control_get_pos_width(self, title, text, controlId):
         """Retrieves the position and size of a control relative to it's window.
@@ -245,13 +407,13 @@ class AutoItX3():
         :return: Returns the width of the control.  Failure sets error to 1.
         :rtype: int
         """
-        return self._aux3.ControlGetPosWidth(title, text, controlId)
+        return self._call("ControlGetPosWidth", title, text, controlId)
 
     def control_get_pos_x(self, title, text, controlId):
-        return self._aux3.ControlGetPosX(title, text, controlId)
+        return self._call("ControlGetPosX", title, text, controlId)
 
     def control_get_pos_y(self, title, text, controlId):
-        return self._aux3.ControlGetPosY(title, text, controlId)
+        return self._call("ControlGetPosY", title, text, controlId)
 
     def control_get_pos(self, title, text, controlId):
         """
@@ -273,6 +435,81 @@ class AutoItX3():
         """
         return (self.control_get_pos_width(title, text, controlId), self.control_get_pos_height(title, text, controlId))
 
+    def _pin(self, title, text, pinned):
+        key = (title, text)
+        if key not in pinned:
+            handle = self._call("WinGetHandle", title, text)
+            pinned[key] = (handle_title(handle), "") if handle else None
+        return pinned[key]
+
+    def control_get_rect(self, title, text, controlId, consistent=False):
+        """Retrieves position and size of a control relative to its window as one record.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to interact with.
+        :param consistent: Pin the window by handle and read all fields again until two reads agree, see
+                           autoit.snapshot.
+        :type consistent: bool
+        :return: Rect(x, y, width, height), None if consistent and no window matches
+        :rtype: Rect
+        :raises autoit.snapshot.InconsistentRead: if consistent and the fields kept changing
+        """
+        return self.control_get_rects([(title, text, controlId)], consistent)[0]
+
+    def control_get_rects(self, controls, consistent=False):
+        """Bulk form of control_get_rect. With consistent each distinct window is pinned only once.
+
+        :param controls: iterable of (title, text, controlId)
+        :rtype: list
+        """
+        pinned = {}
+        rects = []
+        for title, text, controlId in controls:
+            if consistent:
+                window = self._pin(title, text, pinned)
+                if window is None:
+                    rects.append(None)
+                    continue
+                title, text = window
+            rects.append(read_rect(self._call, CONTROL_RECT_MEMBERS, (title, text, controlId), consistent))
+        return rects
+
+    def control_get_state(self, title, text, controlId, consistent=False):
+        """Retrieves visibility, enabled state and text of a control as one record.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to interact with.
+        :param consistent: Pin the window by handle first, so all three reads hit the same window.
+        :type consistent: bool
+        :return: ControlState(visible, enabled, text), None if consistent and no window matches
+        :rtype: ControlState
+        """
+        return self.control_get_states([(title, text, controlId)], consistent)[0]
+
+    def control_get_states(self, controls, consistent=False):
+        """Bulk form of control_get_state. With consistent each distinct window is pinned only once.
+
+        :param controls: iterable of (title, text, controlId)
+        :return: ControlState per control, None for controls whose window does not exist if consistent
+        :rtype: list
+        """
+        pinned = {}
+        states = []
+        call = self._call
+        for title, text, controlId in controls:
+            if consistent:
+                window = self._pin(title, text, pinned)
+                if window is None:
+                    states.append(None)
+                    continue
+                title, text = window
+            states.append(ControlState(bool(call("ControlCommand", title, text, controlId, "IsVisible", "")),
+                                       bool(call("ControlCommand", title, text, controlId, "IsEnabled", "")),
+                                       call("ControlGetText", title, text, controlId)))
+        return states
+
     def control_get_text(self, title, text, controlId):
         """Retrieves text from a control.
 
@@ -285,7 +522,21 @@ class AutoItX3():
         :return: Returns the text from a control.  Failure sets error to 1 and
         :rtype: unicode
         """
-        return self._aux3.ControlGetText(title, text, controlId)
+        return self._call("ControlGetText", title, text, controlId)
+
+    def follow_control_text(self, title, text, controlId, interval=0.25, idle_timeout=None, lines=False):
+        """Yields TextChange records with the text appended to a control since the previous poll, or the text from
+        the first changed position after a rewrite, keeping only hashes of the old text, see autoit.tail.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to follow, e.g. a log's edit control.
+        :param interval: Optional: Seconds between polls.
+        :param idle_timeout: Optional: Stop after this many seconds without new text; by default follow until the
+                             window or control goes away.
+        :param lines: Optional: Yield one record per complete line.
+        """
+        return follow_control_text(self, title, text, controlId, interval, idle_timeout, lines)
 
     def control_hide(self, title, text, controlId):
         """Hides a control.
@@ -299,7 +550,7 @@ class AutoItX3():
         :return: Success 1  Failure 0 window/control is not found
         :rtype: int
         """
-        return self._aux3.ControlHide(title, text, controlId)
+        return self._call("ControlHide", title, text, controlId)
 
     def control_list_view(self, title, text, controlId, command, option1="", option2=""):
         """Sends a command to a ListView32 control.
@@ -317,10 +568,27 @@ class AutoItX3():
         :type option2: str
         :return:
         """
-        return self._aux3.ControlListView(title, text, controlId, command, option1, option2)
+        return self._call("ControlListView", title, text, controlId, command, option1, option2)
+
+    def iter_list_view_rows(self, title, text, controlId, columns=None, start=0, stop=None, page_size=100,
+                            cache=None, signature_column=0):
+        """Yields the rows of a ListView control as tuples of cell texts, page by page, see autoit.listview.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to interact with.
+        :param columns: Optional: Indexes of the columns to read, all columns by default.
+        :param start: Optional: Index of the first row.
+        :param stop: Optional: Index after the last row.
+        :param page_size: Optional: Rows read per page.
+        :param cache: Optional: ListViewCache serving rows whose signature column did not change.
+        :param signature_column: Optional: Column compared against the cache.
+        """
+        return iter_list_view_rows(self, title, text, controlId, columns, start, stop, page_size, cache,
+                                   signature_column)
 
     def control_move(self, title, text, controlId, x, y, width=LOWEST_INT, height=LOWEST_INT):
-        return self._aux3.ControlListView(title, text, controlId, x, y, width, height)
+        return self._call("ControlMove", title, text, controlId, x, y, width, height)
 
     def control_send(self, title, text, controlId, string, flag=0):
         """Sends a string of characters to a control.
@@ -340,7 +608,23 @@ class AutoItX3():
         :return: Success 1  Failure 0
         :rtype: int
         """
-        return self._aux3.ControlSend(title, text, controlId, string, flag)
+        return self._call("ControlSend", title, text, controlId, string, flag)
+
+    def control_send_keys(self, title, text, controlId, keys, flag=0, chunk=None, pause=0):
+        """Sends a key sequence to a control like control_send, validating it first (see autoit.keys) and sending it
+        in chunks of at most chunk keystrokes, pause seconds apart, if chunk is given.
+
+        :raises autoit.keys.KeySyntaxError: if the sequence is malformed, before anything is sent
+        :return: Success 1  Failure 0, the remaining chunks are not sent after a failure
+        :rtype: int
+        """
+        sequence = compile_keys(keys, flag)
+        for index, part in enumerate(sequence.chunks(chunk) if chunk else [keys]):
+            if index and pause:
+                time.sleep(pause)
+            if not self.control_send(title, text, controlId, part, flag):
+                return 0
+        return 1
 
     def control_set_text(self, title, text, controlId, newText):
         """Sets text of a control.
@@ -356,13 +640,13 @@ class AutoItX3():
         :return: Success 1  Failure 0
         :rtype: int
         """
-        return self._aux3.ControlSetText(title, text, controlId, newText)
+        return self._call("ControlSetText", title, text, controlId, newText)
 
     def control_show(self, title, text, controlId):
-        return self._aux3.ControlShow(title, text, controlId)
+        return self._call("ControlShow", title, text, controlId)
 
     def control_tree_view(self, title, text, controlId, command, option1="", option2=""):
-        return self._aux3.ControlTreeView(title, text, controlId, command, option1, option2)
+        return self._call("ControlTreeView", title, text, controlId, command, option1, option2)
 
     def drive_map_add(self, device, remoteShare, flags=0, user="", password=""):
         """Maps a network drive.
@@ -370,14 +654,14 @@ class AutoItX3():
         :param device: The device to map, for example "O:" or "LPT1:". If you pass a blank string for this parameter a
                        connection is made but not mapped to a specific drive. If you specify "*" an unused drive letter
                        will be automatically selected.
-        :param remoteShare: The remote share to connect to in the form "\\server\share".
+        :param remoteShare: The remote share to connect to in the form "\\\\server\\share".
         :param flags: A combination of the following: 0 = default, 1 = Persistant mapping,
                       8 = Show authentication dialog if required
-        :param user:  The username to use to connect. In the form "username" or "domain\username".
+        :param user:  The username to use to connect. In the form "username" or "domain\\username".
         :param password: Optional: The password to use to connect.
         :return:
         """
-        return self._aux3.DriveMapAdd(device, remoteShare, flags, user, password)
+        return self._call("DriveMapAdd", device, remoteShare, flags, user, password)
 
     def drive_map_del(self, device):
         """Disconnects a network drive
@@ -387,35 +671,35 @@ class AutoItX3():
         :return: Success 1  Failure 0
         :rtype: int
         """
-        return self._aux3.DriveMapDel(device)
+        return self._call("DriveMapDel", device)
 
     def drive_map_get(self, device):
         """Retreives the details of a mapped drive.
 
         :param device: The device (drive or printer) letter to query. Eg. "O:" or "LPT1:"
-        :return: Success: Returns details of the mapping, e.g. \\server\share
+        :return: Success: Returns details of the mapping, e.g. \\\\server\\share
                  Failure: Returns a blank string "" and sets oAutoIt.error to 1.
         :rtype: str
         """
-        return self._aux3.DriveMapGet(device)
+        return self._call("DriveMapGet", device)
 
     def ini_delete(self, filename, section, key=""):
-        return self._aux3.IniDelete(filename, section, key)
+        return self._call("IniDelete", filename, section, key)
 
     def ini_read(self, filename, section, key, default):
-        return self._aux3.IniRead(filename, section, key, default)
+        return self._call("IniRead", filename, section, key, default)
 
     def ini_write(self, filename, section, key, value):
-        return self._aux3.IniWrite(filename, section, key, value)
+        return self._call("IniWrite", filename, section, key, value)
 
     def is_admin(self):
-        return self._aux3.IsAdmin()
+        return self._call("IsAdmin")
 
     def mouse_click(self, button, x=LOWEST_INT, y=LOWEST_INT, clicks=1, speed=10):
-        return self._aux3.MouseClick(button, x, y, clicks, speed)
+        return self._call("MouseClick", button, x, y, clicks, speed)
 
     def mouse_click_drag(self, button, x1, y1, x2, y2, speed=10):
-        return self._aux3.MouseClickDrag(button, x1, y1, x2, y2, speed)
+        return self._call("MouseClickDrag", button, x1, y1, x2, y2, speed)
 
     def mouse_down(self, button):
         """Perform a mouse down event at the current mouse position.
@@ -425,7 +709,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.MouseDown(button)
+        return self._call("MouseDown", button)
 
     def mouse_get_cursor(self):
         """Returns a cursor ID Number of the current Mouse Cursor.
@@ -449,7 +733,7 @@ class AutoItX3():
                  15 = WAIT
         :rtype: int
         """
-        return self._aux3.MouseGetCursor()
+        return self._call("MouseGetCursor")
 
     def mouse_get_pos_x(self):
         """Retrieves the current X position of the mouse cursor.
@@ -457,18 +741,22 @@ class AutoItX3():
 
         :return: Returns the current X position of the mouse cursor.
         """
-        return self._aux3.MouseGetPosX()
+        return self._call("MouseGetPosX")
 
     def mouse_get_pos_y(self):
-        return self._aux3.MouseGetPosY()
+        return self._call("MouseGetPosY")
 
-    def mouse_get_pos(self):
+    def mouse_get_pos(self, consistent=False):
         """Retrieves the current position of the mouse cursor.
 
+        :param consistent: Read both coordinates again until two reads agree, so a moving cursor does not give the
+                           x of one position and the y of the next, see autoit.snapshot.
+        :type consistent: bool
         :return: Returns the current position of the mouse cursor.
         :rtype: tuple
+        :raises autoit.snapshot.InconsistentRead: if consistent and the cursor kept moving
         """
-        return (self.mouse_get_pos_x(), self.mouse_get_pos_y())
+        return read_fields(self._call, MOUSE_POS_MEMBERS, (), consistent)
 
     def mouse_move(self, x, y, speed=10):
         """Moves the mouse pointer.
@@ -479,7 +767,7 @@ class AutoItX3():
                       mouse instantly. Default speed is 10.
         :return:
         """
-        return self._aux3.MouseMove(x, y, speed)
+        return self._call("MouseMove", x, y, speed)
 
     def mouse_up(self, button):
         """Perform a mouse up event at the current mouse position.
@@ -489,7 +777,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.MouseUp(button)
+        return self._call("MouseUp", button)
 
     def mouse_wheel(self, direction, clicks=1):
         """Moves the mouse wheel up or down. NT/2000/XP ONLY.
@@ -501,7 +789,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.MouseWheel(direction, clicks)
+        return self._call("MouseWheel", direction, clicks)
 
     def pixel_checksum(self, left, top, right, bottom, step=1):
         """Generates a checksum for a region of pixels.
@@ -520,7 +808,7 @@ class AutoItX3():
         :return: Returns the checksum value of the region.
         :rtype: float
         """
-        return self._aux3.PixelChecksum(left, top, right, bottom, step)
+        return self._call("PixelChecksum", left, top, right, bottom, step)
 
     def pixel_get_color(self, x, y):
         """Returns a pixel color according to x,y pixel coordinates.
@@ -530,7 +818,7 @@ class AutoItX3():
         :return: Returns decimal value of pixel's color. Failure Returns -1 if invalid coordinates.
         :rtype: int
         """
-        return self._aux3.PixelGetColor(x, y)
+        return self._call("PixelGetColor", x, y)
 
     def pixel_search(self, left, top, right, bottom, colour, shadeVariation=0, step=1):
         """Searches a rectangle of pixels for the pixel color provided.
@@ -558,7 +846,7 @@ class AutoItX3():
                  Failure: Sets oAutoIt.error to 1 if color is not found.
         :rtype: tuple
         """
-        return self._aux3.PixelSearch(left, top, right, bottom, colour, shadeVariation, step)
+        return self._call("PixelSearch", left, top, right, bottom, colour, shadeVariation, step)
 
     def process_close(self, process):
         """Terminates a named process.
@@ -574,7 +862,28 @@ class AutoItX3():
         :return: None. (Returns 1 regardless of success/failure.)
         :rtype: int
         """
-        return self._aux3.ProcessClose(process)
+        return self._call("ProcessClose", process)
+
+    def process_close_many(self, processes):
+        """Terminates many processes with ProcessClose, resolving names from one process table snapshot instead of
+        one scan per name, see autoit.processes. For a name the process with the highest PID is terminated.
+        With an injected backend and no process_index set, names are resolved with process_exists_many and a name
+        given twice is closed once.
+
+        :param processes: The names or PIDs of the processes to terminate.
+        :type processes: list
+        :return: The PID closed for each process, 0 if it did not exist.
+        :rtype: list
+        """
+        index = self._process_index()
+        if index is not None:
+            return index.close_many(processes, self.process_close)
+        targets, seen = [], set()
+        for pid in self.process_exists_many(processes):
+            targets.append(pid if pid not in seen else 0)
+            seen.add(pid)
+        call_reader(self)([("process_close", (pid,)) for pid in targets if pid])
+        return targets
 
     def process_exists(self, process):
         """Checks to see if a specified process exists.
@@ -589,7 +898,28 @@ class AutoItX3():
                  Failure: Returns 0 if process does not exist.
         :rtype: int
         """
-        return self._aux3.ProcessExists(process)
+        return self._call("ProcessExists", process)
+
+    def process_exists_many(self, processes):
+        """Checks many processes against one process table snapshot instead of one scan per process, see
+        autoit.processes. The snapshot is reused for process_index.ttl seconds. With an injected backend, which may
+        run on another machine, and no process_index set, each process is checked with process_exists instead.
+
+        :param processes: The names or PIDs of the processes to check.
+        :type processes: list
+        :return: The PID of each process as process_exists returns it, 0 if it does not exist.
+        :rtype: list
+        """
+        index = self._process_index()
+        if index is None:
+            return call_reader(self)([("process_exists", (process,)) for process in processes])
+        return index.exists_many(processes)
+
+    def _process_index(self):
+        # the local process table only matches what the backend sees when the backend is the local COM object
+        if self.process_index is None and self._owns_backend:
+            self.process_index = ProcessIndex()
+        return self.process_index
 
     def process_set_priority(self, process, priority):
         """Changes the priority of a process
@@ -611,7 +941,7 @@ class AutoItX3():
                           unsupported priority class.
         :rtype: int
         """
-        return self._aux3.SetPriority(process, priority)
+        return self._call("ProcessSetPriority", process, priority)
 
     def process_wait(self, process, timeout=0):
         """Pauses script execution until a given process exists.
@@ -624,7 +954,7 @@ class AutoItX3():
                  Failure: Returns 0 if the wait timed out.
         :rtype: int
         """
-        return self._aux3.ProcessWait(process, timeout)
+        return self._call("ProcessWait", process, timeout)
 
     def process_wait_close(self, process, timeout=0):
         """Pauses script execution until a given process does not exist.
@@ -637,14 +967,14 @@ class AutoItX3():
                  Failure: Returns 0 if wait timed out.
         :rtype: int
         """
-        return self._aux3.ProcessWaitClose(process, timeout)
+        return self._call("ProcessWaitClose", process, timeout)
 
     def reg_delete_key(self, keyName):
         """Deletes a key from the registry.
         A registry key must start with "HKEY_LOCAL_MACHINE" ("HKLM") or "HKEY_USERS" ("HKU") or
         "HKEY_CURRENT_USER" ("HKCU") or "HKEY_CLASSES_ROOT" ("HKCR") or "HKEY_CURRENT_CONFIG" ("HKCC").
         Deleting from the registry is potentially dangerous--please exercise caution!
-        It is possible to access remote registries by using a keyname in the form "\\computername\keyname".
+        It is possible to access remote registries by using a keyname in the form "\\\\computername\\keyname".
         To use this feature you must have the correct access rights on NT/2000/XP/2003, or if you are using a 9x based
         OS the remote PC must have the remote regsitry service installed first (See Microsoft Knowledge Base Article
         - 141460).
@@ -656,7 +986,7 @@ class AutoItX3():
                  Failure: Returns 2 if error deleting key.
         :rtype: int
         """
-        return self._aux3.RegDeleteKey(keyName)
+        return self._call("RegDeleteKey", keyName)
 
     def reg_delete_val(self, keyName, valueName):
         """Deletes a value from the registry.
@@ -674,7 +1004,7 @@ class AutoItX3():
                  Failure: Returns 2 if error deleting key/value.
         :rtype: int
         """
-        return self._aux3.RegDeleteVal(keyName, valueName)
+        return self._call("RegDeleteVal", keyName, valueName)
 
     def reg_enum_key(self, keyName, instance):
         """Reads the name of a subkey according to it's instance.
@@ -691,7 +1021,7 @@ class AutoItX3():
                           -1 if unable to retrieve requested subkey (key instance out of range)
         :rtype: str
         """
-        return self._aux3.RegEnumKey(keyName, instance)
+        return self._call("RegEnumKey", keyName, instance)
 
     def reg_enum_val(self, keyName, instance):
         """Reads the name of a value according to it's instance.
@@ -706,7 +1036,7 @@ class AutoItX3():
                           -1 if unable to retrieve requested value name (value instance out of range)
         :rtype: str
         """
-        return self._aux3.RegEnumVal(keyName, instance)
+        return self._call("RegEnumVal", keyName, instance)
 
     def reg_read(self, keyName, valueName):
         """Reads a value from the registry.
@@ -727,7 +1057,27 @@ class AutoItX3():
                           -2 if value type not supported
         :rtype: unicode or int
         """
-        return self._aux3.RegRead(keyName, valueName)
+        return self._call("RegRead", keyName, valueName)
+
+    def reg_snapshot(self, keyName, depth=None):
+        """Reads a registry subtree into plain data that can be stored and compared with autoit.registry.reg_diff.
+
+        :param keyName: The registry key to read, including its root key.
+        :param depth: Optional: Deepest subkey level read, 0 being keyName only.
+        :return: {"key": keyName, "keys": {subkey path relative to keyName: {value name: value}}}
+        :rtype: dict
+        """
+        return reg_snapshot(self, keyName, depth)
+
+    def reg_walk(self, keyName, depth=None, values=True):
+        """Yields a registry key and its subkeys as RegKey records, each followed by RegValue records for its values,
+        see autoit.registry.
+
+        :param keyName: The registry key to walk, including its root key.
+        :param depth: Optional: Deepest subkey level visited, 0 being keyName only.
+        :param values: Optional: Read the values too.
+        """
+        return reg_walk(self, keyName, depth, values)
 
     def reg_write(self, keyName, valueName, type, value):
         """Creates a key or value in the registry.
@@ -748,7 +1098,7 @@ class AutoItX3():
                  Failure: Returns 0 if error writing registry key or value.
         :rtype: int
         """
-        return self._aux3.RegWrite(keyName, valueName, type, value)
+        return self._call("RegWrite", keyName, valueName, type, value)
 
     def run(self, filename, workingDir="", flag=1):
         """Runs an external program.
@@ -766,7 +1116,7 @@ class AutoItX3():
                  Failure: see Remarks.
         :rtype: int
         """
-        return self._aux3.Run(filename, workingDir, flag)
+        return self._call("Run", filename, workingDir, flag)
 
     def run_as_set(self, user, domain, password, options=1):
         """Initialise a set of user credentials to use during Run and RunWait operations. 2000/XP or later ONLY.
@@ -790,7 +1140,16 @@ class AutoItX3():
                  subsequent Run/RunWait commands will fail....)
         :rtype: int
         """
-        return self._aux3.RunAsSet(user, domain, password, options)
+        return self._call("RunAsSet", user, domain, password, options)
+
+    def run_many(self, max_concurrency=4):
+        """Launcher starting programs with run, at most max_concurrency at a time, and waiting on all of them
+        together, see autoit.launcher. Queue programs with add() and start them with run() or as_completed().
+
+        :param max_concurrency: Optional: Most programs running at the same time.
+        :rtype: Launcher
+        """
+        return Launcher(AutoItBackend(self), max_concurrency)
 
     def run_wait(self, filename, workingDir="", flag=1):
         """Runs an external program and pauses script execution until the program finishes.
@@ -810,7 +1169,7 @@ class AutoItX3():
                  Failure: see Remarks.
         :rtype: int
         """
-        return self._aux3.RunWait(filename, workingDir, flag)
+        return self._call("RunWait", filename, workingDir, flag)
 
     def send(self, keys, flag=0):
         """Sends simulated keystrokes to the active window.
@@ -823,7 +1182,30 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.Send(keys, flag)
+        return self._call("Send", keys, flag)
+
+    def send_keys(self, keys, flag=0, chunk=None, pause=0):
+        """Sends keystrokes like send, validating the sequence first (see autoit.keys) and sending it in chunks of at
+        most chunk keystrokes, pause seconds apart, if chunk is given.
+
+        :raises autoit.keys.KeySyntaxError: if the sequence is malformed, before anything is sent
+        :return: 1, like control_send_keys on success; Send reports no failure
+        :rtype: int
+        """
+        sequence = compile_keys(keys, flag)
+        for index, part in enumerate(sequence.chunks(chunk) if chunk else [keys]):
+            if index and pause:
+                time.sleep(pause)
+            self.send(part, flag)
+        return 1
+
+    def send_estimate(self, keys, flag=0):
+        """Seconds send takes for a key sequence with the SendKeyDelay and SendKeyDownDelay set through
+        auto_it_set_option, or AutoIt's defaults.
+        :rtype: float
+        """
+        return compile_keys(keys, flag).estimate(self.options.get("sendkeydelay", DEFAULT_KEY_DELAY),
+                                                 self.options.get("sendkeydowndelay", DEFAULT_KEY_DOWN_DELAY))
 
     def shutdown(self, code):
         """Shuts down the system.
@@ -839,7 +1221,7 @@ class AutoItX3():
                  Failure: Returns 0.
         :rtype: int
         """
-        return self._aux3.Shutdown(code)
+        return self._call("Shutdown", code)
 
     def sleep(self, delay):
         """Pause script execution.
@@ -849,7 +1231,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.Sleep(delay)
+        return self._call("Sleep", delay)
 
     def statusbar_get_text(self, title, text="", part=1):
         """Retrieves the text from a standard status bar control.
@@ -870,7 +1252,30 @@ class AutoItX3():
                  Failure: Returns empty string and sets oAutoIt.error to 1 if no text could be read.
         :rtype: unicode
         """
-        return self._aux3.StatusBarGetText(title, text, part)
+        return self._call("StatusBarGetText", title, text, part)
+
+    def tree_view(self, title, text, controlId, expand=False):
+        """Lazy walker over a TreeView control fetching and memoizing items on demand, see autoit.treeview.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to interact with.
+        :param expand: Optional: Expand every item before counting its children.
+        :rtype: TreeView
+        """
+        return TreeView(self, title, text, controlId, expand)
+
+    def type_text(self, title, text, controlId, string, strategy=None, replace=True):
+        """Enters text into a control with keystrokes, control_set_text or a clipboard paste, whichever fits the text
+        length and control class, and verifies it with control_get_text, see autoit.textentry.
+
+        :param string: The text to enter, sent literally.
+        :param strategy: Optional: "keys", "set_text" or "paste" to force a strategy.
+        :param replace: Optional: Replace the control's text instead of inserting at the caret.
+        :return: TextEntry(strategy, verified, tried)
+        :rtype: TextEntry
+        """
+        return type_text(self, title, text, controlId, string, strategy, replace)
 
     def tool_tip(self, text, x=LOWEST_INT, y=LOWEST_INT):
         """Creates a tooltip anywhere on the screen.
@@ -888,7 +1293,36 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.ToolTip(text, x, y)
+        return self._call("ToolTip", text, x, y)
+
+    def watch(self, title, text, controlId, callback, min_interval=0, factory=None):
+        """Calls back when the text of a control changes, polled together with all other watches of this instance by
+        one thread, see autoit.watch. The watcher is self.watcher and is started on first use. The poller thread never
+        uses this instance, so its calls cannot change the error flag read after the caller's calls.
+
+        :param title: The title of the window to access.
+        :param text: The text of the window to access.
+        :param controlId: The control to watch.
+        :param callback: callable(subscription, previous, value) run on the poller thread.
+        :param min_interval: Optional: Minimum seconds between two callbacks of this watch.
+        :param factory: Optional: callable returning the AutoItX3 of the poller, called on the poller thread when the
+                        watcher is created. By default a copy of this instance binding its own COM object; required
+                        for an instance with an injected backend.
+        :return: Subscription, cancel() it to stop watching.
+        :rtype: Subscription
+        :raises ValueError: for an instance with an injected backend, if the watcher does not exist and no factory
+                            is given
+        """
+        if self.watcher is None:
+            if factory is None:
+                if not self._owns_backend:
+                    raise ValueError("watch on an injected backend needs a factory for the poller's own instance")
+                factory = self._clone
+            # a COM object is bound inside the poller thread's own apartment
+            self.watcher = Watcher(factory)
+        subscription = self.watcher.watch(title, text, controlId, callback, min_interval)
+        self.watcher.start()
+        return subscription
 
     def win_activate(self, title, text=""):
         """Activates (gives focus to) a window.
@@ -904,7 +1338,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.WinActivate(title, text)
+        return self._call("WinActivate", title, text)
 
     def win_active(self, title, text=""):
         """Checks to see if a specified window exists and is currently active.
@@ -917,7 +1351,7 @@ class AutoItX3():
                  Failure: Returns 0 if window is not active.
         :rtype: int
         """
-        return self._aux3.WinActive(title, text)
+        return self._call("WinActive", title, text)
 
     def win_close(self, title, text=""):
         """Closes a window.
@@ -930,7 +1364,7 @@ class AutoItX3():
         :return: None
         :rtype: None
         """
-        return self._aux3.WinClose(title, text)
+        return self._call("WinClose", title, text)
 
     def win_exists(self, title, text):
         """Checks to see if a specified window exists.
@@ -942,7 +1376,7 @@ class AutoItX3():
         :type text: str
         :return: Returns 1 if the window exists, otherwise returns 0.
         """
-        return self._aux3.WinExists(title, text)
+        return self._call("WinExists", title, text)
 
     def win_get_caret_pos_x(self):
         """Returns the coordinates of the caret in the foreground window
@@ -955,7 +1389,7 @@ class AutoItX3():
                  Failure: Sets oAutoIt.error to 1.
         :rtype: int
         """
-        return self._aux3.WinGetCaretPosX()
+        return self._call("WinGetCaretPosX")
 
     def win_get_caret_pos_y(self):
         """Returns the coordinates of the caret in the foreground window
@@ -964,4 +1398,137 @@ class AutoItX3():
                  Failure: Sets oAutoIt.error to 1.
         :rtype: int
         """
-        return self._aux3.WinGetCaretPosY()
+        return self._call("WinGetCaretPosY")
+
+    def win_get_handle(self, title, text=""):
+        """Retrieves the internal handle of a window.
+        The handle can be used as title in the form "[HANDLE:<handle>]" to address exactly this window.
+
+        :param title: The title of the window to read.
+        :type title: str
+        :param text: Optional: The text of the window to read.
+        :type text: str
+        :return: Success: Returns a string containing the window handle value.
+                 Failure: Returns "" (blank string) and sets oAutoIt.error to 1 if no window matches the criteria.
+        :rtype: unicode
+        """
+        return self._call("WinGetHandle", title, text)
+
+    def win_get_pos_height(self, title, text=""):
+        """Retrieves the height of a given window.
+
+        :return: Success: Returns the height of the window.  Failure sets error to 1.
+        :rtype: int
+        """
+        return self._call("WinGetPosHeight", title, text)
+
+    def win_get_pos_width(self, title, text=""):
+        """Retrieves the width of a given window.
+
+        :return: Success: Returns the width of the window.  Failure sets error to 1.
+        :rtype: int
+        """
+        return self._call("WinGetPosWidth", title, text)
+
+    def win_get_pos_x(self, title, text=""):
+        """Retrieves the X coordinate of a given window. A minimized window returns -32000.
+
+        :return: Success: Returns the X coordinate of the window.  Failure sets error to 1.
+        :rtype: int
+        """
+        return self._call("WinGetPosX", title, text)
+
+    def win_get_pos_y(self, title, text=""):
+        """Retrieves the Y coordinate of a given window. A minimized window returns -32000.
+
+        :return: Success: Returns the Y coordinate of the window.  Failure sets error to 1.
+        :rtype: int
+        """
+        return self._call("WinGetPosY", title, text)
+
+    def win_get_rect(self, title, text="", consistent=False):
+        """Retrieves position and size of a window as one record.
+
+        :param title: The title of the window to read.
+        :param text: Optional: The text of the window to read.
+        :param consistent: Pin the window by handle and read all fields again until two reads agree, see
+                           autoit.snapshot.
+        :type consistent: bool
+        :return: Rect(x, y, width, height), None if consistent and no window matches
+        :rtype: Rect
+        :raises autoit.snapshot.InconsistentRead: if consistent and the fields kept changing
+        """
+        if consistent:
+            window = self._pin(title, text, {})
+            if window is None:
+                return None
+            title, text = window
+        return read_rect(self._call, WINDOW_RECT_MEMBERS, (title, text), consistent)
+
+    def win_get_state(self, title, text=""):
+        """Retrieves the state of a given window.
+
+        :param title: The title of the window to read.
+        :type title: str
+        :param text: Optional: The text of the window to read.
+        :type text: str
+        :return: Success: Returns a value indicating the state of the window. Multiple values are added together:
+                          1 = Window exists
+                          2 = Window is visible
+                          4 = Window is enabled
+                          8 = Window is active
+                          16 = Window is minimized
+                          32 = Window is maximized
+                 Failure: Returns 0 and sets oAutoIt.error to 1 if the window is not found.
+        :rtype: int
+        """
+        return self._call("WinGetState", title, text)
+
+    def win_get_text(self, title, text=""):
+        """Retrieves the text from a window.
+        Up to 64KB of window text can be retrieved. WinGetText works on minimized windows, but only works on hidden
+        windows if you've set AutoItSetOption("WinDetectHiddenText", 1)
+
+        :param title: The title of the window to read.
+        :type title: str
+        :param text: Optional: The text of the window to read.
+        :type text: str
+        :return: Success: Returns a string containing the window text read.
+                 Failure: Returns numeric 1 and sets oAutoIt.error to 1 if no title match.
+        :rtype: unicode
+        """
+        return self._call("WinGetText", title, text)
+
+    def win_get_title(self, title, text=""):
+        """Retrieves the full title from a window.
+
+        :param title: The title of the window to read.
+        :type title: str
+        :param text: Optional: The text of the window to read.
+        :type text: str
+        :return: Success: Returns a string containing the complete window title.
+                 Failure: Returns numeric 1 if no title match.
+        :rtype: unicode
+        """
+        return self._call("WinGetTitle", title, text)
+
+    def win_kill(self, title, text=""):
+        """Forces a window to close.
+        The difference between this function and WinClose is that WinKill will forcibly terminate the window if
+        it doesn't respond to the close message.
+
+        :param title: The title of the window to close.
+        :param text: Optional: The text of the window to close.
+        :return: None
+        :rtype: None
+        """
+        return self._call("WinKill", title, text)
+
+
+def wrapper_methods():
+    """Names of the AutoItX3 methods that take and return plain values, i.e. the methods a proxy running the wrapper
+    in another thread or process can mirror.
+    :rtype: list
+    """
+    return sorted(name for name, value in vars(AutoItX3).items()
+                  if not name.startswith("_") and inspect.isfunction(value) and name not in AutoItX3._LOCAL_METHODS)
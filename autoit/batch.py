@@ -0,0 +1,156 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Queues AutoItX3 calls and runs them back-to-back, capturing the error flag right after each call:
+
+    with autoit.batch() as b:
+        b.control_set_text("Form", "", "Edit1", "john")
+        b.control_click("Form", "", "Button1")
+        b.control_get_text("Form", "", "Static1")
+    for value, error in b.results:
+        ...
+
+Queued calls are plain (method name, args, kwargs) tuples, so a batch can be handed to an executor that runs it
+next to a backend living in another thread or process. A call that a checked instance rejects does not end the batch:
+it is recorded with the error flag, like on an unchecked instance.
+"""
+from collections import namedtuple
+from .errors import AutoItXError, ErrorFlagSet, FailureReturned
+
+CallResult = namedtuple("CallResult", "value error")
+
+
+class Batch(object):
+    """Collects calls to AutoItX3 methods and executes them when the with block exits without an exception.
+
+    Calling a queued method returns the index its result will have in results.
+    """
+
+    def __init__(self, autoit, executor=None, stop_on_error=False, read_errors=True):
+        """
+        :param autoit: AutoItX3 instance whose methods are queued.
+        :param executor: Optional callable (calls, stop_on_error) -> list of CallResult. Defaults to running the
+                         calls on autoit with execute_batch.
+        :param stop_on_error: Stop at the first call that sets the error flag.
+        :type stop_on_error: bool
+        :param read_errors: Read the error flag after each call; with False the calls run without it and each
+                            result's error is None, unless a checked instance rejected the call. Not used by custom
+                            executors.
+        :type read_errors: bool
+        """
+        if stop_on_error and not read_errors:
+            raise ValueError("stop_on_error needs the error flags")
+        self._autoit = autoit
+        self._executor = executor
+        self.stop_on_error = stop_on_error
+        self.read_errors = read_errors
+        self.calls = []
+        self.results = None
+
+    def __getattr__(self, name):
+        if name not in _batchable():
+            raise AttributeError("%s has no method %r that can be batched" % (type(self._autoit).__name__, name))
+
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return len(self.calls) - 1
+        queue.__name__ = name
+        return queue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+        return False
+
+    def run(self):
+        """Executes the queued calls and clears the queue.
+
+        :return: one CallResult(value, error) per executed call
+        :rtype: list
+        """
+        calls, self.calls = self.calls, []
+        if self._executor is None:
+            self.results = execute_batch(self._autoit, calls, self.stop_on_error, self.read_errors)
+        else:
+            self.results = self._executor(calls, self.stop_on_error)
+        return self.results
+
+
+def call_reader(autoit):
+    """Callable running a list of (method, args) calls on autoit and returning their values, in one batch for
+    proxies such as AutoItClient. A call rejected by a checked instance raises AutoItXError, as it does locally."""
+    from .autoitx import AutoItX3
+    if isinstance(autoit, AutoItX3):
+        # a local batch would read the error flag after every call, doubling the COM calls
+        return lambda calls: [getattr(autoit, method)(*args) for method, args in calls]
+
+    def read(calls):
+        with autoit.batch(read_errors=False) as batch:
+            for method, args in calls:
+                getattr(batch, method)(*args)
+        for (method, args), (value, error) in zip(calls, batch.results):
+            if error is not None:
+                raise AutoItXError("%s failed, error flag is %s" % (method, error), method, value, error)
+        return [result.value for result in batch.results]
+    return read
+
+
+def call_with_error(autoit, method, args, ambiguous=None):
+    """Calls one method and reads the error flag right after it. Proxies such as AutoItClient run both in one request:
+    a separate read could reach a different server worker, and they have no error attribute.
+
+    :param ambiguous: callable(value) telling whether the error flag is needed; for AutoItX3 the flag is only read
+        when it returns true, the error being 0 otherwise. Read for every value by default.
+    :rtype: CallResult
+    """
+    from .autoitx import AutoItX3
+    if isinstance(autoit, AutoItX3):
+        value = getattr(autoit, method)(*args)
+        return CallResult(value, autoit.error if ambiguous is None or ambiguous(value) else 0)
+    with autoit.batch() as batch:
+        getattr(batch, method)(*args)
+    return batch.results[0]
+
+
+_BATCHABLE = None
+# raised by checked instances for calls that returned, see autoit.errors.check_result
+_REJECTED = (ErrorFlagSet, FailureReturned)
+
+
+def _batchable():
+    global _BATCHABLE
+    if _BATCHABLE is None:
+        from .autoitx import wrapper_methods
+        _BATCHABLE = frozenset(wrapper_methods())
+    return _BATCHABLE
+
+
+def execute_batch(autoit, calls, stop_on_error=False, read_errors=True):
+    """Runs (method name, args, kwargs) calls on an AutoItX3 instance in one loop.
+
+    :param autoit: AutoItX3 instance to run the calls on.
+    :param calls: sequence of (method name, args, kwargs) tuples.
+    :param stop_on_error: Stop at the first call that sets the error flag.
+    :param read_errors: Read the error flag after each call, which doubles the calls made; with False the error is
+        None for every call a checked instance does not reject.
+    :return: one CallResult(value, error) per executed call; a call a checked instance rejects has the error flag
+        it read, or the one read right after it
+    :rtype: list
+    """
+    methods = [getattr(autoit, name) for name, args, kwargs in calls]
+    get = autoit._get
+    results = []
+    append = results.append
+    for method, (name, args, kwargs) in zip(methods, calls):
+        try:
+            value = method(*args, **kwargs)
+            error = get("error") if read_errors else None
+        except _REJECTED as e:
+            value, error = e.result, e.error if e.error is not None else get("error")
+        append(CallResult(value, error))
+        if error and stop_on_error:
+            break
+    return results
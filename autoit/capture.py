@@ -0,0 +1,480 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Local screen capture with pixel operations matching AutoItX's PixelGetColor, PixelSearch and PixelChecksum.
+
+A region is grabbed once into a Frame, a contiguous buffer of 0xRRGGBB values in row-major order, and searched or
+checksummed locally instead of with one COM call per pixel:
+
+    frame = capture(0, 0, 1919, 1079)
+    frame.pixel_search(100, 100, 400, 300, 0xFF0000, shadeVariation=10)
+    frame.pixel_checksum(100, 100, 400, 300)
+    frame.pixel_search_many([(0, 0, 99, 99), (100, 0, 199, 99)], [0xFF0000, (0xFFBF00, 16), 0x00FF00])
+
+Coordinates are screen coordinates as in the AutoItX3 methods, with right and bottom inclusive; as in PixelSearch,
+a right smaller than left searches from right to left and a bottom smaller than top from the bottom up. The
+operations are vectorized with NumPy when it is installed and fall back to pure Python otherwise.
+
+Capture sources are objects with a grab(left, top, right, bottom) method returning a Frame. GdiSource captures the
+Windows desktop; SyntheticSource serves frames built in Python, e.g. for tests on Linux.
+"""
+import operator
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# array typecode of an unsigned 32 bit integer
+TYPECODE = "I" if array("I").itemsize == 4 else "L"
+ADLER_MODULUS = 65521
+# up to this many accepted colours pixel_search matches against a set instead of comparing channels
+_SHADE_SET_LIMIT = 35000
+
+
+def _channels(colour):
+    return (colour >> 16) & 0xFF, (colour >> 8) & 0xFF, colour & 0xFF
+
+
+def shade_colours(colour, shadeVariation):
+    """All colours within shadeVariation of colour on each of the red, green and blue channels.
+    :rtype: frozenset
+    """
+    ranges = [range(max(0, channel - shadeVariation), min(255, channel + shadeVariation) + 1)
+              for channel in _channels(colour)]
+    return frozenset((red << 16) | (green << 8) | blue for red in ranges[0] for green in ranges[1] for blue in ranges[2])
+
+
+def colour_matches(pixel, colour, shadeVariation=0):
+    """Whether a pixel is within shadeVariation of colour on every channel.
+    :rtype: bool
+    """
+    if not shadeVariation:
+        return pixel == colour
+    return all(abs(a - b) <= shadeVariation for a, b in zip(_channels(pixel), _channels(colour)))
+
+
+def _slice(positions):
+    # slice equivalent of a range; a descending range ending before 0 must run to the start instead
+    return slice(positions.start, positions.stop if positions.stop >= 0 else None, positions.step)
+
+
+def to_colorref(colour):
+    """Converts 0xRRGGBB to a Windows COLORREF, 0x00BBGGRR.
+    :rtype: int
+    """
+    return ((colour & 0xFF) << 16) | (colour & 0xFF00) | ((colour >> 16) & 0xFF)
+
+
+class Frame(object):
+    """Pixels of a screen region as 0xRRGGBB values, row-major, in a contiguous unsigned 32 bit buffer."""
+
+    def __init__(self, left, top, width, height, pixels):
+        """
+        :param left: screen x coordinate of the first column.
+        :param top: screen y coordinate of the first row.
+        :param width: number of columns.
+        :param height: number of rows.
+        :param pixels: width * height 0xRRGGBB values, row-major; an array of TYPECODE is used without copying.
+        """
+        if not (isinstance(pixels, array) and pixels.typecode == TYPECODE):
+            pixels = array(TYPECODE, pixels)
+        if len(pixels) != width * height:
+            raise ValueError("expected %d pixels, got %d" % (width * height, len(pixels)))
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.pixels = pixels
+
+    @classmethod
+    def from_rows(cls, rows, left=0, top=0):
+        """Frame from a list of rows of 0xRRGGBB values.
+        :rtype: Frame
+        """
+        rows = list(rows)
+        width = len(rows[0]) if rows else 0
+        pixels = array(TYPECODE)
+        for row in rows:
+            if len(row) != width:
+                raise ValueError("rows differ in length")
+            pixels.extend(row)
+        return cls(left, top, width, len(rows), pixels)
+
+    @classmethod
+    def filled(cls, left, top, width, height, colour=0):
+        """Frame of one colour.
+        :rtype: Frame
+        """
+        return cls(left, top, width, height, array(TYPECODE, [colour]) * (width * height))
+
+    @property
+    def right(self):
+        return self.left + self.width - 1
+
+    @property
+    def bottom(self):
+        return self.top + self.height - 1
+
+    @property
+    def buffer(self):
+        """The pixel buffer as a memoryview, without copying.
+        :rtype: memoryview
+        """
+        return memoryview(self.pixels)
+
+    def as_array(self):
+        """The pixels as a (height, width) uint32 NumPy array sharing the frame's buffer. Requires NumPy."""
+        if numpy is None:
+            raise ImportError("as_array requires numpy")
+        return numpy.frombuffer(self.pixels, dtype=numpy.uint32).reshape(self.height, self.width)
+
+    def __repr__(self):
+        return "Frame(left=%d, top=%d, width=%d, height=%d)" % (self.left, self.top, self.width, self.height)
+
+    def _clip(self, left, top, right, bottom):
+        """Frame-relative (x0, y0, x1, y1) of a screen rectangle clipped to the frame, x1 and y1 exclusive. Reversed
+        edges are swapped."""
+        left, right = min(left, right), max(left, right)
+        top, bottom = min(top, bottom), max(top, bottom)
+        x0 = max(left - self.left, 0)
+        y0 = max(top - self.top, 0)
+        x1 = min(right - self.left + 1, self.width)
+        y1 = min(bottom - self.top + 1, self.height)
+        return x0, y0, max(x0, x1), max(y0, y1)
+
+    def _scan_order(self, left, top, right, bottom, step):
+        """Frame-relative columns and rows of a clipped screen rectangle as ranges in the order PixelSearch visits
+        them: descending where right < left or bottom < top."""
+        x0, y0, x1, y1 = self._clip(left, top, right, bottom)
+        columns = range(x1 - 1, x0 - 1, -step) if right < left else range(x0, x1, step)
+        rows = range(y1 - 1, y0 - 1, -step) if bottom < top else range(y0, y1, step)
+        return columns, rows
+
+    def _rows(self, x0, y0, x1, y1, step):
+        width, pixels = self.width, self.pixels
+        for y in range(y0, y1, step):
+            yield y, pixels[y * width + x0:y * width + x1:step]
+
+    def crop(self, left, top, right, bottom):
+        """Copy of a screen rectangle of this frame, clipped to the frame.
+        :rtype: Frame
+        """
+        x0, y0, x1, y1 = self._clip(left, top, right, bottom)
+        pixels = array(TYPECODE)
+        for y, row in self._rows(x0, y0, x1, y1, 1):
+            pixels.extend(row)
+        return Frame(self.left + x0, self.top + y0, x1 - x0, y1 - y0, pixels)
+
+    def pixel_get_color(self, x, y):
+        """Colour of a pixel, like AutoItX3.pixel_get_color.
+
+        :return: 0xRRGGBB value, -1 if the coordinates are outside the frame
+        :rtype: int
+        """
+        x -= self.left
+        y -= self.top
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.pixels[y * self.width + x]
+        return -1
+
+    def pixel_search(self, left, top, right, bottom, colour, shadeVariation=0, step=1):
+        """Searches a rectangle for a colour like AutoItX3.pixel_search: columns are scanned left to right, each top
+        to bottom, and the first match is returned. Pass right < left to scan the columns from right to left and
+        bottom < top to scan each column from the bottom up.
+
+        :param colour: 0xRRGGBB colour to find.
+        :param shadeVariation: allowed difference (0-255) of each of the red, green and blue channels.
+        :param step: check every step-th pixel of every step-th column.
+        :return: (x, y) screen coordinates of the first match, None if not found
+        :rtype: tuple
+        """
+        columns, rows = self._scan_order(left, top, right, bottom, step)
+        if not columns or not rows:
+            return None
+        if numpy is not None:
+            found = self._search_numpy(columns, rows, colour, shadeVariation)
+        else:
+            found = self._search_python(columns, rows, colour, shadeVariation)
+        if found is None:
+            return None
+        return self.left + found[0], self.top + found[1]
+
+    def _search_numpy(self, columns, rows, colour, shadeVariation):
+        region = self.as_array()[_slice(rows), _slice(columns)]
+        mask = match_mask(region, colour, shadeVariation)
+        # transposed so that ravel() runs column by column, the order AutoIt scans in
+        flat = mask.T.ravel()
+        index = int(flat.argmax())
+        if not flat[index]:
+            return None
+        column, row = divmod(index, mask.shape[0])
+        return columns[column], rows[row]
+
+    def _search_python(self, columns, rows, colour, shadeVariation):
+        best = None
+        if shadeVariation and (2 * shadeVariation + 1) ** 3 > _SHADE_SET_LIMIT:
+            target = _channels(colour)
+
+            def first(row):
+                for index, pixel in enumerate(row):
+                    if all(abs(a - b) <= shadeVariation for a, b in zip(_channels(pixel), target)):
+                        return index
+                return None
+        elif shadeVariation:
+            accepted = shade_colours(colour, shadeVariation)
+
+            def first(row):
+                for index, pixel in enumerate(row):
+                    if pixel in accepted:
+                        return index
+                return None
+        else:
+            def first(row):
+                try:
+                    return row.index(colour)
+                except ValueError:
+                    return None
+        width, pixels = self.width, self.pixels
+        for y in rows:
+            row = pixels[_slice(range(y * width + columns.start, y * width + columns.stop, columns.step))]
+            if best is not None:
+                # only a match in an earlier column can still win
+                row = row[:best[0]]
+            index = first(row)
+            if index is not None and (best is None or index < best[0]):
+                best = (index, y)
+                if index == 0:
+                    break
+        if best is None:
+            return None
+        return columns[best[0]], best[1]
+
+    def pixel_search_many(self, regions, colours, step=1):
+        """Searches several rectangles for several colours, scanning each rectangle once. Every (region, colour)
+        pair gets the hit pixel_search would return for it.
+
+        :param regions: (left, top, right, bottom) screen rectangles.
+        :param colours: 0xRRGGBB colours, or (colour, shadeVariation) pairs.
+        :param step: check every step-th pixel of every step-th column.
+        :return: one list per region holding (x, y) or None per colour
+        :rtype: list
+        """
+        regions = list(regions)
+        colours = list(colours)
+        found = [[None] * len(colours) for _ in regions]
+        for region, colour, x, y in self.iter_pixel_search(regions, colours, step):
+            found[region][colour] = (x, y)
+        return found
+
+    def iter_pixel_search(self, regions, colours, step=1, band=256):
+        """Generator variant of pixel_search_many yielding (region index, colour index, x, y) per first hit as the
+        scan reaches it. Each region is scanned column by column (with NumPy, band columns at a time) and only until all
+        colours were found, so a consumer can stop early and memory stays bounded on very large regions.
+        """
+        specs = [colour if isinstance(colour, tuple) else (colour, 0) for colour in colours]
+        scan = self._scan_numpy if numpy is not None else self._scan_python
+        for index, region in enumerate(regions):
+            columns, rows = self._scan_order(*(tuple(region) + (step,)))
+            if not columns or not rows:
+                continue
+            for colour, x, y in scan(columns, rows, specs, band):
+                yield index, colour, self.left + x, self.top + y
+
+    def _scan_numpy(self, columns, rows, specs, band):
+        pixels = self.as_array()
+        pending = list(range(len(specs)))
+        for start in range(0, len(columns), band):
+            part = columns[start:start + band]
+            region = pixels[_slice(rows), _slice(part)]
+            hits = []
+            for colour in pending:
+                mask = match_mask(region, *specs[colour]).T
+                flat = mask.ravel()
+                index = int(flat.argmax())
+                if flat[index]:
+                    column, row = divmod(index, mask.shape[1])
+                    hits.append((column, row, colour))
+            # in scan order: by column, then row
+            for column, row, colour in sorted(hits):
+                pending.remove(colour)
+                yield colour, part[column], rows[row]
+            if not pending:
+                return
+
+    def _scan_python(self, columns, rows, specs, band):
+        # accepted pixel value -> indexes of the colours it matches; wide shade variations are compared per channel
+        lookup = {}
+        wide = []
+        for colour, (value, shadeVariation) in enumerate(specs):
+            if shadeVariation and (2 * shadeVariation + 1) ** 3 > _SHADE_SET_LIMIT:
+                wide.append(colour)
+                continue
+            for accepted in (shade_colours(value, shadeVariation) if shadeVariation else (value,)):
+                lookup.setdefault(accepted, []).append(colour)
+        pending = set(range(len(specs)))
+        keys = lookup.keys()
+        width, pixels = self.width, self.pixels
+        for x in columns:
+            column = pixels[_slice(range(rows.start * width + x, rows.stop * width + x, rows.step * width))]
+            # isdisjoint runs in C and skips the columns without any candidate pixel
+            if not wide and keys.isdisjoint(column):
+                continue
+            for row, value in enumerate(column):
+                matches = [colour for colour in lookup.get(value, ()) if colour in pending]
+                matches.extend(colour for colour in wide if colour in pending and colour_matches(value, *specs[colour]))
+                for colour in sorted(matches):
+                    pending.discard(colour)
+                    yield colour, x, rows[row]
+                if not pending:
+                    return
+
+    def pixel_checksum(self, left, top, right, bottom, step=1):
+        """Checksum of a rectangle like AutoItX3.pixel_checksum: an Adler-32 sum over the COLORREF (0x00BBGGRR)
+        values of every step-th pixel of every step-th row, in row-major order.
+
+        :rtype: int
+        """
+        x0, y0, x1, y1 = self._clip(left, top, right, bottom)
+        if numpy is not None:
+            region = self.as_array()[y0:y1:step, x0:x1:step].astype(numpy.int64).ravel()
+            values = ((region & 0xFF) << 16) | (region & 0xFF00) | ((region >> 16) & 0xFF)
+            return _adler_numpy(values)
+        values = array(TYPECODE)
+        for y, row in self._rows(x0, y0, x1, y1, step):
+            values.extend(row)
+        return adler_pixels([to_colorref(value) for value in values])
+
+
+def adler_pixels(values):
+    """Adler-32 over a sequence of pixel values, each added as a whole number rather than byte by byte.
+    :rtype: int
+    """
+    count = len(values)
+    a = (1 + sum(values)) % ADLER_MODULUS
+    # b accumulates a after each value: count * 1 plus every value weighted by the number of sums it is part of
+    b = (count + sum(map(operator.mul, range(count, 0, -1), values))) % ADLER_MODULUS
+    return (b << 16) | a
+
+
+def _adler_numpy(values):
+    count = len(values)
+    values = values % ADLER_MODULUS
+    weights = numpy.arange(count, 0, -1, dtype=numpy.int64) % ADLER_MODULUS
+    a = (1 + int(values.sum())) % ADLER_MODULUS
+    b = (count + int((weights * values % ADLER_MODULUS).sum())) % ADLER_MODULUS
+    return (b << 16) | a
+
+
+def match_mask(region, colour, shadeVariation=0):
+    """Boolean NumPy mask of the pixels of a uint32 array within shadeVariation of colour."""
+    if not shadeVariation:
+        return region == colour
+    mask = None
+    for shift, channel in zip((16, 8, 0), _channels(colour)):
+        values = (region >> shift) & 0xFF if shift else region & 0xFF
+        # range checks on the unsigned values, avoiding a signed copy for abs()
+        within = values <= channel + shadeVariation
+        if channel > shadeVariation:
+            within &= values >= channel - shadeVariation
+        mask = within if mask is None else mask & within
+    return mask
+
+
+class SyntheticSource(object):
+    """Capture source serving regions of a frame built in Python, for tests and offline analysis."""
+
+    def __init__(self, screen):
+        """
+        :param screen: Frame standing for the screen, or a callable returning the current one.
+        """
+        self.screen = screen
+        self.grabs = 0
+
+    def grab(self, left, top, right, bottom):
+        self.grabs += 1
+        screen = self.screen() if callable(self.screen) else self.screen
+        return screen.crop(left, top, right, bottom)
+
+
+class GdiSource(object):
+    """Captures the Windows desktop with GDI (BitBlt into a 32 bit top-down DIB)."""
+    SRCCOPY = 0x00CC0020
+    CAPTUREBLT = 0x40000000
+
+    def __init__(self):
+        self._api = None
+
+    def _load(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+                        ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD),
+                        ("biCompression", wintypes.DWORD), ("biSizeImage", wintypes.DWORD),
+                        ("biXPelsPerMeter", wintypes.LONG), ("biYPelsPerMeter", wintypes.LONG),
+                        ("biClrUsed", wintypes.DWORD), ("biClrImportant", wintypes.DWORD)]
+
+        user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+        user32.GetDC.restype = wintypes.HDC
+        user32.GetDC.argtypes = [wintypes.HWND]
+        user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        gdi32.CreateCompatibleBitmap.restype = wintypes.HBITMAP
+        gdi32.CreateCompatibleBitmap.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int]
+        gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        gdi32.GetDIBits.argtypes = [wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT, ctypes.c_void_p,
+                                    ctypes.c_void_p, wintypes.UINT]
+        gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        self._api = ctypes, user32, gdi32, BITMAPINFOHEADER
+        return self._api
+
+    def grab(self, left, top, right, bottom):
+        ctypes, user32, gdi32, BITMAPINFOHEADER = self._api or self._load()
+        width, height = right - left + 1, bottom - top + 1
+        screen = user32.GetDC(None)
+        memory = gdi32.CreateCompatibleDC(screen)
+        bitmap = gdi32.CreateCompatibleBitmap(screen, width, height)
+        previous = gdi32.SelectObject(memory, bitmap)
+        try:
+            if not gdi32.BitBlt(memory, 0, 0, width, height, screen, left, top, self.SRCCOPY | self.CAPTUREBLT):
+                raise ctypes.WinError()
+            header = BITMAPINFOHEADER(biSize=ctypes.sizeof(BITMAPINFOHEADER), biWidth=width, biHeight=-height,
+                                      biPlanes=1, biBitCount=32, biCompression=0)
+            data = ctypes.create_string_buffer(width * height * 4)
+            if not gdi32.GetDIBits(memory, bitmap, 0, height, data, ctypes.byref(header), 0):
+                raise ctypes.WinError()
+        finally:
+            gdi32.SelectObject(memory, previous)
+            gdi32.DeleteObject(bitmap)
+            gdi32.DeleteDC(memory)
+            user32.ReleaseDC(None, screen)
+        # BGRA bytes read as little-endian uint32 are 0xAARRGGBB; clear the unused alpha byte
+        raw = bytearray(data.raw)
+        raw[3::4] = bytes(bytearray(width * height))
+        pixels = array(TYPECODE)
+        pixels.frombytes(bytes(raw))
+        return Frame(left, top, width, height, pixels)
+
+
+_default_source = None
+
+
+def capture(left, top, right, bottom, source=None):
+    """Grabs a screen rectangle into a Frame.
+
+    :param source: capture source, by default a shared GdiSource.
+    :rtype: Frame
+    """
+    global _default_source
+    if source is None:
+        if _default_source is None:
+            _default_source = GdiSource()
+        source = _default_source
+    return source.grab(left, top, right, bottom)
@@ -0,0 +1,172 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Tile-based screen change detection.
+
+A ChangeDetector splits a region into tiles and keeps a hash per tile between polls, so each poll tells which part of
+the region changed instead of only that something did:
+
+    detector = ChangeDetector(0, 0, 799, 599, tile=32)
+    detector.poll()                         # first poll records the baseline
+    dirty = detector.poll()                 # set of Rect tiles changed since the previous poll
+    changed_area(dirty)                     # Rect bounding them
+
+wait_for_region_change and wait_for_region_stable poll adaptively: the interval starts small and grows while the
+region stays the same, so an idle wait costs few captures and a repaint is still noticed quickly.
+"""
+import time
+import zlib
+from .capture import capture
+from .snapshot import Rect
+
+# waits end once less than this many seconds remain, so float rounding cannot leave them spinning on empty sleeps
+_RESOLUTION = 0.001
+
+
+class ChangeDetector(object):
+    """Per-tile hashes of a screen region, compared between polls."""
+
+    def __init__(self, left, top, right, bottom, tile=32, source=None):
+        """
+        :param left, top, right, bottom: screen rectangle to watch, right and bottom inclusive.
+        :param tile: tile edge in pixels, or (width, height); tiles at the right and bottom edges may be smaller.
+        :param source: capture source, see autoit.capture; the default captures the screen.
+        """
+        if right < left or bottom < top:
+            raise ValueError("right and bottom must not be smaller than left and top")
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+        tile_width, tile_height = tile if isinstance(tile, tuple) else (tile, tile)
+        width, height = right - left + 1, bottom - top + 1
+        self.tiles = [Rect(left + x, top + y, min(tile_width, width - x), min(tile_height, height - y))
+                      for y in range(0, height, tile_height) for x in range(0, width, tile_width)]
+        self.source = source
+        self.polls = 0
+        self._hashes = None
+
+    def grab(self):
+        """Captures the watched region.
+        :rtype: autoit.capture.Frame
+        """
+        return capture(self.left, self.top, self.right, self.bottom, self.source)
+
+    def hashes(self, frame):
+        """CRC-32 of every tile of a frame of the watched region, in the order of tiles.
+        :rtype: list
+        """
+        data = frame.buffer.cast("B")
+        stride = frame.width * 4
+        origin_x, origin_y = frame.left, frame.top
+        hashes = []
+        for tile in self.tiles:
+            start = (tile.y - origin_y) * stride + (tile.x - origin_x) * 4
+            length = tile.width * 4
+            crc = 0
+            for offset in range(start, start + tile.height * stride, stride):
+                crc = zlib.crc32(data[offset:offset + length], crc)
+            hashes.append(crc)
+        return hashes
+
+    def poll(self, frame=None):
+        """Tiles that changed since the previous poll. The first poll records the baseline and reports none.
+
+        :param frame: frame of the watched region, captured from the source if not given.
+        :rtype: frozenset
+        """
+        hashes = self.hashes(frame if frame is not None else self.grab())
+        previous, self._hashes = self._hashes, hashes
+        self.polls += 1
+        if previous is None:
+            return frozenset()
+        return frozenset(tile for tile, old, new in zip(self.tiles, previous, hashes) if old != new)
+
+    def reset(self):
+        """Forgets the baseline, the next poll records a new one."""
+        self._hashes = None
+
+
+def changed_area(tiles):
+    """Bounding Rect of a set of tiles, None if it is empty.
+    :rtype: Rect
+    """
+    if not tiles:
+        return None
+    left = min(tile.x for tile in tiles)
+    top = min(tile.y for tile in tiles)
+    right = max(tile.x + tile.width for tile in tiles)
+    bottom = max(tile.y + tile.height for tile in tiles)
+    return Rect(left, top, right - left, bottom - top)
+
+
+class _Backoff(object):
+    """Polling interval growing by factor while nothing happens, back to its minimum after a change."""
+
+    def __init__(self, interval, max_interval, factor=1.5):
+        self.minimum = self.current = interval
+        self.maximum = max(interval, max_interval)
+        self.factor = factor
+
+    def quiet(self):
+        interval = self.current
+        self.current = min(self.current * self.factor, self.maximum)
+        return interval
+
+    def changed(self):
+        self.current = self.minimum
+
+
+def wait_for_region_change(left, top, right, bottom, timeout=None, tile=32, source=None, interval=0.05,
+                           max_interval=0.5, clock=time.time, sleep=time.sleep):
+    """Waits until any tile of a region changes.
+
+    :param timeout: seconds to wait, None waits indefinitely.
+    :param interval: first polling interval in seconds, grown up to max_interval while the region stays the same.
+    :return: the changed tiles, an empty frozenset if the timeout expired
+    :rtype: frozenset
+    """
+    detector = ChangeDetector(left, top, right, bottom, tile, source)
+    backoff = _Backoff(interval, max_interval)
+    deadline = None if timeout is None else clock() + timeout
+    detector.poll()
+    while True:
+        delay = backoff.quiet()
+        if deadline is not None:
+            remaining = deadline - clock()
+            if remaining < _RESOLUTION:
+                return frozenset()
+            delay = min(delay, remaining)
+        sleep(delay)
+        dirty = detector.poll()
+        if dirty:
+            return dirty
+
+
+def wait_for_region_stable(left, top, right, bottom, stable_for=0.5, timeout=None, tile=32, source=None,
+                           interval=0.05, max_interval=0.5, clock=time.time, sleep=time.sleep):
+    """Waits until a region has not changed for stable_for seconds, e.g. until a repaint or animation finished.
+
+    :param stable_for: seconds without change that count as stable.
+    :param timeout: seconds to wait, None waits indefinitely.
+    :param interval: first polling interval in seconds, grown up to max_interval while the region stays the same and
+        reset after every change.
+    :return: 1 if the region became stable, 0 if the timeout expired
+    :rtype: int
+    """
+    detector = ChangeDetector(left, top, right, bottom, tile, source)
+    backoff = _Backoff(interval, max_interval)
+    deadline = None if timeout is None else clock() + timeout
+    detector.poll()
+    quiet_since = clock()
+    while True:
+        now = clock()
+        if quiet_since + stable_for - now < _RESOLUTION:
+            return 1
+        # never sleep past the moment the region would count as stable or the timeout
+        delay = min(backoff.quiet(), quiet_since + stable_for - now)
+        if deadline is not None:
+            if deadline - now < _RESOLUTION:
+                return 0
+            delay = min(delay, deadline - now)
+        sleep(delay)
+        if detector.poll():
+            backoff.changed()
+            quiet_since = clock()
@@ -0,0 +1,105 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Invocation strategies used by AutoItX3 to reach the members of its backend.
+
+DynamicInvoker looks the member up on every call, which on a late-bound win32com Dispatch means an attribute lookup
+plus a GetIDsOfNames round trip per call. CachedInvoker resolves each member's DISPID once and calls IDispatch::Invoke
+directly afterwards; backends without an _oleobj_ (plain Python objects) get their bound methods cached instead.
+"""
+import functools
+
+DISPATCH_METHOD = 1
+DISPATCH_PROPERTYGET = 2
+LOCALE_USER_DEFAULT = 0
+
+# HRESULTs meaning the COM server went away: RPC_E_DISCONNECTED, RPC_E_SERVER_DIED, RPC_E_SERVER_DIED_DNE,
+# RPC_S_SERVER_UNAVAILABLE, RPC_S_CALL_FAILED and CO_E_OBJNOTCONNECTED
+DISCONNECTED_HRESULTS = frozenset([-2147417848, -2147418105, -2147417838, -2147023174, -2147023170, -2147220995])
+
+
+class DynamicInvoker(object):
+    """Late-bound invocation, the member is looked up on every call."""
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+
+    def call(self, name, args):
+        return getattr(self.dispatch, name)(*args)
+
+    def get(self, name):
+        return getattr(self.dispatch, name)
+
+
+class CachedInvoker(object):
+    """Early-bound invocation with one DISPID resolution per member.
+
+    Members whose DISPID cannot be resolved fall back to the dynamic path of the wrapped dispatch.
+    """
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+        self._oleobj = getattr(dispatch, "_oleobj_", None)
+        self._methods = {}
+        self._properties = {}
+        self.dispids = {}
+
+    def call(self, name, args):
+        method = self._methods.get(name)
+        if method is None:
+            method = self._methods[name] = self._bind(name, DISPATCH_METHOD | DISPATCH_PROPERTYGET)
+        return method(*args)
+
+    def get(self, name):
+        getter = self._properties.get(name)
+        if getter is None:
+            getter = self._properties[name] = self._bind(name, DISPATCH_PROPERTYGET)
+        return getter()
+
+    def _bind(self, name, flags):
+        if self._oleobj is None:
+            if flags == DISPATCH_PROPERTYGET:
+                return functools.partial(getattr, self.dispatch, name)
+            return getattr(self.dispatch, name)
+        try:
+            dispid = self._oleobj.GetIDsOfNames(name)
+        except Exception:
+            if flags == DISPATCH_PROPERTYGET:
+                return functools.partial(getattr, self.dispatch, name)
+            return functools.partial(_dynamic_call, self.dispatch, name)
+        self.dispids[name] = dispid
+        return functools.partial(self._oleobj.Invoke, dispid, LOCALE_USER_DEFAULT, flags, True)
+
+
+def _dynamic_call(dispatch, name, *args):
+    return getattr(dispatch, name)(*args)
+
+
+def is_disconnected(exc):
+    """Whether an exception raised by a call means the COM server is gone and the object must be bound again.
+    :rtype: bool
+    """
+    hresult = getattr(exc, "hresult", None)
+    if hresult is None and exc.args and isinstance(exc.args[0], int):
+        hresult = exc.args[0]
+    return hresult in DISCONNECTED_HRESULTS
+
+
+def initialize_apartment():
+    """Enters a single-threaded COM apartment on the calling thread.
+
+    :return: False if pywin32 is not installed and nothing was initialised
+    :rtype: bool
+    """
+    try:
+        import pythoncom
+    except ImportError:
+        return False
+    pythoncom.CoInitialize()
+    return True
+
+
+def uninitialize_apartment():
+    """Leaves the COM apartment entered with initialize_apartment."""
+    import pythoncom
+    pythoncom.CoUninitialize()
@@ -0,0 +1,160 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+How each AutoItX3 method reports failure, and the exceptions raised by AutoItX3(checked=True).
+
+AutoItX functions use one of four conventions:
+    ERROR_FLAG      the error property is set (the return value alone is ambiguous, e.g. reg_read returns 1)
+    SENTINEL        a specific return value means failure (e.g. 0 for control_click, -1 for pixel_get_color)
+    TIMEOUT         a sentinel return value that means a wait timed out (process_wait, process_wait_close)
+    ALWAYS_SUCCEEDS no failure is reported (mouse_move, tool_tip, ...) or the result is an answer, not a status
+                    (win_exists, process_exists)
+
+Checked mode only reads the error property for ERROR_FLAG methods, so checking costs no extra round trips for the
+others.
+"""
+from collections import namedtuple
+
+ALWAYS_SUCCEEDS = "always_succeeds"
+ERROR_FLAG = "error_flag"
+SENTINEL = "sentinel"
+TIMEOUT = "timeout"
+
+ErrorSemantics = namedtuple("ErrorSemantics", "member convention sentinel")
+
+
+class AutoItXError(Exception):
+    """Base class of errors raised by the AutoItX wrapper."""
+
+    def __init__(self, message, method=None, result=None, error=None):
+        Exception.__init__(self, message)
+        self.method = method
+        self.result = result
+        self.error = error
+
+
+class AutoItXBindError(AutoItXError):
+    """The AutoItX3.Control COM object could not be bound."""
+
+
+class ErrorFlagSet(AutoItXError):
+    """The call set the error flag."""
+
+
+class FailureReturned(AutoItXError):
+    """The call returned its failure value."""
+
+
+class WaitTimedOut(FailureReturned):
+    """A wait returned because its timeout expired."""
+
+
+def _s(member, convention, sentinel=None):
+    return ErrorSemantics(member, convention, sentinel)
+
+
+ERROR_SEMANTICS = {
+    "auto_it_set_option": _s("AutoItSetOption", ALWAYS_SUCCEEDS),
+    "block_input": _s("BlockInput", ALWAYS_SUCCEEDS),
+    "cd_tray": _s("CDTray", SENTINEL, 0),
+    "clip_get": _s("ClipGet", ERROR_FLAG),
+    "clip_put": _s("ClipPut", SENTINEL, 0),
+    "control_click": _s("ControlClick", SENTINEL, 0),
+    "control_command": _s("ControlCommand", ERROR_FLAG),
+    "control_disable": _s("ControlDisable", SENTINEL, 0),
+    "control_enable": _s("ControlEnable", SENTINEL, 0),
+    "control_focus": _s("ControlFocus", SENTINEL, 0),
+    "control_get_focus": _s("ControlGetFocus", ERROR_FLAG),
+    "control_get_handle": _s("ControlGetHandle", ERROR_FLAG),
+    "control_get_pos_height": _s("ControlGetPosHeight", ERROR_FLAG),
+    "control_get_pos_width": _s("ControlGetPosWidth", ERROR_FLAG),
+    "control_get_pos_x": _s("ControlGetPosX", ERROR_FLAG),
+    "control_get_pos_y": _s("ControlGetPosY", ERROR_FLAG),
+    "control_get_text": _s("ControlGetText", ERROR_FLAG),
+    "control_hide": _s("ControlHide", SENTINEL, 0),
+    "control_list_view": _s("ControlListView", ERROR_FLAG),
+    "control_move": _s("ControlMove", SENTINEL, 0),
+    "control_send": _s("ControlSend", SENTINEL, 0),
+    "control_set_text": _s("ControlSetText", SENTINEL, 0),
+    "control_show": _s("ControlShow", SENTINEL, 0),
+    "control_tree_view": _s("ControlTreeView", ERROR_FLAG),
+    "drive_map_add": _s("DriveMapAdd", ERROR_FLAG),
+    "drive_map_del": _s("DriveMapDel", SENTINEL, 0),
+    "drive_map_get": _s("DriveMapGet", ERROR_FLAG),
+    "ini_delete": _s("IniDelete", SENTINEL, 0),
+    "ini_read": _s("IniRead", ALWAYS_SUCCEEDS),
+    "ini_write": _s("IniWrite", SENTINEL, 0),
+    "is_admin": _s("IsAdmin", ALWAYS_SUCCEEDS),
+    "mouse_click": _s("MouseClick", ALWAYS_SUCCEEDS),
+    "mouse_click_drag": _s("MouseClickDrag", ALWAYS_SUCCEEDS),
+    "mouse_down": _s("MouseDown", ALWAYS_SUCCEEDS),
+    "mouse_get_cursor": _s("MouseGetCursor", ALWAYS_SUCCEEDS),
+    "mouse_get_pos_x": _s("MouseGetPosX", ALWAYS_SUCCEEDS),
+    "mouse_get_pos_y": _s("MouseGetPosY", ALWAYS_SUCCEEDS),
+    "mouse_move": _s("MouseMove", ALWAYS_SUCCEEDS),
+    "mouse_up": _s("MouseUp", ALWAYS_SUCCEEDS),
+    "mouse_wheel": _s("MouseWheel", ALWAYS_SUCCEEDS),
+    "pixel_checksum": _s("PixelChecksum", ALWAYS_SUCCEEDS),
+    "pixel_get_color": _s("PixelGetColor", SENTINEL, -1),
+    "pixel_search": _s("PixelSearch", ERROR_FLAG),
+    "process_close": _s("ProcessClose", ALWAYS_SUCCEEDS),
+    "process_exists": _s("ProcessExists", ALWAYS_SUCCEEDS),
+    "process_set_priority": _s("ProcessSetPriority", ERROR_FLAG),
+    "process_wait": _s("ProcessWait", TIMEOUT, 0),
+    "process_wait_close": _s("ProcessWaitClose", TIMEOUT, 0),
+    "reg_delete_key": _s("RegDeleteKey", SENTINEL, 2),
+    "reg_delete_val": _s("RegDeleteVal", SENTINEL, 2),
+    "reg_enum_key": _s("RegEnumKey", ERROR_FLAG),
+    "reg_enum_val": _s("RegEnumVal", ERROR_FLAG),
+    "reg_read": _s("RegRead", ERROR_FLAG),
+    "reg_write": _s("RegWrite", SENTINEL, 0),
+    "run": _s("Run", ERROR_FLAG),
+    "run_as_set": _s("RunAsSet", ALWAYS_SUCCEEDS),
+    "run_wait": _s("RunWait", ERROR_FLAG),
+    "send": _s("Send", ALWAYS_SUCCEEDS),
+    "shutdown": _s("Shutdown", SENTINEL, 0),
+    "sleep": _s("Sleep", ALWAYS_SUCCEEDS),
+    "statusbar_get_text": _s("StatusBarGetText", ERROR_FLAG),
+    "tool_tip": _s("ToolTip", ALWAYS_SUCCEEDS),
+    "win_activate": _s("WinActivate", ALWAYS_SUCCEEDS),
+    "win_active": _s("WinActive", ALWAYS_SUCCEEDS),
+    "win_close": _s("WinClose", ALWAYS_SUCCEEDS),
+    "win_exists": _s("WinExists", ALWAYS_SUCCEEDS),
+    "win_get_caret_pos_x": _s("WinGetCaretPosX", ERROR_FLAG),
+    "win_get_caret_pos_y": _s("WinGetCaretPosY", ERROR_FLAG),
+    "win_get_handle": _s("WinGetHandle", ERROR_FLAG),
+    "win_get_pos_height": _s("WinGetPosHeight", ERROR_FLAG),
+    "win_get_pos_width": _s("WinGetPosWidth", ERROR_FLAG),
+    "win_get_pos_x": _s("WinGetPosX", ERROR_FLAG),
+    "win_get_pos_y": _s("WinGetPosY", ERROR_FLAG),
+    "win_get_state": _s("WinGetState", ERROR_FLAG),
+    "win_get_text": _s("WinGetText", ERROR_FLAG),
+    "win_get_title": _s("WinGetTitle", SENTINEL, 1),
+    "win_kill": _s("WinKill", ALWAYS_SUCCEEDS),
+}
+
+#: the same table keyed by AutoItX member name, as (wrapper method name, semantics)
+MEMBER_SEMANTICS = dict((semantics.member, (method, semantics)) for method, semantics in ERROR_SEMANTICS.items())
+
+
+def check_result(method, semantics, result, read_error):
+    """Raises if a result indicates failure according to its method's convention.
+
+    :param method: wrapper method name, used in the exception.
+    :param semantics: ErrorSemantics of the method.
+    :param result: value returned by the call.
+    :param read_error: callable returning the error flag, only called for ERROR_FLAG methods.
+    :return: result
+    """
+    convention = semantics.convention
+    if convention == ERROR_FLAG:
+        error = read_error()
+        if error:
+            raise ErrorFlagSet("%s failed, error flag is %s" % (method, error), method, result, error)
+    elif convention == SENTINEL:
+        if result == semantics.sentinel:
+            raise FailureReturned("%s failed, returned %r" % (method, result), method, result)
+    elif convention == TIMEOUT:
+        if result == semantics.sentinel:
+            raise WaitTimedOut("%s timed out" % method, method, result)
+    return result
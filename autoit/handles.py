@@ -0,0 +1,153 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Title -> window handle resolution cache.
+
+AutoIt matches the title/text pair of every window and control call against all top-level windows. With a
+HandleCache the pair is resolved to a window handle once (WinGetHandle) and later calls address the window as
+"[HANDLE:<handle>]", which AutoIt looks up directly:
+
+    autoit = AutoItX3(handle_cache=HandleCache(ttl=5, maxsize=128))
+    autoit.control_click("Calculator", "", 135)     # resolves "Calculator" once
+    autoit.control_click("Calculator", "", 93)      # sent as control_click("[HANDLE:0x...]", "", 93)
+
+An entry older than ttl seconds is revalidated with WinExists on its handle and re-resolved if the window is gone.
+Within the ttl, a rewritten call that returns a false value with the error flag set is revalidated the same way and
+repeated on the re-resolved window if the cached one is gone. WinClose and WinKill drop the entries of the handle
+they closed. A cached handle keeps addressing the same window even if its title changes meanwhile; evict() the
+entry when that matters. Entries are also dropped when AutoItSetOption is called, since options such as
+WinTitleMatchMode change which window a title matches.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# members taking (title, text) as their first two arguments whose calls are rewritten to the handle form
+WINDOW_MEMBERS = frozenset([
+    "ControlClick", "ControlCommand", "ControlDisable", "ControlEnable", "ControlFocus", "ControlGetFocus",
+    "ControlGetHandle", "ControlGetPosHeight", "ControlGetPosWidth", "ControlGetPosX", "ControlGetPosY",
+    "ControlGetText", "ControlHide", "ControlListView", "ControlMove", "ControlSend", "ControlSetText",
+    "ControlShow", "ControlTreeView", "StatusBarGetText", "WinActivate", "WinActive", "WinClose", "WinGetState",
+    "WinGetText", "WinGetTitle", "WinGetPosX", "WinGetPosY", "WinGetPosWidth", "WinGetPosHeight", "WinKill",
+])
+# window members after which the handle no longer addresses a window
+CLOSING_MEMBERS = frozenset(["WinClose", "WinKill"])
+# titles that must be matched by AutoIt on every call
+_DYNAMIC_TITLES = ("", "[active]", "[last]")
+
+HandleCacheStats = namedtuple("HandleCacheStats", "size hits misses validations evictions")
+
+
+def handle_title(handle):
+    """Window title addressing a window by its handle.
+    :rtype: str
+    """
+    return "[HANDLE:%s]" % handle
+
+
+def is_cacheable(title):
+    """Whether a title names a window that can be resolved once, i.e. it is not empty, [ACTIVE], [LAST] or already a
+    handle.
+    :rtype: bool
+    """
+    if not isinstance(title, str):
+        return False
+    lowered = title.strip().lower()
+    return lowered not in _DYNAMIC_TITLES and not lowered.startswith("[handle:")
+
+
+class HandleCache(object):
+    """LRU cache of (title, text) -> window handle with time-based revalidation."""
+
+    def __init__(self, ttl=5.0, maxsize=256, clock=time.time):
+        """
+        :param ttl: seconds after which an entry is revalidated with WinExists before it is used.
+        :param maxsize: maximum number of cached windows, the least recently used entry is dropped first.
+        :param clock: time source, seconds as float.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._validations = self._evictions = 0
+
+    def resolve(self, call, title, text):
+        """Handle of the window matching title and text, resolved through call on a miss.
+
+        :param call: callable (member, *args) invoking an AutoItX member without handle rewriting.
+        :return: handle string, or None if no window matches
+        """
+        key = (title, text)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                if now - entry[1] < self.ttl:
+                    self._hits += 1
+                    return entry[0]
+                self._validations += 1
+        if entry is not None:
+            handle = entry[0]
+            if call("WinExists", handle_title(handle), ""):
+                with self._lock:
+                    self._entries[key] = (handle, now)
+                    self._hits += 1
+                return handle
+            self.evict(title, text)
+        with self._lock:
+            self._misses += 1
+        handle = call("WinGetHandle", title, text)
+        if not handle:
+            return None
+        with self._lock:
+            self._entries[key] = (handle, now)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return handle
+
+    def rewrite(self, call, args):
+        """Replaces the (title, text) leading args of a window member by the cached handle form.
+
+        :return: rewritten args, or args unchanged if the title cannot be cached or no window matches
+        :rtype: tuple
+        """
+        title, text = args[0], args[1]
+        if not is_cacheable(title):
+            return args
+        handle = self.resolve(call, title, text)
+        if handle is None:
+            return args
+        return (handle_title(handle), "") + tuple(args[2:])
+
+    def evict(self, title, text=None):
+        """Drops the entry of a title/text pair, or all entries of a title if text is None."""
+        with self._lock:
+            if text is not None:
+                keys = [(title, text)] if (title, text) in self._entries else []
+            else:
+                keys = [key for key in self._entries if key[0] == title]
+            for key in keys:
+                del self._entries[key]
+            self._evictions += len(keys)
+
+    def evict_handle(self, handle):
+        """Drops every entry resolved to a handle, e.g. after its window was closed."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[0] == handle]
+            for key in keys:
+                del self._entries[key]
+            self._evictions += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """:rtype: HandleCacheStats"""
+        with self._lock:
+            return HandleCacheStats(len(self._entries), self._hits, self._misses, self._validations,
+                                    self._evictions)
@@ -0,0 +1,209 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Sub-image search over a captured Frame.
+
+    screen = capture(0, 0, 1919, 1079)
+    icon = Frame.from_rows(rows)                # or a crop of an earlier capture
+    result = find_image(screen, icon, tolerance=8)
+    result.best                                 # Match(x, y, score) of the closest match, None if not found
+
+A template matches where every pixel is within tolerance of the screen on each colour channel, like shadeVariation
+in pixel_search. Candidates are found with the template's rarest colour and then checked pixel by pixel, rarest
+colours first, dropping a candidate at its first mismatch. With step > 1 a sparse grid of template pixels (every
+step-th pixel of every step-th row) is checked before the rest, which rejects most false candidates early on noisy
+screens. The checks run vectorized over all candidates at once when NumPy is installed.
+"""
+import time
+from collections import Counter, namedtuple
+from . import capture
+from .capture import _SHADE_SET_LIMIT, Frame, match_mask, shade_colours
+
+# candidates left after which the NumPy search compares whole blocks instead of filtering pixel by pixel
+_BLOCK_CANDIDATES = 16
+
+Match = namedtuple("Match", "x y score")
+
+
+class MatchResult(namedtuple("MatchResult", "matches candidates elapsed")):
+    """Outcome of find_image: matches ordered top to bottom, left to right, the number of positions whose pivot pixel
+    matched, and the seconds taken."""
+    __slots__ = ()
+
+    @property
+    def best(self):
+        """Match with the lowest score, the topmost leftmost of equals; None if nothing matched.
+        :rtype: Match
+        """
+        return min(self.matches, key=lambda match: match.score) if self.matches else None
+
+    def __bool__(self):
+        return bool(self.matches)
+    __nonzero__ = __bool__
+
+
+def _as_frame(template):
+    return template if isinstance(template, Frame) else Frame.from_rows(template)
+
+
+def _channel_distance(a, b):
+    return max(abs(((a >> shift) & 0xFF) - ((b >> shift) & 0xFF)) for shift in (16, 8, 0))
+
+
+def check_order(template, step=1):
+    """(dy, dx, colour) of every template pixel in the order they are checked: the sparse step grid first if step > 1,
+    rarer colours before common ones within each group.
+    :rtype: list
+    """
+    counts = Counter(template.pixels)
+    width = template.width
+    pixels = [(dy, dx, template.pixels[dy * width + dx]) for dy in range(template.height) for dx in range(width)]
+
+    def key(pixel):
+        dy, dx, colour = pixel
+        on_grid = step > 1 and dy % step == 0 and dx % step == 0
+        return not on_grid, counts[colour]
+    return sorted(pixels, key=key)
+
+
+def find_image(frame, template, tolerance=0, find_all=False, step=1, region=None):
+    """Searches a frame for a template image.
+
+    :param frame: captured Frame to search.
+    :param template: Frame or list of rows of 0xRRGGBB values to find.
+    :param tolerance: allowed difference (0-255) of each colour channel of every pixel.
+    :param find_all: return every match; otherwise the search stops at the first exact match and returns all
+        matches only if tolerance allowed none to be exact.
+    :param step: edge of the sparse grid of template pixels checked first, 1 checks pixels in rarity order only.
+    :param region: optional (left, top, right, bottom) screen rectangle of the frame to search in.
+    :rtype: MatchResult
+    """
+    started = time.time()
+    template = _as_frame(template)
+    if region is not None:
+        frame = frame.crop(*region)
+    if template.width == 0 or template.height == 0:
+        raise ValueError("template is empty")
+    if template.width > frame.width or template.height > frame.height:
+        return MatchResult([], 0, time.time() - started)
+    order = check_order(template, step)
+    if capture.numpy is not None:
+        found, candidates = _search_numpy(frame, template, order, tolerance)
+    else:
+        grid = [pixel for pixel in order[1:] if step > 1 and pixel[0] % step == 0 and pixel[1] % step == 0]
+        found, candidates = _search_python(frame, template, order, grid, tolerance, find_all)
+    matches = []
+    for x, y, score in found:
+        matches.append(Match(frame.left + x, frame.top + y, score))
+        if score == 0 and not find_all:
+            matches = [matches[-1]]
+            break
+    return MatchResult(matches, candidates, time.time() - started)
+
+
+def _score(frame, template, x, y):
+    """Largest channel difference between the template and the frame at (x, y)."""
+    width, pixels, template_width = frame.width, frame.pixels, template.width
+    score = 0
+    for dy in range(template.height):
+        row = pixels[(y + dy) * width + x:(y + dy) * width + x + template_width]
+        expected = template.pixels[dy * template_width:(dy + 1) * template_width]
+        if row != expected:
+            score = max(score, max(_channel_distance(a, b) for a, b in zip(row, expected)))
+    return score
+
+
+def _search_python(frame, template, order, grid, tolerance, find_all):
+    width, pixels = frame.width, frame.pixels
+    span_x = frame.width - template.width + 1
+    span_y = frame.height - template.height + 1
+    pivot_dy, pivot_dx, pivot = order[0]
+    accepted = None
+    if tolerance and (2 * tolerance + 1) ** 3 <= _SHADE_SET_LIMIT:
+        accepted = shade_colours(pivot, tolerance)
+    candidates = 0
+    found = []
+    for y in range(span_y):
+        start = (y + pivot_dy) * width + pivot_dx
+        row = pixels[start:start + span_x]
+        if not tolerance:
+            xs = _indexes(row, pivot)
+        elif accepted is not None:
+            xs = [x for x, value in enumerate(row) if value in accepted]
+        else:
+            xs = [x for x, value in enumerate(row) if _channel_distance(value, pivot) <= tolerance]
+        for x in xs:
+            candidates += 1
+            if _verify(pixels, width, template, order, grid, tolerance, x, y):
+                score = _score(frame, template, x, y) if tolerance else 0
+                found.append((x, y, score))
+                if score == 0 and not find_all:
+                    return found, candidates
+    return found, candidates
+
+
+def _indexes(row, value):
+    row = row.tolist()
+    found = []
+    index = -1
+    try:
+        while True:
+            index = row.index(value, index + 1)
+            found.append(index)
+    except ValueError:
+        return found
+
+
+def _verify(pixels, width, template, order, grid, tolerance, x, y):
+    if not tolerance:
+        for dy, dx, colour in grid:
+            if pixels[(y + dy) * width + x + dx] != colour:
+                return False
+        # the remaining pixels are compared a whole row at a time, which runs in C
+        template_width = template.width
+        for dy in range(template.height):
+            start = (y + dy) * width + x
+            if pixels[start:start + template_width] != template.pixels[dy * template_width:(dy + 1) * template_width]:
+                return False
+        return True
+    for dy, dx, colour in order[1:]:
+        if _channel_distance(pixels[(y + dy) * width + x + dx], colour) > tolerance:
+            return False
+    return True
+
+
+def _search_numpy(frame, template, order, tolerance):
+    numpy = capture.numpy
+    screen = frame.as_array()
+    span_x = frame.width - template.width + 1
+    span_y = frame.height - template.height + 1
+    pivot_dy, pivot_dx, pivot = order[0]
+    ys, xs = numpy.nonzero(match_mask(screen[pivot_dy:pivot_dy + span_y, pivot_dx:pivot_dx + span_x],
+                                      pivot, tolerance))
+    candidates = len(ys)
+    for dy, dx, colour in order[1:]:
+        # a few candidates are cheaper to compare block by block than pixel by pixel
+        if len(ys) <= _BLOCK_CANDIDATES:
+            break
+        keep = match_mask(screen[ys + dy, xs + dx], colour, tolerance)
+        ys, xs = ys[keep], xs[keep]
+    expected = template.as_array()
+    found = []
+    # nonzero returns row-major order, i.e. top to bottom, left to right
+    for y, x in zip(ys.tolist(), xs.tolist()):
+        score = _block_score(numpy, screen[y:y + template.height, x:x + template.width], expected)
+        if score <= tolerance:
+            found.append((x, y, score))
+    return found, candidates
+
+
+def _block_score(numpy, block, expected):
+    """Largest channel difference between two uint32 arrays."""
+    if numpy.array_equal(block, expected):
+        return 0
+    score = 0
+    for shift in (16, 8, 0):
+        a = ((block >> shift) & 0xFF).astype(numpy.int16)
+        b = ((expected >> shift) & 0xFF).astype(numpy.int16)
+        score = max(score, int(numpy.abs(a - b).max()))
+    return score
@@ -0,0 +1,276 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Cached INI file access with the semantics of IniRead, IniWrite and IniDelete.
+
+AutoItX re-opens and re-parses the file on every call. An IniFile parses it once and serves reads from memory until
+the file's modification time or size changes:
+
+    ini = IniFile("C:\\App\\app.ini")
+    ini.read("Server", "Port", "8080")      # default when the file, section or key does not exist
+    ini.read_section("Server")              # [(key, value), ...]
+    with ini:                               # writes are buffered and flushed on exit
+        ini.write("Server", "Port", 9090)
+        ini.delete("Obsolete")              # whole section
+
+Flushing writes the file once, to a temporary file that then atomically replaces the original. If the file was
+changed by someone else meanwhile, it is re-read and the buffered writes are applied on top of it. Comments, blank
+lines and untouched entries are kept as they were.
+
+Like GetPrivateProfileString, section and key names match case-insensitively, the first occurrence wins, values are
+stripped of surrounding whitespace and of one pair of enclosing quotes, and lines starting with ";" are comments.
+"""
+import codecs
+import io
+import os
+import tempfile
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def _blank(entry):
+    return entry[0] is None and not entry[3].strip()
+
+
+class _Section(object):
+    __slots__ = ("name", "header", "entries")
+
+    def __init__(self, name, header=None):
+        self.name = name
+        self.header = header
+        # [lower-case key or None for other lines, key, value, original line or None if changed]
+        self.entries = []
+
+    def find(self, key):
+        lowered = key.lower()
+        for entry in self.entries:
+            if entry[0] == lowered:
+                return entry
+        return None
+
+
+class IniFile(object):
+    """One INI file, parsed once and re-parsed when it changes on disk."""
+
+    def __init__(self, path, encoding="utf-8"):
+        """
+        :param path: file path; it is created by the first flush with pending writes if it does not exist.
+        :param encoding: encoding of files without a byte order mark; UTF-8 and UTF-16 files are recognized by it.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.parses = 0
+        self._signature = None
+        self._sections = None
+        self._pending = []
+        self._newline = "\r\n"
+        self._file_encoding = encoding
+
+    def __repr__(self):
+        return "IniFile(%r)" % self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size
+
+    def _load(self):
+        """Current sections, re-parsed (with the pending writes re-applied) if the file changed."""
+        signature = self._stat()
+        if self._sections is None or signature != self._signature:
+            self._parse(signature)
+            for operation in self._pending:
+                operation[0](*operation[1:])
+        return self._sections
+
+    def _parse(self, signature):
+        data = b""
+        if signature is not None:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        if data.startswith(codecs.BOM_UTF16_LE) or data.startswith(codecs.BOM_UTF16_BE):
+            self._file_encoding = "utf-16"
+        elif data.startswith(codecs.BOM_UTF8):
+            self._file_encoding = "utf-8-sig"
+        else:
+            self._file_encoding = self.encoding
+        text = data.decode(self._file_encoding, "surrogateescape" if "16" not in self._file_encoding else "strict")
+        if "\r\n" in text or not text:
+            self._newline = "\r\n"
+        else:
+            self._newline = "\n"
+        section = _Section(None)
+        sections = [section]
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("[") and "]" in stripped:
+                section = _Section(stripped[1:stripped.index("]")].strip(), line)
+                sections.append(section)
+            elif "=" in stripped and not stripped.startswith(";"):
+                key, _, value = stripped.partition("=")
+                key = key.strip()
+                section.entries.append([key.lower(), key, value.strip(), line])
+            else:
+                section.entries.append([None, None, None, line])
+        self._sections = sections
+        self._signature = signature
+        self.parses += 1
+
+    def _section(self, name):
+        lowered = name.lower()
+        for section in self._sections[1:]:
+            if section.name.lower() == lowered:
+                return section
+        return None
+
+    def _section_of(self, name):
+        self._load()
+        return self._section(name)
+
+    def read(self, section, key, default):
+        """Value of a key like IniRead.
+
+        :return: the value, default if the file, section or key does not exist
+        :rtype: str
+        """
+        found = self._section_of(section)
+        entry = found.find(key) if found is not None else None
+        return default if entry is None else _unquote(entry[2])
+
+    def read_section(self, section):
+        """Keys and values of a section in file order, the first occurrence of duplicate keys only.
+
+        :return: list of (key, value), empty if the section does not exist
+        :rtype: list
+        """
+        found = self._section_of(section)
+        if found is None:
+            return []
+        seen = set()
+        pairs = []
+        for lowered, key, value, line in found.entries:
+            if lowered is not None and lowered not in seen:
+                seen.add(lowered)
+                pairs.append((key, _unquote(value)))
+        return pairs
+
+    def section_names(self):
+        """:rtype: list"""
+        return [section.name for section in self._load()[1:]]
+
+    def write(self, section, key, value):
+        """Sets a key like IniWrite, creating the section and key if needed. Buffered until flush().
+
+        :return: 1
+        :rtype: int
+        :raises ValueError: if the section, key or value contains a line break, which would add lines to the file
+        """
+        value = "%s" % (value,)
+        for name, text in (("section", section), ("key", key), ("value", value)):
+            if "\r" in text or "\n" in text:
+                raise ValueError("INI %s %r contains a line break" % (name, text))
+        self._apply(self._write, section, key, value)
+        return 1
+
+    def delete(self, section, key=""):
+        """Deletes a key, or the whole section if key is "", like IniDelete. Buffered until flush().
+
+        :return: 1, 0 if the file does not exist and has no pending writes
+        :rtype: int
+        """
+        self._load()
+        if self._signature is None and not self._pending:
+            return 0
+        self._apply(self._delete, section, key)
+        return 1
+
+    def _apply(self, operation, *args):
+        self._load()
+        operation(*args)
+        self._pending.append((operation,) + args)
+
+    def _write(self, section, key, value):
+        found = self._section(section)
+        if found is None:
+            last = self._sections[-1]
+            if (last.name is not None or last.entries) and not (last.entries and _blank(last.entries[-1])):
+                # separated from the section before it by a blank line
+                last.entries.append([None, None, None, ""])
+            found = _Section(section)
+            self._sections.append(found)
+        entry = found.find(key)
+        if entry is not None:
+            entry[2], entry[3] = value, None
+            return
+        # after the last key, so blank lines separating the next section stay at the end
+        position = len(found.entries)
+        while position and _blank(found.entries[position - 1]):
+            position -= 1
+        found.entries.insert(position, [key.lower(), key, value, None])
+
+    def _delete(self, section, key):
+        found = self._section(section)
+        if found is None:
+            return
+        if not key:
+            self._sections.remove(found)
+            return
+        entry = found.find(key)
+        if entry is not None:
+            found.entries.remove(entry)
+
+    @property
+    def dirty(self):
+        """Whether there are writes not flushed yet."""
+        return bool(self._pending)
+
+    def flush(self):
+        """Writes the buffered changes with one atomic replace of the file.
+
+        :return: whether the file was written
+        :rtype: bool
+        """
+        if not self._pending:
+            return False
+        sections = self._load()
+        lines = []
+        for section in sections:
+            if section.name is not None:
+                lines.append(section.header if section.header is not None else "[%s]" % section.name)
+            for lowered, key, value, line in section.entries:
+                lines.append(line if line is not None else "%s=%s" % (key, value))
+        text = self._newline.join(lines) + self._newline if lines else ""
+        errors = "surrogateescape" if "16" not in self._file_encoding else "strict"
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(prefix=".%s." % os.path.basename(self.path), suffix=".tmp",
+                                                 dir=directory)
+        try:
+            with io.open(descriptor, "wb") as f:
+                f.write(text.encode(self._file_encoding, errors))
+            if self._signature is not None:
+                os.chmod(temporary, os.stat(self.path).st_mode & 0o7777)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self._pending = []
+        self._signature = self._stat()
+        return True
+
+    def invalidate(self):
+        """Drops the parsed contents, the next access re-reads the file. Pending writes are kept."""
+        self._sections = None
@@ -0,0 +1,211 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Compiler for the key syntax of Send and ControlSend.
+
+    sequence = compile_keys("^a{DEL}Hello{TAB 3}{ENTER}")
+    sequence.tokens         # KeyToken per key, with its modifiers and repeat count
+    sequence.keystrokes     # 11
+    sequence.chunks(5)      # ['^a{DEL}Hel', 'lo{TAB 3}', '{ENTER}'], each at most 5 keystrokes
+    sequence.estimate(5, 5) # seconds Send needs with SendKeyDelay and SendKeyDownDelay of 5 ms
+
+Sequences are validated when compiled, so a malformed string raises KeySyntaxError before anything is sent, and
+compiled sequences are cached. With flag=1 (raw) every character is a key of its own, as in Send. escape_keys turns
+arbitrary text into a sequence sending exactly that text.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+MODIFIERS = {"+": "SHIFT", "^": "CTRL", "!": "ALT", "#": "WIN"}
+ACTIONS = ("down", "up", "on", "off", "toggle")
+# characters that must be written in braces to be sent literally
+SPECIAL_CHARACTERS = "+^!#{}"
+KEY_NAMES = frozenset([
+    "SPACE", "ENTER", "ALT", "BACKSPACE", "BS", "DELETE", "DEL", "UP", "DOWN", "LEFT", "RIGHT", "HOME", "END",
+    "ESCAPE", "ESC", "INSERT", "INS", "PGUP", "PGDN", "TAB", "PRINTSCREEN", "LWIN", "RWIN", "NUMLOCK", "CAPSLOCK",
+    "SCROLLLOCK", "BREAK", "PAUSE", "NUMPADMULT", "NUMPADADD", "NUMPADSUB", "NUMPADDIV", "NUMPADDOT", "NUMPADENTER",
+    "APPSKEY", "LALT", "RALT", "LCTRL", "RCTRL", "LSHIFT", "RSHIFT", "SLEEP", "ALTDOWN", "ALTUP", "SHIFTDOWN",
+    "SHIFTUP", "CTRLDOWN", "CTRLUP", "LWINDOWN", "LWINUP", "RWINDOWN", "RWINUP", "ASC", "BROWSER_BACK",
+    "BROWSER_FORWARD", "BROWSER_REFRESH", "BROWSER_STOP", "BROWSER_SEARCH", "BROWSER_FAVORITES", "BROWSER_HOME",
+    "VOLUME_MUTE", "VOLUME_DOWN", "VOLUME_UP", "MEDIA_NEXT", "MEDIA_PREV", "MEDIA_STOP", "MEDIA_PLAY_PAUSE",
+    "LAUNCH_MAIL", "LAUNCH_MEDIA", "LAUNCH_APP1", "LAUNCH_APP2", "OEM_102",
+] + ["F%d" % number for number in range(1, 13)] + ["NUMPAD%d" % number for number in range(10)])
+# AutoIt's defaults of the SendKeyDelay and SendKeyDownDelay options, in milliseconds
+DEFAULT_KEY_DELAY = 5
+DEFAULT_KEY_DOWN_DELAY = 5
+
+#: key is a single character or a KEY_NAMES entry, modifiers a string of MODIFIERS characters, action one of ACTIONS
+#: or, for ASC, the character code
+KeyToken = namedtuple("KeyToken", "key modifiers count action")
+
+
+class KeySyntaxError(ValueError):
+    """A key sequence is malformed."""
+
+    def __init__(self, message, keys, position):
+        ValueError.__init__(self, "%s at position %d of %r" % (message, position, keys))
+        self.keys = keys
+        self.position = position
+
+
+def escape_keys(text):
+    """Key sequence sending text literally with flag=0, i.e. with +, ^, !, #, { and } in braces.
+    :rtype: str
+    """
+    return "".join("{%s}" % character if character in SPECIAL_CHARACTERS else character for character in text)
+
+
+def _braced(body, modifiers, keys, position):
+    if len(body) == 1:
+        return KeyToken(body, modifiers, 1, None)
+    name, _, argument = body.rpartition(" ") if " " in body[1:] else (body, "", "")
+    key = name if len(name) == 1 else name.upper()
+    if len(key) != 1 and key not in KEY_NAMES:
+        raise KeySyntaxError("unknown key {%s}" % name, keys, position)
+    if key == "ASC":
+        if not argument.isdigit():
+            raise KeySyntaxError("{ASC} needs a character code", keys, position)
+        return KeyToken(key, modifiers, 1, argument)
+    if not argument:
+        return KeyToken(key, modifiers, 1, None)
+    if argument.isdigit():
+        return KeyToken(key, modifiers, int(argument), None)
+    if argument.lower() in ACTIONS:
+        return KeyToken(key, modifiers, 1, argument.lower())
+    raise KeySyntaxError("invalid count or action %r" % argument, keys, position)
+
+
+def parse_keys(keys, flag=0):
+    """Tokens of a key sequence.
+
+    :param flag: 0 parses the special characters, 1 sends every character raw.
+    :rtype: tuple
+    :raises KeySyntaxError: if the sequence is malformed
+    """
+    if flag not in (0, 1):
+        raise ValueError("flag must be 0 or 1, not %r" % (flag,))
+    if flag:
+        return tuple(KeyToken(character, "", 1, None) for character in keys)
+    tokens = []
+    modifiers = ""
+    index = 0
+    while index < len(keys):
+        character = keys[index]
+        if character in MODIFIERS:
+            if character in modifiers:
+                raise KeySyntaxError("repeated modifier %r" % character, keys, index)
+            modifiers += character
+            index += 1
+            continue
+        if character == "{":
+            # "{}}" is the only sequence whose body contains the closing brace
+            end = index + 2 if keys.startswith("{}}", index) else keys.find("}", index + 1)
+            if end < 0:
+                raise KeySyntaxError("unterminated {", keys, index)
+            if end == index + 1:
+                raise KeySyntaxError("empty {}", keys, index)
+            tokens.append(_braced(keys[index + 1:end], modifiers, keys, index))
+            index = end + 1
+        else:
+            tokens.append(KeyToken(character, modifiers, 1, None))
+            index += 1
+        modifiers = ""
+    if modifiers:
+        raise KeySyntaxError("modifier %r is not followed by a key" % modifiers, keys, len(keys))
+    return tuple(tokens)
+
+
+def render_token(token, flag=0, count=None):
+    """Send syntax of a token, with count overriding its repeat count.
+    :rtype: str
+    """
+    count = token.count if count is None else count
+    if flag:
+        return token.key * count
+    if token.action is not None:
+        return "%s{%s %s}" % (token.modifiers, token.key, token.action)
+    if len(token.key) == 1 and token.key not in SPECIAL_CHARACTERS and count == 1:
+        return token.modifiers + token.key
+    if count == 1:
+        return "%s{%s}" % (token.modifiers, token.key)
+    return "%s{%s %d}" % (token.modifiers, token.key, count)
+
+
+def _presses(token):
+    return 1 if token.action is not None else token.count
+
+
+class KeySequence(object):
+    """A validated key sequence."""
+    __slots__ = ("keys", "flag", "tokens")
+
+    def __init__(self, keys, flag=0):
+        self.keys = keys
+        self.flag = flag
+        self.tokens = parse_keys(keys, flag)
+
+    def __repr__(self):
+        return "KeySequence(%r, %d)" % (self.keys, self.flag)
+
+    def __str__(self):
+        return self.keys
+
+    @property
+    def keystrokes(self):
+        """Number of keys pressed, not counting modifiers.
+        :rtype: int
+        """
+        return sum(_presses(token) for token in self.tokens)
+
+    def estimate(self, key_delay=DEFAULT_KEY_DELAY, key_down_delay=DEFAULT_KEY_DOWN_DELAY):
+        """Seconds Send takes for the sequence: every key and modifier press waits key_down_delay before its release
+        and key_delay after it.
+
+        :param key_delay: SendKeyDelay in milliseconds.
+        :param key_down_delay: SendKeyDownDelay in milliseconds.
+        :rtype: float
+        """
+        presses = sum(_presses(token) * (1 + len(token.modifiers)) for token in self.tokens)
+        return presses * (max(key_delay, 0) + max(key_down_delay, 0)) / 1000.0
+
+    def chunks(self, size):
+        """Splits the sequence into strings of at most size keystrokes, to be sent one after the other with the same
+        flag. Modifiers stay with their key; repeated keys are split into smaller counts.
+        :rtype: list
+        """
+        if size < 1:
+            raise ValueError("chunk size must be at least 1")
+        chunks = []
+        parts = []
+        room = size
+        for token in self.tokens:
+            remaining = _presses(token)
+            while remaining:
+                if not room:
+                    chunks.append("".join(parts))
+                    parts, room = [], size
+                if token.action is not None:
+                    parts.append(render_token(token, self.flag))
+                    taken = 1
+                else:
+                    taken = min(remaining, room)
+                    parts.append(render_token(token, self.flag, taken))
+                remaining -= taken
+                room -= taken
+        if parts:
+            chunks.append("".join(parts))
+        return chunks
+
+
+@lru_cache(maxsize=1024)
+def _compile(keys, flag=0):
+    return KeySequence(keys, flag)
+
+
+def compile_keys(keys, flag=0):
+    """Validated KeySequence of a Send string, cached per (keys, flag).
+
+    :raises KeySyntaxError: if the sequence is malformed
+    :rtype: KeySequence
+    """
+    return _compile(keys, flag)
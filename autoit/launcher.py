@@ -0,0 +1,319 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Concurrent program launcher with a concurrency limit.
+
+    launcher = Launcher(AutoItBackend(autoit), max_concurrency=6)
+    for installer in installers:
+        launcher.add(installer + " /quiet", timeout=600)
+    for result in launcher.run():
+        print(result.command, result.status, result.exit_code, result.elapsed)
+
+Programs are started with Run as slots free up, and all running programs are waited on together: AutoItBackend
+waits on their process handles with one WaitForMultipleObjects call where it runs next to AutoItX, and polls
+ProcessExists for all of them in one batch otherwise (e.g. through an AutoItClient), where exit codes are not known.
+SubprocessBackend starts local processes with subprocess, for tests and non-Windows hosts. autoit.aio.launch_async
+runs a launcher without blocking the event loop.
+"""
+import os
+import shlex
+import subprocess
+import time
+from collections import deque, namedtuple
+from .batch import call_reader
+from .errors import AutoItXError
+
+EXITED = "exited"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+CANCELLED = "cancelled"
+
+#: status is EXITED, FAILED (could not be started), TIMED_OUT (terminated after the job's timeout) or CANCELLED
+#: (not started before the run's timeout); exit_code is None where it is not known
+JobResult = namedtuple("JobResult", "name command pid status exit_code started elapsed")
+
+
+class _Job(object):
+    __slots__ = ("index", "name", "command", "workingDir", "flag", "timeout", "token", "pid", "started")
+
+    def __init__(self, index, name, command, workingDir, flag, timeout):
+        self.index = index
+        self.name = name
+        self.command = command
+        self.workingDir = workingDir
+        self.flag = flag
+        self.timeout = timeout
+        self.token = None
+        self.pid = 0
+        self.started = None
+
+
+class SubprocessBackend(object):
+    """Starts programs with subprocess.Popen."""
+
+    def __init__(self, interval=0.01, max_interval=0.1, sleep=time.sleep):
+        """
+        :param interval: first polling interval in seconds while waiting, doubled up to max_interval.
+        """
+        self.interval = interval
+        self.max_interval = max_interval
+        self._sleep = sleep
+
+    def start(self, command, workingDir="", flag=1):
+        """Starts a command line; the show flag is ignored.
+        :return: (token, pid), token None if the program could not be started
+        """
+        arguments = command if os.name == "nt" else shlex.split(command)
+        try:
+            process = subprocess.Popen(arguments, cwd=workingDir or None)
+        except OSError:
+            return None, 0
+        return process, process.pid
+
+    def wait(self, tokens, timeout):
+        """Waits up to timeout seconds until any of the tokens' programs exited.
+
+        :return: {token: exit code or None} of the programs that exited
+        :rtype: dict
+        """
+        deadline = time.time() + timeout
+        interval = self.interval
+        while True:
+            exited = dict((process, process.poll()) for process in tokens if process.poll() is not None)
+            remaining = deadline - time.time()
+            if exited or remaining <= 0:
+                return exited
+            self._sleep(min(interval, remaining))
+            interval = min(interval * 2, self.max_interval)
+
+    def terminate(self, token):
+        try:
+            token.kill()
+            token.wait()
+        except OSError:
+            pass
+
+    def close(self, token):
+        pass
+
+
+class AutoItBackend(object):
+    """Starts programs with AutoItX3.run and waits on their process handles, or on ProcessExists."""
+    SYNCHRONIZE = 0x00100000
+    PROCESS_TERMINATE = 0x0001
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    WAIT_OBJECT_0 = 0
+    MAXIMUM_WAIT_OBJECTS = 64
+
+    def __init__(self, autoit, handles=None, interval=0.05, sleep=time.sleep):
+        """
+        :param autoit: AutoItX3 or a proxy with the same methods.
+        :param handles: wait on process handles; by default when running on Windows with a local AutoItX3.
+        :param interval: polling interval in seconds without handles.
+        """
+        if handles is None:
+            from .autoitx import AutoItX3
+            handles = os.name == "nt" and isinstance(autoit, AutoItX3)
+        self._autoit = autoit
+        self._read = call_reader(autoit)
+        self.handles = handles
+        self.interval = interval
+        self._sleep = sleep
+        self._kernel32 = None
+
+    def _api(self):
+        if self._kernel32 is None:
+            import ctypes
+            from ctypes import wintypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.OpenProcess.restype = wintypes.HANDLE
+            kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+            kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+            kernel32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL,
+                                                        wintypes.DWORD]
+            kernel32.WaitForSingleObject.restype = wintypes.DWORD
+            kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+            kernel32.GetExitCodeProcess.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
+            kernel32.TerminateProcess.argtypes = [wintypes.HANDLE, wintypes.UINT]
+            kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+            self._kernel32 = ctypes, wintypes, kernel32
+        return self._kernel32
+
+    def start(self, command, workingDir="", flag=1):
+        """:return: (token, pid), token None if Run failed"""
+        try:
+            pid = self._autoit.run(command, workingDir, flag)
+        except AutoItXError:
+            # Run of a checked AutoItX3 raises for a program that could not be started
+            return None, 0
+        if not pid:
+            return None, 0
+        if not self.handles:
+            return pid, pid
+        ctypes, wintypes, kernel32 = self._api()
+        access = self.SYNCHRONIZE | self.PROCESS_TERMINATE | self.PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(access, False, pid)
+        # a program that exited already cannot be opened any more
+        return (handle or ("exited", pid)), pid
+
+    def wait(self, tokens, timeout):
+        """Waits up to timeout seconds until any of the tokens' programs exited.
+
+        :return: {token: exit code or None} of the programs that exited
+        :rtype: dict
+        """
+        gone = dict((token, None) for token in tokens if isinstance(token, tuple))
+        if gone:
+            return gone
+        if self.handles:
+            return self._wait_handles(tokens, timeout)
+        deadline = time.time() + timeout
+        while True:
+            exists = self._read([("process_exists", (pid,)) for pid in tokens])
+            exited = dict((pid, None) for pid, found in zip(tokens, exists) if not found)
+            remaining = deadline - time.time()
+            if exited or remaining <= 0:
+                return exited
+            self._sleep(min(self.interval, remaining))
+
+    def _wait_handles(self, tokens, timeout):
+        ctypes, wintypes, kernel32 = self._api()
+        if len(tokens) <= self.MAXIMUM_WAIT_OBJECTS:
+            array = (wintypes.HANDLE * len(tokens))(*tokens)
+            kernel32.WaitForMultipleObjects(len(tokens), array, False, int(timeout * 1000))
+        else:
+            # more handles than one call can wait on: check them all, then sleep
+            self._sleep(min(self.interval, timeout))
+        exited = {}
+        for handle in tokens:
+            if kernel32.WaitForSingleObject(handle, 0) == self.WAIT_OBJECT_0:
+                code = wintypes.DWORD()
+                exited[handle] = code.value if kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) else None
+        return exited
+
+    def terminate(self, token):
+        if isinstance(token, tuple):
+            return
+        if self.handles:
+            ctypes, wintypes, kernel32 = self._api()
+            kernel32.TerminateProcess(token, 1)
+        else:
+            self._autoit.process_close(token)
+
+    def close(self, token):
+        if self.handles and not isinstance(token, tuple):
+            self._api()[2].CloseHandle(token)
+
+
+class Launcher(object):
+    """Runs jobs with at most max_concurrency of them at a time and collects a JobResult for each."""
+
+    def __init__(self, backend=None, max_concurrency=4, clock=time.time):
+        """
+        :param backend: AutoItBackend, SubprocessBackend or an object with the same methods; SubprocessBackend by
+            default.
+        :param max_concurrency: most jobs running at the same time.
+        :param clock: time source, seconds as float.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.backend = backend if backend is not None else SubprocessBackend()
+        self.max_concurrency = max_concurrency
+        self._clock = clock
+        self._jobs = []
+        self._pending = deque()
+        self._running = {}
+        self.results = []
+
+    def add(self, command, workingDir="", flag=1, name=None, timeout=None):
+        """Queues a program.
+
+        :param command: command line as taken by AutoItX3.run.
+        :param flag: show flag for AutoItX3.run.
+        :param name: name in the result, the command by default.
+        :param timeout: seconds after which the program is terminated; None lets it run.
+        :return: index of the job's result in results
+        :rtype: int
+        """
+        job = _Job(len(self._jobs), name or command, command, workingDir, flag, timeout)
+        self._jobs.append(job)
+        self._pending.append(job)
+        self.results.append(None)
+        return job.index
+
+    @property
+    def done(self):
+        return not self._pending and not self._running
+
+    def _finish(self, job, status, exit_code, now):
+        elapsed = now - job.started if job.started is not None else 0.0
+        result = JobResult(job.name, job.command, job.pid, status, exit_code, job.started, elapsed)
+        self.results[job.index] = result
+        return result
+
+    def step(self, wait=0):
+        """Starts queued jobs while slots are free, then waits up to wait seconds for running jobs to exit.
+
+        :return: results of the jobs finished in this step
+        :rtype: list
+        """
+        finished = []
+        while self._pending and len(self._running) < self.max_concurrency:
+            job = self._pending.popleft()
+            job.started = self._clock()
+            job.token, job.pid = self.backend.start(job.command, job.workingDir, job.flag)
+            if job.token is None:
+                finished.append(self._finish(job, FAILED, None, self._clock()))
+            else:
+                self._running[job.token] = job
+        if not self._running:
+            return finished
+        if finished:
+            wait = 0
+        now = self._clock()
+        deadlines = [job.started + job.timeout for job in self._running.values() if job.timeout is not None]
+        if deadlines:
+            wait = max(min(wait, min(deadlines) - now), 0)
+        for token, exit_code in self.backend.wait(list(self._running), wait).items():
+            finished.append(self._finish(self._running.pop(token), EXITED, exit_code, self._clock()))
+            self.backend.close(token)
+        now = self._clock()
+        for token, job in list(self._running.items()):
+            if job.timeout is not None and now - job.started >= job.timeout:
+                self.backend.terminate(token)
+                self.backend.close(token)
+                finished.append(self._finish(self._running.pop(token), TIMED_OUT, None, now))
+        return finished
+
+    def cancel(self):
+        """Drops the jobs not started yet, recording them as CANCELLED.
+        :rtype: list
+        """
+        now = self._clock()
+        cancelled = [self._finish(job, CANCELLED, None, now) for job in self._pending]
+        self._pending.clear()
+        return cancelled
+
+    def as_completed(self, timeout=None, wait=1.0):
+        """Yields each job's result when it finishes; jobs not started within timeout seconds are cancelled and
+        running ones are left running.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while not self.done:
+            remaining = wait if deadline is None else min(wait, deadline - self._clock())
+            if remaining <= 0:
+                for result in self.cancel():
+                    yield result
+                return
+            for result in self.step(remaining):
+                yield result
+
+    def run(self, timeout=None):
+        """Runs all queued jobs, see as_completed.
+
+        :return: results in the order the jobs were added, None for jobs still running at the timeout
+        :rtype: list
+        """
+        for _ in self.as_completed(timeout):
+            pass
+        return list(self.results)
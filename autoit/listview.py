@@ -0,0 +1,102 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Streaming reader for ListView (SysListView32) controls.
+
+ControlListView only returns one cell per GetText call. iter_list_view_rows reads a page of rows at a time and
+yields them as tuples, so an export can be written out while the rest of the grid is still being read:
+
+    for row in iter_list_view_rows(autoit, "Results", "", "SysListView321", columns=(0, 3), start=100):
+        writer.writerow(row)
+
+Only the projected columns are read. The window is addressed by handle after it is resolved once. Through an
+AutoItClient each page is one batch request instead of one round trip per cell.
+
+With a ListViewCache a page first reads only the signature column of each row. A row whose signature did not change
+since the cached read is served from the cache, and only the other rows are read in full. Pick a signature column
+that changes whenever the row does, e.g. an id combined with a modification time.
+"""
+from .batch import call_reader
+from .handles import handle_title
+
+
+class ListViewCache(object):
+    """Rows of ListViews by window handle, control, projected columns, signature column and row index, each stored
+    with the signature it had when it was read."""
+
+    def __init__(self):
+        self._rows = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, index, signature):
+        """Cached row, None if it is missing or its signature changed."""
+        entry = self._rows.get((key, index))
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key, index, signature, row):
+        self._rows[(key, index)] = (signature, row)
+
+    def clear(self):
+        self._rows.clear()
+
+    def __len__(self):
+        return len(self._rows)
+
+
+def _count(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def iter_list_view_rows(autoit, title, text, controlId, columns=None, start=0, stop=None, page_size=100, cache=None,
+                        signature_column=0):
+    """Yields the rows of a ListView as tuples of cell texts, reading page_size rows at a time.
+
+    :param autoit: AutoItX3 or a proxy with the same methods, e.g. AutoItClient.
+    :param columns: indexes of the columns to read, in the order they appear in the tuples; all columns by default.
+    :param start: index of the first row.
+    :param stop: index after the last row, the end of the list by default.
+    :param page_size: rows read per page.
+    :param cache: optional ListViewCache; rows whose signature column is unchanged are served from it.
+    :param signature_column: column compared against the cache.
+    """
+    handle = autoit.win_get_handle(title, text)
+    if not handle:
+        return
+    title, text = handle_title(handle), ""
+    read = call_reader(autoit)
+    count = _count(autoit.control_list_view(title, text, controlId, "GetItemCount"))
+    if columns is None:
+        columns = range(_count(autoit.control_list_view(title, text, controlId, "GetSubItemCount")) or 1)
+    columns = tuple(columns)
+    stop = count if stop is None else min(stop, count)
+    key = (handle, controlId, columns, signature_column)
+
+    def cells(rows, columns):
+        return [("control_list_view", (title, text, controlId, "GetText", row, column))
+                for row in rows for column in columns]
+
+    for first in range(max(start, 0), stop, page_size):
+        rows = range(first, min(first + page_size, stop))
+        if cache is None:
+            values = read(cells(rows, columns))
+            for offset in range(0, len(values), len(columns)):
+                yield tuple(values[offset:offset + len(columns)])
+            continue
+        signatures = read(cells(rows, (signature_column,)))
+        page = [cache.get(key, row, signature) for row, signature in zip(rows, signatures)]
+        missing = [row for row, cached in zip(rows, page) if cached is None]
+        # the signature column was just read, the misses only need the others
+        values = iter(read(cells(missing, [column for column in columns if column != signature_column])))
+        for row, signature, cached in zip(rows, signatures, page):
+            if cached is None:
+                cached = tuple(signature if column == signature_column else next(values) for column in columns)
+                cache.put(key, row, signature, cached)
+            yield cached
@@ -0,0 +1,280 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Thread-safe pool of AutoItX3 handles with health checks and automatic rebinding.
+
+Handles are either checked out for the duration of a with block:
+
+    pool = AutoItX3Pool(size=4)
+    with pool.connection() as autoit:
+        autoit.control_click("Calculator", "", 135)
+
+or owned by the calling thread (pool.local()). COM objects of the AutoItX3.Control server are apartment-threaded, so
+handles that move between threads need a free-threaded setup (sys.coinit_flags = 0 before pywin32 is imported), and
+checkout() does not enter an apartment for the calling thread; otherwise use pool.local(), which binds one handle
+per thread inside that thread's own apartment, and call pool.release_local() before such a thread ends:
+
+    autoit = pool.local()
+    try:
+        autoit.control_click("Calculator", "", 135)
+    finally:
+        pool.release_local()
+
+A handle is health-checked with a cheap version read when it has not been checked for check_interval seconds, and
+replaced by a freshly bound one when the check or a call fails because the COM server went away. Calls through
+pool.call() and pool.local() are then retried once on the new handle.
+"""
+import functools
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from .autoitx import AutoItX3, wrapper_methods
+from .dispatch import initialize_apartment, is_disconnected, uninitialize_apartment
+
+PoolStats = namedtuple("PoolStats", "size in_use idle threads peak_in_use checkouts rebinds failed_checks "
+                                    "wait_count wait_total wait_max utilisation")
+
+
+_WRAPPER_METHODS = frozenset(wrapper_methods())
+
+
+class PoolTimeout(Exception):
+    """No handle became available within the checkout timeout."""
+
+
+class _Slot(object):
+    __slots__ = ("autoit", "checked_at", "initialized")
+
+    def __init__(self, autoit, checked_at, initialized=False):
+        self.autoit = autoit
+        self.checked_at = checked_at
+        self.initialized = initialized
+
+
+def _release(autoit):
+    if isinstance(autoit, AutoItX3):
+        autoit._release()
+
+
+class LocalHandle(object):
+    """The AutoItX3 of one thread, see AutoItX3Pool.local. Wrapper methods are retried once on a freshly bound
+    handle when the COM server went away; other attributes are those of the current AutoItX3."""
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+
+    @property
+    def autoit(self):
+        """The AutoItX3 currently bound.
+        :rtype: AutoItX3
+        """
+        return self._slot.autoit
+
+    def call(self, method, *args, **kwargs):
+        """Calls an AutoItX3 method, rebinding and retrying once if the COM server went away."""
+        try:
+            return getattr(self._slot.autoit, method)(*args, **kwargs)
+        except Exception as e:
+            if not is_disconnected(e):
+                raise
+        self._pool._rebind(self._slot)
+        return getattr(self._slot.autoit, method)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in _WRAPPER_METHODS:
+            return functools.partial(self.call, name)
+        return getattr(self._slot.autoit, name)
+
+
+class AutoItX3Pool(object):
+    """Hands out AutoItX3 handles to threads and rebinds the ones whose COM server died."""
+
+    def __init__(self, factory=AutoItX3, size=4, check_interval=30.0, clock=time.time):
+        """
+        :param factory: callable returning a new AutoItX3, called again to rebind a dead handle.
+        :param size: maximum number of handles checked out at the same time.
+        :param check_interval: seconds after which a handle is health-checked before it is handed out again,
+                               0 checks on every checkout.
+        :param clock: time source, seconds as float.
+        """
+        self.factory = factory
+        self.size = size
+        self.check_interval = check_interval
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._idle = []
+        self._out = {}
+        self._created = 0
+        self._in_use = 0
+        self._local = threading.local()
+        self._threads = 0
+        self._peak = 0
+        self._checkouts = 0
+        self._rebinds = 0
+        self._failed_checks = 0
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._started = self._changed = clock()
+        self._in_use_seconds = 0.0
+
+    def _set_in_use(self, delta):
+        now = self._clock()
+        self._in_use_seconds += self._in_use * (now - self._changed)
+        self._changed = now
+        self._in_use += delta
+        self._peak = max(self._peak, self._in_use)
+
+    def _healthy(self, slot):
+        if self._clock() - slot.checked_at < self.check_interval:
+            return True
+        try:
+            slot.autoit.version
+        except Exception:
+            with self._condition:
+                self._failed_checks += 1
+            return False
+        slot.checked_at = self._clock()
+        return True
+
+    def _rebind(self, slot):
+        old, slot.autoit = slot.autoit, self.factory()
+        _release(old)
+        slot.checked_at = self._clock()
+        with self._condition:
+            self._rebinds += 1
+
+    def checkout(self, timeout=None):
+        """Takes a healthy handle out of the pool, binding a new one while fewer than size exist.
+        Handles move between the threads checking them out, see the module docstring; the calling thread must have
+        entered a COM apartment itself.
+
+        :param timeout: seconds to wait for a free handle, None waits indefinitely.
+        :return: AutoItX3 handle to be returned with checkin
+        :raises PoolTimeout: if no handle became free in time
+        """
+        with self._condition:
+            if not self._idle and self._created >= self.size:
+                start = self._clock()
+                deadline = None if timeout is None else start + timeout
+                while not self._idle and self._created >= self.size:
+                    remaining = None if deadline is None else deadline - self._clock()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout("no AutoItX3 handle available after %s seconds" % timeout)
+                    self._condition.wait(remaining)
+                waited = self._clock() - start
+                self._wait_count += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            if self._idle:
+                slot = self._idle.pop()
+            else:
+                slot = None
+                self._created += 1
+            self._checkouts += 1
+            self._set_in_use(1)
+        try:
+            if slot is None:
+                slot = _Slot(self.factory(), self._clock())
+            elif not self._healthy(slot):
+                self._rebind(slot)
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._set_in_use(-1)
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._out[id(slot.autoit)] = slot
+        return slot.autoit
+
+    def checkin(self, autoit, broken=False):
+        """Returns a handle to the pool.
+
+        :param autoit: handle obtained from checkout.
+        :param broken: the handle's COM server is gone, bind a new one before handing it out again.
+        """
+        with self._condition:
+            slot = self._out.pop(id(autoit))
+            if broken:
+                slot.checked_at = float("-inf")
+            self._idle.append(slot)
+            self._set_in_use(-1)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Checks a handle out for the duration of a with block.
+        Exceptions showing that the COM server went away mark the handle for rebinding.
+        """
+        autoit = self.checkout(timeout)
+        broken = False
+        try:
+            yield autoit
+        except Exception as e:
+            broken = is_disconnected(e)
+            raise
+        finally:
+            self.checkin(autoit, broken)
+
+    def call(self, method, *args, **kwargs):
+        """Calls an AutoItX3 method on a pooled handle, rebinding and retrying once if the COM server went away."""
+        try:
+            with self.connection() as autoit:
+                return getattr(autoit, method)(*args, **kwargs)
+        except Exception as e:
+            if not is_disconnected(e):
+                raise
+        with self.connection() as autoit:
+            return getattr(autoit, method)(*args, **kwargs)
+
+    def local(self):
+        """The calling thread's own handle, bound on first use inside a COM apartment entered for the thread and
+        rebound when its health check fails or a call finds the COM server gone.
+        :rtype: LocalHandle
+        """
+        handle = getattr(self._local, "handle", None)
+        if handle is None:
+            initialized = initialize_apartment()
+            try:
+                slot = _Slot(self.factory(), self._clock(), initialized)
+            except BaseException:
+                if initialized:
+                    uninitialize_apartment()
+                raise
+            handle = self._local.handle = LocalHandle(self, slot)
+            with self._condition:
+                self._threads += 1
+        elif not self._healthy(handle._slot):
+            self._rebind(handle._slot)
+        return handle
+
+    def release_local(self):
+        """Releases the calling thread's handle and leaves the COM apartment local() entered for it; the next
+        local() call in the thread binds a new one."""
+        handle = getattr(self._local, "handle", None)
+        if handle is None:
+            return
+        del self._local.handle
+        slot = handle._slot
+        _release(slot.autoit)
+        slot.autoit = None
+        with self._condition:
+            self._threads -= 1
+        if slot.initialized:
+            uninitialize_apartment()
+
+    def stats(self):
+        """Pool counters. utilisation is the average fraction of the pool's handles checked out since creation.
+        :rtype: PoolStats
+        """
+        with self._condition:
+            self._set_in_use(0)
+            lifetime = self._changed - self._started
+            return PoolStats(size=self.size, in_use=self._in_use, idle=len(self._idle), threads=self._threads,
+                             peak_in_use=self._peak, checkouts=self._checkouts, rebinds=self._rebinds,
+                             failed_checks=self._failed_checks, wait_count=self._wait_count,
+                             wait_total=self._wait_total, wait_max=self._wait_max,
+                             utilisation=self._in_use_seconds / (lifetime * self.size) if lifetime > 0 else 0.0)
@@ -0,0 +1,251 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Process table snapshots for checking and closing many processes at once.
+
+ProcessExists and ProcessClose scan the whole process table for every name. A ProcessIndex enumerates the processes
+once and answers any number of lookups from a name -> PIDs index until it is older than ttl seconds:
+
+    index = ProcessIndex(ttl=2.0)
+    index.exists_many(["spooler.exe", "kiosk.exe", 4711])     # [PID or 0, ...]
+    index.close_many(["crashreporter.exe"])                   # [closed PID or 0, ...]
+
+Lookups keep the AutoIt semantics: names are matched case-insensitively and stand for the process with the highest
+PID, and PIDs (ints) for themselves. The process table comes from a pluggable source with a processes() method
+returning (pid, name) pairs and a terminate(pid) method: ToolhelpSource on Windows, PsutilSource where psutil is
+installed, or StaticSource for tests.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from .errors import AutoItXError
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ProcessInfo = namedtuple("ProcessInfo", "pid name")
+
+
+class StaticSource(object):
+    """Process source serving a list of (pid, name) pairs built in Python, for tests."""
+
+    def __init__(self, processes):
+        """
+        :param processes: list of (pid, name), or a callable returning the current one.
+        """
+        self._processes = processes
+        self.snapshots = 0
+        self.terminated = []
+
+    def processes(self):
+        self.snapshots += 1
+        processes = self._processes() if callable(self._processes) else self._processes
+        return [ProcessInfo(pid, name) for pid, name in processes if pid not in self.terminated]
+
+    def terminate(self, pid):
+        self.terminated.append(pid)
+        return True
+
+
+class PsutilSource(object):
+    """Process source using psutil."""
+
+    def processes(self):
+        return [ProcessInfo(process.info["pid"], process.info["name"] or "")
+                for process in psutil.process_iter(["pid", "name"])]
+
+    def terminate(self, pid):
+        try:
+            psutil.Process(pid).kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        return True
+
+
+class ToolhelpSource(object):
+    """Process source using the Windows Toolhelp API (CreateToolhelp32Snapshot), as AutoIt does."""
+    TH32CS_SNAPPROCESS = 0x00000002
+    PROCESS_TERMINATE = 0x0001
+
+    def __init__(self):
+        self._api = None
+
+    def _load(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [("dwSize", wintypes.DWORD), ("cntUsage", wintypes.DWORD),
+                        ("th32ProcessID", wintypes.DWORD), ("th32DefaultHeapID", ctypes.c_size_t),
+                        ("th32ModuleID", wintypes.DWORD), ("cntThreads", wintypes.DWORD),
+                        ("th32ParentProcessID", wintypes.DWORD), ("pcPriClassBase", wintypes.LONG),
+                        ("dwFlags", wintypes.DWORD), ("szExeFile", wintypes.WCHAR * 260)]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        kernel32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        kernel32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.TerminateProcess.argtypes = [wintypes.HANDLE, wintypes.UINT]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._api = ctypes, kernel32, PROCESSENTRY32W
+        return self._api
+
+    def processes(self):
+        ctypes, kernel32, PROCESSENTRY32W = self._api or self._load()
+        snapshot = kernel32.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+        if snapshot in (None, ctypes.c_void_p(-1).value):
+            raise ctypes.WinError()
+        processes = []
+        try:
+            entry = PROCESSENTRY32W(dwSize=ctypes.sizeof(PROCESSENTRY32W))
+            more = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+            while more:
+                processes.append(ProcessInfo(entry.th32ProcessID, entry.szExeFile))
+                more = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        finally:
+            kernel32.CloseHandle(snapshot)
+        return processes
+
+    def terminate(self, pid):
+        ctypes, kernel32, PROCESSENTRY32W = self._api or self._load()
+        handle = kernel32.OpenProcess(self.PROCESS_TERMINATE, False, pid)
+        if not handle:
+            return False
+        try:
+            return bool(kernel32.TerminateProcess(handle, 1))
+        finally:
+            kernel32.CloseHandle(handle)
+
+
+def default_source():
+    """ToolhelpSource on Windows, otherwise PsutilSource.
+    :raises ImportError: if neither is available
+    """
+    if os.name == "nt":
+        return ToolhelpSource()
+    if psutil is None:
+        raise ImportError("process snapshots require Windows or psutil")
+    return PsutilSource()
+
+
+class ProcessIndex(object):
+    """Name -> PIDs index of a process table snapshot, refreshed when it is older than ttl seconds."""
+
+    def __init__(self, source=None, ttl=1.0, clock=time.time):
+        """
+        :param source: object with processes() and terminate(pid), default_source() by default.
+        :param ttl: seconds a snapshot is used for; None keeps it until refresh() is called.
+        :param clock: time source, seconds as float.
+        """
+        self.source = source if source is not None else default_source()
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._names = None
+        self._pids = None
+        self._taken = None
+        self.snapshots = 0
+
+    def refresh(self):
+        """Enumerates the processes now."""
+        names = {}
+        pids = set()
+        for pid, name in self.source.processes():
+            pids.add(pid)
+            names.setdefault(name.lower(), []).append(pid)
+        for found in names.values():
+            found.sort()
+        with self._lock:
+            self._names, self._pids, self._taken = names, pids, self._clock()
+            self.snapshots += 1
+
+    def _index(self):
+        with self._lock:
+            fresh = self._names is not None and (self.ttl is None or self._clock() - self._taken < self.ttl)
+            if fresh:
+                return self._names, self._pids
+        self.refresh()
+        return self._names, self._pids
+
+    def pids(self, name):
+        """PIDs of the processes with an executable name, in ascending order.
+        :rtype: list
+        """
+        return list(self._index()[0].get(name.lower(), ()))
+
+    def exists(self, process):
+        """PID of a process like ProcessExists: the highest PID of a name, or the PID itself if it exists.
+
+        :param process: executable name, e.g. "notepad.exe", or PID.
+        :return: PID, 0 if there is no such process
+        :rtype: int
+        """
+        return self.exists_many([process])[0]
+
+    def exists_many(self, processes):
+        """PIDs of many processes, see exists, from one snapshot.
+        :rtype: list
+        """
+        names, pids = self._index()
+        found = []
+        for process in processes:
+            if isinstance(process, str):
+                matches = names.get(process.lower())
+                found.append(matches[-1] if matches else 0)
+            else:
+                found.append(process if process in pids else 0)
+        return found
+
+    def close_many(self, processes, close=None):
+        """Terminates many processes like ProcessClose: for a name, only the process with the highest PID.
+        A name given twice closes its two highest PIDs.
+
+        :param close: optional callable(pid) terminating a process, the source's terminate by default. An
+            AutoItXError it raises counts as a failure for that PID.
+        :return: the PID closed for each process, 0 if it did not exist or could not be terminated
+        :rtype: list
+        """
+        close = close if close is not None else self.source.terminate
+        names, pids = self._index()
+        targets = []
+        with self._lock:
+            for process in processes:
+                if isinstance(process, str):
+                    matches = [pid for pid in names.get(process.lower(), ()) if pid not in targets]
+                    targets.append(matches[-1] if matches else 0)
+                else:
+                    targets.append(process if process in pids and process not in targets else 0)
+        # terminating can take a while, lookups on other threads go on meanwhile
+        closed = []
+        try:
+            for pid in targets:
+                try:
+                    closed.append(pid if pid and close(pid) else 0)
+                except AutoItXError:
+                    closed.append(0)
+        finally:
+            self._forget(names, pids, set(closed) - set([0]))
+        return closed
+
+    def _forget(self, names, pids, gone):
+        # forget closed processes, so the next lookup of a name finds the next highest PID; snapshots are replaced,
+        # not changed, as other threads may be reading them
+        if not gone:
+            return
+        with self._lock:
+            if self._names is names:
+                self._names = dict((name, [pid for pid in found if pid not in gone]) for name, found in names.items())
+                self._pids = pids - gone
+
+    def close(self, process, close=None):
+        """Terminates a process, see close_many.
+        :return: the PID closed, 0 if none was
+        :rtype: int
+        """
+        return self.close_many([process], close)[0]
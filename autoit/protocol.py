@@ -0,0 +1,243 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Binary framing used between autoit.server and its clients.
+
+Every frame is a 9 byte header followed by the payload:
+
+    uint32 payload length | uint32 request id | uint8 kind
+
+all big-endian. Requests and responses carry the same request id, so a client can pipeline many requests and match
+responses arriving in any order. Payloads are values in a small tagged encoding covering what AutoItX methods take
+and return: None, bool, int, float, str, bytes, list, tuple and dict. Named tuples defined in the autoit package,
+e.g. Rect or TextEntry, carry their type name and are rebuilt as the same type where the receiving side has loaded
+that module, and arrive as plain tuples otherwise; other named tuples are sent as plain tuples.
+
+A connection starts with a handshake: the server sends an AUTH frame holding a random challenge, the client answers
+with an AUTH frame holding the HMAC-SHA256 of the challenge keyed with the shared secret (see respond), and the
+server replies RESULT or ERROR and closes the connection if the answer is wrong. The secret itself is never sent.
+"""
+import hashlib
+import hmac
+import os
+import struct
+import sys
+
+CALL = 1
+GET = 2
+BATCH = 3
+AUTH = 4
+RESULT = 16
+ERROR = 17
+
+HEADER = struct.Struct("!IIB")
+MAX_PAYLOAD = 64 * 1024 * 1024
+#: largest handshake frame; challenges and answers are 32 bytes
+MAX_AUTH_PAYLOAD = 256
+#: deepest nesting of lists, tuples and dicts a payload may have
+MAX_DEPTH = 32
+
+_INT = struct.Struct("!q")
+_FLOAT = struct.Struct("!d")
+_LENGTH = struct.Struct("!I")
+
+
+class ProtocolError(Exception):
+    """A frame or payload could not be decoded."""
+
+
+def encode(value):
+    """Encodes a value into its tagged binary form.
+    :rtype: bytes
+    """
+    out = []
+    _encode(value, out.append)
+    return b"".join(out)
+
+
+def _encode(value, write):
+    if value is None:
+        write(b"N")
+    elif value is True:
+        write(b"T")
+    elif value is False:
+        write(b"F")
+    elif isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            write(b"i" + _INT.pack(value))
+        else:
+            digits = str(value).encode("ascii")
+            write(b"I" + _LENGTH.pack(len(digits)) + digits)
+    elif isinstance(value, float):
+        write(b"d" + _FLOAT.pack(value))
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        write(b"s" + _LENGTH.pack(len(data)) + data)
+    elif isinstance(value, (bytes, bytearray)):
+        write(b"b" + _LENGTH.pack(len(value)) + bytes(value))
+    elif isinstance(value, tuple) and hasattr(value, "_fields") and type(value).__module__.startswith("autoit."):
+        name = ("%s.%s" % (type(value).__module__, type(value).__name__)).encode("utf-8")
+        write(b"r" + _LENGTH.pack(len(name)) + name + _LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, write)
+    elif isinstance(value, tuple):
+        write(b"t" + _LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, write)
+    elif isinstance(value, list):
+        write(b"l" + _LENGTH.pack(len(value)))
+        for item in value:
+            _encode(item, write)
+    elif isinstance(value, dict):
+        write(b"m" + _LENGTH.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, write)
+            _encode(item, write)
+    else:
+        raise TypeError("cannot encode %s" % type(value).__name__)
+
+
+def decode(data):
+    """Decodes a value produced by encode.
+
+    :raises ProtocolError: if data is truncated, malformed or nested deeper than MAX_DEPTH
+    """
+    try:
+        value, offset = _decode(memoryview(data), 0, 0)
+    except (IndexError, struct.error, TypeError, ValueError, RecursionError) as e:
+        # UnicodeDecodeError is a ValueError; TypeError comes from unhashable dict keys
+        raise ProtocolError("malformed payload: %s" % e)
+    if offset != len(data):
+        raise ProtocolError("%d trailing bytes after payload" % (len(data) - offset))
+    return value
+
+
+def _length(data, offset):
+    (length,) = _LENGTH.unpack_from(data, offset)
+    end = offset + 4 + length
+    if end > len(data):
+        raise ProtocolError("truncated payload")
+    return offset + 4, end
+
+
+def _decode(data, offset, depth):
+    tag = data[offset:offset + 1].tobytes()
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T":
+        return True, offset
+    if tag == b"F":
+        return False, offset
+    if tag == b"i":
+        return _INT.unpack_from(data, offset)[0], offset + 8
+    if tag == b"d":
+        return _FLOAT.unpack_from(data, offset)[0], offset + 8
+    if tag in (b"s", b"b", b"I"):
+        start, end = _length(data, offset)
+        raw = data[start:end].tobytes()
+        if tag == b"s":
+            return raw.decode("utf-8"), end
+        if tag == b"I":
+            return int(raw.decode("ascii")), end
+        return raw, end
+    record = None
+    if tag == b"r":
+        start, offset = _length(data, offset)
+        record = _record_type(data[start:offset].tobytes().decode("utf-8"))
+    if tag in (b"l", b"t", b"m", b"r"):
+        if depth >= MAX_DEPTH:
+            raise ProtocolError("payload nested deeper than %d levels" % MAX_DEPTH)
+        (count,) = _LENGTH.unpack_from(data, offset)
+        offset += 4
+        if tag == b"m":
+            result = {}
+            for _ in range(count):
+                key, offset = _decode(data, offset, depth + 1)
+                result[key], offset = _decode(data, offset, depth + 1)
+            return result, offset
+        items = []
+        for _ in range(count):
+            item, offset = _decode(data, offset, depth + 1)
+            items.append(item)
+        if tag == b"l":
+            return items, offset
+        if record is not None and len(items) == len(record._fields):
+            return record(*items), offset
+        return tuple(items), offset
+    raise ProtocolError("unknown tag %r" % tag)
+
+
+def _record_type(name):
+    # only looks up modules loaded already, so a payload cannot make the receiver import anything
+    module, _, type_name = name.rpartition(".")
+    record = getattr(sys.modules.get(module), type_name, None) if module.startswith("autoit.") else None
+    if isinstance(record, type) and issubclass(record, tuple) and hasattr(record, "_fields"):
+        return record
+    return None
+
+
+def challenge():
+    """Random challenge for the handshake.
+    :rtype: bytes
+    """
+    return os.urandom(32)
+
+
+def respond(secret, challenge):
+    """Answer to a handshake challenge.
+
+    :param secret: shared secret as text or bytes; None for servers without a secret.
+    :rtype: bytes
+    """
+    if isinstance(secret, str):
+        secret = secret.encode("utf-8")
+    return hmac.new(secret or b"", challenge, hashlib.sha256).digest()
+
+
+def verify(secret, challenge, answer):
+    """Checks an answer to a challenge in constant time.
+    :rtype: bool
+    """
+    return isinstance(answer, bytes) and hmac.compare_digest(respond(secret, challenge), answer)
+
+
+def pack_frame(request_id, kind, value):
+    """Builds a complete frame for a value.
+    :rtype: bytes
+    """
+    payload = encode(value)
+    return HEADER.pack(len(payload), request_id, kind) + payload
+
+
+def read_frame(stream, limit=MAX_PAYLOAD):
+    """Reads one frame from a file-like object opened in binary mode.
+
+    :param limit: largest payload accepted, in bytes.
+    :return: (request id, kind, decoded value), or None at end of stream
+    :raises ProtocolError: on a truncated or oversized frame
+    """
+    header = _read_exactly(stream, HEADER.size)
+    if header is None:
+        return None
+    length, request_id, kind = HEADER.unpack(header)
+    if length > limit:
+        raise ProtocolError("frame of %d bytes exceeds the limit" % length)
+    payload = _read_exactly(stream, length) if length else b""
+    if payload is None:
+        raise ProtocolError("connection closed inside a frame")
+    return request_id, kind, decode(payload)
+
+
+def _read_exactly(stream, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ProtocolError("connection closed inside a frame")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
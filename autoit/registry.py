@@ -0,0 +1,122 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Registry subtree walking, snapshots and diffs on top of RegEnumKey, RegEnumVal and RegRead.
+
+    for entry in reg_walk(autoit, "HKLM\\SOFTWARE\\Vendor", depth=2):
+        ...                                     # RegKey and RegValue records, produced as the walk goes
+    before = reg_snapshot(autoit, "HKLM\\SOFTWARE\\Vendor")
+    ...                                         # install
+    reg_diff(before, reg_snapshot(autoit, "HKLM\\SOFTWARE\\Vendor"))
+
+The enumeration functions return "" both for the end of a key and for an empty name (the default value), and RegRead
+returns 1 both on failure and for a DWORD of 1. The error flag is only read for these ambiguous results, so walking
+costs one call per subkey, value name and value instead of two. Through a proxy such as AutoItClient each call
+and its error flag are read in one request, see autoit.batch.call_with_error.
+
+AutoItX does not report registry value types: values are int for REG_DWORD and str for the other types, REG_BINARY
+as hex digits and REG_MULTI_SZ joined by linefeeds.
+"""
+from collections import namedtuple
+from .batch import call_with_error
+from .errors import ErrorFlagSet
+
+RegKey = namedtuple("RegKey", "key depth")
+RegValue = namedtuple("RegValue", "key name value")
+RegDiff = namedtuple("RegDiff", "added_keys removed_keys added_values removed_values changed_values")
+
+# error flag of RegEnumKey and RegEnumVal past the last instance
+END_OF_KEY = -1
+
+
+def _enum(autoit, method, key):
+    """Names enumerated by reg_enum_key or reg_enum_val.
+    :raises ErrorFlagSet: if the key cannot be opened
+    """
+    instance = 1
+    while True:
+        try:
+            name, error = call_with_error(autoit, method, (key, instance), lambda name: name == "")
+        except ErrorFlagSet as e:
+            # raised instead of returned by checked instances
+            name, error = "", e.error
+        if error == END_OF_KEY:
+            return
+        if error:
+            raise ErrorFlagSet("%s cannot open %r, error flag is %s" % (method, key, error), method, name, error)
+        yield name
+        instance += 1
+
+
+def _read(autoit, key, name):
+    """Value of a registry value, None if it cannot be read."""
+    try:
+        value, error = call_with_error(autoit, "reg_read", (key, name), lambda value: value == 1)
+    except ErrorFlagSet:
+        return None
+    return None if error else value
+
+
+def reg_walk(autoit, key, depth=None, values=True):
+    """Yields RegKey(key, depth) for a key and its subkeys in pre-order, each followed by RegValue(key, name, value)
+    for its values.
+
+    :param autoit: AutoItX3 or a proxy with the same methods.
+    :param key: full name of the root key, e.g. "HKLM\\SOFTWARE\\Vendor".
+    :param depth: deepest subkey level visited, 0 being the root only; unlimited by default.
+    :param values: read the values; with False only the keys are yielded.
+    :raises ErrorFlagSet: if the root key cannot be opened; subkeys that cannot be opened are yielded without values
+        or subkeys
+    """
+    pending = [(key, 0)]
+    while pending:
+        current, level = pending.pop()
+        yield RegKey(current, level)
+        try:
+            if values:
+                for name in _enum(autoit, "reg_enum_val", current):
+                    value = _read(autoit, current, name)
+                    if value is not None:
+                        yield RegValue(current, name, value)
+            if depth is None or level < depth:
+                subkeys = list(_enum(autoit, "reg_enum_key", current))
+                pending.extend((current + "\\" + name, level + 1) for name in reversed(subkeys))
+        except ErrorFlagSet:
+            if not level:
+                raise
+
+
+def reg_snapshot(autoit, key, depth=None):
+    """Contents of a registry subtree as plain, JSON-serialisable data:
+    {"key": root key, "keys": {path relative to the root ("" for the root): {value name: value}}}.
+    :rtype: dict
+    """
+    prefix = len(key) + 1
+    keys = {}
+    for entry in reg_walk(autoit, key, depth):
+        if isinstance(entry, RegKey):
+            values = keys[entry.key[prefix:]] = {}
+        else:
+            values[entry.name] = entry.value
+    return {"key": key, "keys": keys}
+
+
+def reg_diff(before, after):
+    """Differences between two snapshots, with key paths relative to the snapshot roots.
+
+    :return: RegDiff of sorted lists: added and removed key paths, added and removed (key, name, value) and changed
+        (key, name, old value, new value)
+    :rtype: RegDiff
+    """
+    old, new = before["keys"], after["keys"]
+    added_values, removed_values, changed_values = [], [], []
+    for path in set(old) | set(new):
+        old_values, new_values = old.get(path, {}), new.get(path, {})
+        for name, value in new_values.items():
+            if name not in old_values:
+                added_values.append((path, name, value))
+            elif old_values[name] != value:
+                changed_values.append((path, name, old_values[name], value))
+        removed_values.extend((path, name, value) for name, value in old_values.items() if name not in new_values)
+    return RegDiff(sorted(set(new) - set(old)), sorted(set(old) - set(new)), sorted(added_values),
+                   sorted(removed_values), sorted(changed_values))
@@ -0,0 +1,519 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Out-of-process AutoItX3 server and its client proxy.
+
+The server owns the AutoItX3 objects in a dedicated process, so a crash of the COM server cannot take the callers
+down with it and processes without COM can drive automation:
+
+    AUTOIT_SERVER_SECRET=... python -m autoit.server --listen 127.0.0.1:7787 --workers 4
+
+Clients connect over a local TCP or Unix socket and send framed requests (see autoit.protocol). Requests are
+pipelined: AutoItClient.submit returns a future immediately and any number of requests may be in flight. Each
+server worker has its own apartment and AutoItX3 object, and every connection is served by one worker, the one with
+the fewest connections when it was accepted: the requests of a connection run in the order they were sent and
+client.get("error") reads the flag left by the connection's previous call, while a long wait on one connection
+does not hold up connections served by the other workers.
+
+    client = AutoItClient(("127.0.0.1", 7787), secret=secret)
+    pid = client.run("calc.exe")
+    waiting = client.submit("process_wait_close", pid, 60)
+    other = AutoItClient(("127.0.0.1", 7787), secret=secret)
+    other.win_exists("Calculator", "")
+
+Security: whoever can talk to the server can run any program, send keystrokes and read window contents as the user
+running it. Every connection must first answer a challenge keyed with a shared secret, which TCP listeners require;
+a Unix socket is protected by its file permissions and the secret is optional there. The traffic itself is neither
+encrypted nor integrity-protected, so TCP listeners are bound to loopback addresses only unless allow_remote
+(--allow-remote) is given; only allow remote clients on a network you trust, or tunnel the port over SSH instead.
+"""
+import argparse
+import concurrent.futures
+import errno
+import functools
+import itertools
+import os
+import queue
+import socket
+import stat
+import threading
+from . import errors
+from .autoitx import AutoItX3, wrapper_methods
+from .batch import Batch, CallResult, execute_batch
+from .dispatch import initialize_apartment, uninitialize_apartment
+from .protocol import (AUTH, BATCH, CALL, ERROR, GET, MAX_AUTH_PAYLOAD, RESULT, ProtocolError, challenge, pack_frame,
+                       read_frame, respond, verify)
+
+PROPERTIES = ("error", "version")
+#: seconds a new connection has to answer the handshake
+HANDSHAKE_TIMEOUT = 10
+#: requests queued per worker; a connection whose worker is this far behind is not read until it catches up
+MAX_QUEUED = 256
+
+
+class RemoteError(errors.AutoItXError):
+    """An exception raised on the server that has no local counterpart."""
+
+    def __init__(self, message, remote_type=None, method=None, result=None, error=None):
+        errors.AutoItXError.__init__(self, message, method, result, error)
+        self.remote_type = remote_type
+
+
+class AuthenticationError(IOError):
+    """The server rejected the client's secret."""
+
+
+def _is_loopback(host):
+    try:
+        addresses = socket.getaddrinfo(host, None, socket.AF_INET)
+    except socket.gaierror:
+        return False
+    return all(address[4][0].startswith("127.") for address in addresses)
+
+
+def _connect(address):
+    if isinstance(address, tuple):
+        return socket.create_connection(address)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def _listen(address):
+    if isinstance(address, tuple):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    else:
+        _remove_stale_socket(address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(address)
+    sock.listen(16)
+    return sock
+
+
+def _remove_stale_socket(path):
+    # a socket file left behind by a server that is gone refuses connections; one a server still listens on is kept,
+    # so bind fails with "address in use" as it should
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except OSError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except socket.error as e:
+        if e.errno == errno.ECONNREFUSED:
+            os.unlink(path)
+    finally:
+        probe.close()
+
+
+class _Connection(object):
+    """Server side of one client connection."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.stream = sock.makefile("rb")
+        self.write_lock = threading.Lock()
+        # index of the worker running the connection's requests
+        self.worker = None
+
+    def send(self, request_id, kind, value):
+        frame = pack_frame(request_id, kind, value)
+        with self.write_lock:
+            self.sock.sendall(frame)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+class AutoItServer(object):
+    """Serves AutoItX3 calls from socket clients on a set of worker threads."""
+
+    def __init__(self, address, factory=AutoItX3, workers=2, secret=None, allow_remote=False):
+        """
+        :param address: (host, port) for TCP or a filesystem path for a Unix socket.
+        :param factory: callable returning the AutoItX3 of one worker, called inside the worker thread.
+        :param workers: number of worker threads, i.e. calls that can be in progress at the same time. Connections
+            are spread over the workers; the requests of one connection always run on the same worker.
+        :param secret: shared secret clients must prove to know, text or bytes; required for TCP.
+        :param allow_remote: allow a TCP host other than a loopback address, see the module docstring.
+        """
+        if isinstance(address, tuple):
+            if not secret:
+                raise ValueError("a TCP listener requires a secret")
+            if not allow_remote and not _is_loopback(address[0]):
+                raise ValueError("%r is not a loopback address; pass allow_remote to listen on it" % (address[0],))
+        self.factory = factory
+        self.workers = workers
+        self._secret = secret
+        self._sock = _listen(address)
+        self.address = self._sock.getsockname()
+        # one queue per worker; a connection's frames all go to the queue of its worker, which keeps them in order
+        self._queues = [queue.Queue(MAX_QUEUED) for _ in range(workers)]
+        self._load = [0] * workers
+        self._methods = frozenset(wrapper_methods())
+        # workers and the accept loop; connection readers are not kept, they end with their connection
+        self._threads = []
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Starts the workers and the accept loop in background threads."""
+        self._running = True
+        for number in range(self.workers):
+            self._threads.append(self._spawn(self._work, "AutoItX3 server worker %d" % number, self._queues[number]))
+        self._threads.append(self._spawn(self._accept, "AutoItX3 server"))
+        return self
+
+    def serve_forever(self):
+        """Serves until shutdown() is called or the process is interrupted."""
+        self.start()
+        try:
+            # waits with a timeout, so KeyboardInterrupt is delivered on every platform
+            while not self._stopped.wait(0.5):
+                pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stops accepting, closes the client connections and stops the workers."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._running = False
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self._sock.close()
+        if not isinstance(self.address, tuple):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for requests in self._queues:
+            # what is still queued is dropped, its connections are closed already
+            while True:
+                try:
+                    requests.put_nowait(None)
+                    break
+                except queue.Full:
+                    try:
+                        requests.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _spawn(self, target, name, *args):
+        thread = threading.Thread(target=target, name=name, args=args)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _accept(self):
+        while self._running:
+            try:
+                sock, peer = self._sock.accept()
+            except socket.error:
+                break
+            connection = _Connection(sock)
+            with self._lock:
+                self._connections.add(connection)
+            self._spawn(self._read, "AutoItX3 server connection", connection)
+
+    def _authenticate(self, connection):
+        nonce = challenge()
+        connection.send(0, AUTH, nonce)
+        connection.sock.settimeout(HANDSHAKE_TIMEOUT)
+        frame = read_frame(connection.stream, MAX_AUTH_PAYLOAD)
+        connection.sock.settimeout(None)
+        if frame is None or frame[1] != AUTH or not verify(self._secret, nonce, frame[2]):
+            connection.send(0, ERROR, ["AuthenticationError", "wrong secret", None, None, None])
+            return False
+        connection.send(0, RESULT, True)
+        return True
+
+    def _read(self, connection):
+        try:
+            if not self._authenticate(connection):
+                return
+            with self._lock:
+                connection.worker = self._load.index(min(self._load))
+                self._load[connection.worker] += 1
+            requests = self._queues[connection.worker]
+            while True:
+                frame = read_frame(connection.stream)
+                if frame is None:
+                    break
+                while not self._stopped.is_set():
+                    try:
+                        requests.put((connection,) + frame, timeout=0.5)
+                        break
+                    except queue.Full:
+                        pass
+        except (ProtocolError, socket.error, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+                if connection.worker is not None:
+                    self._load[connection.worker] -= 1
+            connection.close()
+
+    def _work(self, requests):
+        initialized = initialize_apartment()
+        autoit = None
+        try:
+            try:
+                autoit = self.factory()
+                failure = None
+            except Exception as e:
+                autoit, failure = None, e
+            while True:
+                item = requests.get()
+                if item is None:
+                    break
+                connection, request_id, kind, value = item
+                try:
+                    if failure is not None:
+                        raise failure
+                    result = self._execute(autoit, kind, value)
+                except Exception as e:
+                    response = (ERROR, [type(e).__name__, str(e), getattr(e, "method", None),
+                                        _plain(getattr(e, "result", None)), _plain(getattr(e, "error", None))])
+                else:
+                    response = (RESULT, result)
+                try:
+                    connection.send(request_id, *response)
+                except TypeError as e:
+                    connection.send(request_id, ERROR, ["TypeError", str(e), None, None, None])
+                except socket.error:
+                    pass
+        finally:
+            # the COM object must be released inside the apartment it was created in
+            if isinstance(autoit, AutoItX3):
+                autoit._release()
+            autoit = None
+            if initialized:
+                uninitialize_apartment()
+
+    def _execute(self, autoit, kind, value):
+        if kind == CALL:
+            method, args, kwargs = value
+            if method not in self._methods:
+                raise AttributeError("AutoItX3 has no method %r" % method)
+            return getattr(autoit, method)(*args, **kwargs)
+        if kind == GET:
+            if value not in PROPERTIES:
+                raise AttributeError("AutoItX3 has no property %r" % value)
+            return autoit._get(value)
+        if kind == BATCH:
+            calls, stop_on_error = value[:2]
+            read_errors = value[2] if len(value) > 2 else True
+            for method, args, kwargs in calls:
+                if method not in self._methods:
+                    raise AttributeError("AutoItX3 has no method %r" % method)
+            return [tuple(result) for result in execute_batch(autoit, calls, stop_on_error, read_errors)]
+        raise ProtocolError("unknown request kind %d" % kind)
+
+
+def _plain(value):
+    return value if value is None or isinstance(value, (int, float, str, bytes)) else repr(value)
+
+
+class AutoItClient(object):
+    """Proxy with the AutoItX3 method names, forwarding calls to an AutoItServer."""
+
+    def __init__(self, address, timeout=None, secret=None):
+        """
+        :param address: (host, port) or Unix socket path of the server.
+        :param timeout: Default seconds to wait for a response in the blocking methods, None waits indefinitely.
+        :param secret: the server's shared secret.
+        :raises AuthenticationError: if the server rejects the secret
+        """
+        self.timeout = timeout
+        self._sock = _connect(address)
+        self._stream = self._sock.makefile("rb")
+        try:
+            self._handshake(secret)
+        except Exception:
+            self._stream.close()
+            self._sock.close()
+            raise
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = None
+        self._reader = threading.Thread(target=self._read, name="AutoItX3 client")
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _handshake(self, secret):
+        self._sock.settimeout(self.timeout)
+        frame = read_frame(self._stream, MAX_AUTH_PAYLOAD)
+        if frame is None or frame[1] != AUTH:
+            raise ProtocolError("expected the handshake challenge")
+        self._sock.sendall(pack_frame(0, AUTH, respond(secret, frame[2])))
+        frame = read_frame(self._stream, MAX_AUTH_PAYLOAD)
+        if frame is None or frame[1] != RESULT:
+            raise AuthenticationError("AutoItX3 server rejected the secret")
+        self._sock.settimeout(None)
+
+    def _send(self, kind, value):
+        future = concurrent.futures.Future()
+        request_id = next(self._ids) & 0xFFFFFFFF
+        frame = pack_frame(request_id, kind, value)
+        with self._pending_lock:
+            if self._closed is not None:
+                raise self._closed
+            self._pending[request_id] = future
+        try:
+            with self._write_lock:
+                self._sock.sendall(frame)
+        except socket.error:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            raise
+        return future
+
+    def _read(self):
+        failure = None
+        try:
+            while True:
+                frame = read_frame(self._stream)
+                if frame is None:
+                    break
+                request_id, kind, value = frame
+                with self._pending_lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if kind == RESULT:
+                    future.set_result(value)
+                else:
+                    future.set_exception(_remote_exception(*value))
+        except (ProtocolError, socket.error, ValueError) as e:
+            failure = e
+        with self._pending_lock:
+            self._closed = IOError("connection to AutoItX3 server closed%s" % (": %s" % failure if failure else ""))
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(self._closed)
+
+    def submit(self, method, *args, **kwargs):
+        """Sends a call without waiting for its response.
+
+        :param method: AutoItX3 method name.
+        :return: future of the result
+        :rtype: concurrent.futures.Future
+        """
+        return self._send(CALL, [method, list(args), kwargs])
+
+    def call(self, method, *args, **kwargs):
+        """Calls an AutoItX3 method on the server and waits for the result."""
+        return self.submit(method, *args, **kwargs).result(self.timeout)
+
+    def get(self, name):
+        """Reads an AutoItX3.Control property ("error" or "version") on the server.
+
+        The error flag is the one left by the previous call sent on this client; with calls still in flight, read it
+        from a batch instead (see batch.call_with_error).
+        """
+        return self._send(GET, name).result(self.timeout)
+
+    def batch(self, stop_on_error=False, read_errors=True):
+        """Queues calls and sends them as a single request, see autoit.batch.
+
+        :param read_errors: read the error flag after each call on the server; with False each error is None.
+        :rtype: Batch
+        """
+        executor = functools.partial(self._execute_batch, read_errors=read_errors)
+        return Batch(self, executor, stop_on_error, read_errors)
+
+    def _execute_batch(self, calls, stop_on_error, read_errors=True):
+        value = [[[method, list(args), kwargs] for method, args, kwargs in calls], stop_on_error, read_errors]
+        return [CallResult(*result) for result in self._send(BATCH, value).result(self.timeout)]
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self._sock.close()
+        self._reader.join()
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _remote_exception(type_name, message, method=None, result=None, error=None):
+    cls = getattr(errors, type_name, None)
+    if isinstance(cls, type) and issubclass(cls, errors.AutoItXError):
+        return cls(message, method, result, error)
+    return RemoteError("%s: %s" % (type_name, message), type_name, method, result, error)
+
+
+def _mirror(name):
+    wrapped = getattr(AutoItX3, name)
+
+    def method(self, *args, **kwargs):
+        return self.call(name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = wrapped.__doc__
+    return method
+
+
+for _name in wrapper_methods():
+    setattr(AutoItClient, _name, _mirror(_name))
+del _name
+
+
+def _parse_address(text):
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoit.server", description="Out-of-process AutoItX3 server")
+    parser.add_argument("--listen", default="127.0.0.1:7787", help="HOST:PORT or Unix socket path")
+    parser.add_argument("--workers", type=int, default=2, help="number of AutoItX3 worker threads")
+    parser.add_argument("--secret-file", help="file holding the shared secret; by default the AUTOIT_SERVER_SECRET "
+                                              "environment variable")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow listening on a non-loopback address; traffic is not encrypted")
+    options = parser.parse_args(argv)
+    address = _parse_address(options.listen)
+    if options.secret_file:
+        with open(options.secret_file) as f:
+            secret = f.read().strip()
+    else:
+        secret = os.environ.get("AUTOIT_SERVER_SECRET")
+    try:
+        server = AutoItServer(address, workers=options.workers, secret=secret, allow_remote=options.allow_remote)
+    except ValueError as e:
+        parser.error(str(e))
+    print("AutoItX3 server listening on %s" % (server.address,))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Immutable geometry and state records read with the fewest AutoItX calls.
+
+AutoItX has no single call returning a rectangle or a mouse position, so a Rect takes one call per field and a
+position two. To avoid torn results when the element or the cursor moves in between, AutoItX3 snapshot methods
+called with consistent=True pin the window by handle first (so all reads hit the same window) and read every field
+again until two reads in a row agree, raising InconsistentRead if they still differ after the retries.
+"""
+from collections import namedtuple
+from .errors import AutoItXError
+
+Rect = namedtuple("Rect", "x y width height")
+ControlState = namedtuple("ControlState", "visible enabled text")
+
+CONTROL_RECT_MEMBERS = ("ControlGetPosX", "ControlGetPosY", "ControlGetPosWidth", "ControlGetPosHeight")
+WINDOW_RECT_MEMBERS = ("WinGetPosX", "WinGetPosY", "WinGetPosWidth", "WinGetPosHeight")
+MOUSE_POS_MEMBERS = ("MouseGetPosX", "MouseGetPosY")
+
+
+class InconsistentRead(AutoItXError):
+    """The fields of a consistent read kept changing between reads."""
+
+
+def read_fields(call, members, args, consistent=False, retries=3):
+    """Reads one value per member.
+
+    :param call: callable (member, *args) invoking an AutoItX member.
+    :param members: member names, one per field.
+    :param args: arguments of each member call.
+    :param consistent: read all fields again until two reads in a row agree, retrying at most retries times.
+    :return: the values in the order of members
+    :rtype: tuple
+    :raises InconsistentRead: if consistent and the values still changed after the retries
+    """
+    values = tuple(call(member, *args) for member in members)
+    if not consistent:
+        return values
+    for attempt in range(retries + 1):
+        again = tuple(call(member, *args) for member in members)
+        if again == values:
+            return values
+        values = again
+    raise InconsistentRead("%s kept changing over %d reads" % ("/".join(members), retries + 2))
+
+
+def read_rect(call, members, args, consistent=False, retries=3):
+    """Reads a rectangle with one call per field, see read_fields.
+
+    :param members: (x, y, width, height) member names.
+    :rtype: Rect
+    """
+    return Rect(*read_fields(call, members, args, consistent, retries))
@@ -0,0 +1,169 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Tail-follow mode for large edit controls.
+
+    for change in follow_control_text(autoit, "Server Log", "", "Edit1", lines=True):
+        if change.kind == REWRITE:
+            ...                                 # the text was cleared or changed before change.position
+        handle(change.text)
+
+AutoItX has no way to read part of a control's text, so every poll still transfers the whole buffer. What is kept
+between polls is bounded: the text length, a hash of the last characters before the end (the anchor) and one hash
+per block of text. A poll whose text is longer and still has the same anchor is an append, found by hashing the
+anchor only, and only the new characters are copied out. Anything else is a rewrite: the block hashes locate the
+first changed block and the text from there on is delivered again. A change before the anchor that leaves the
+anchor in place is not seen, or taken for an append if the text grew.
+"""
+import time
+from collections import namedtuple
+from .batch import call_with_error
+from .errors import ErrorFlagSet
+from .handles import handle_title
+
+APPEND = "append"
+REWRITE = "rewrite"
+
+#: kind is APPEND or REWRITE, position the offset of text in the control's text
+TextChange = namedtuple("TextChange", "kind position text")
+
+
+class TextFollower(object):
+    """Detects appends and rewrites between successive texts of a control, keeping only hashes of the old text."""
+
+    def __init__(self, block=4096, anchor=64):
+        """
+        :param block: characters per block hash; rewrites are delivered from the start of the first changed block.
+        :param anchor: characters before the end whose hash confirms an append.
+        """
+        self.block = block
+        self.anchor = anchor
+        self.length = 0
+        self._anchor_hash = hash("")
+        self._blocks = []
+
+    def _hash_blocks(self, text, first):
+        block = self.block
+        self._blocks[first:] = [hash(text[start:start + block])
+                                for start in range(first * block, len(text) - block + 1, block)]
+
+    def _anchor_of(self, text, length):
+        return hash(text[max(length - self.anchor, 0):length])
+
+    def update(self, text):
+        """Compares a text with the previous one and remembers it.
+
+        :return: TextChange of the new text, None if nothing changed
+        :rtype: TextChange
+        """
+        length = self.length
+        if len(text) >= length and self._anchor_of(text, length) == self._anchor_hash:
+            if len(text) == length:
+                return None
+            change = TextChange(APPEND, length, text[length:])
+            self._hash_blocks(text, len(self._blocks))
+        else:
+            old = self._blocks
+            self._blocks = []
+            self._hash_blocks(text, 0)
+            same = 0
+            while same < min(len(old), len(self._blocks)) and old[same] == self._blocks[same]:
+                same += 1
+            position = min(same * self.block, len(text))
+            change = TextChange(REWRITE, position, text[position:])
+        self.length = len(text)
+        self._anchor_hash = self._anchor_of(text, self.length)
+        return change
+
+    def reset(self, text=""):
+        """Takes text as the baseline without reporting it."""
+        self.length = 0
+        self._anchor_hash = hash("")
+        self._blocks = []
+        self.update(text)
+
+
+class _LineSplitter(object):
+    """Splits changes into complete lines, holding back the last partial line up to max_line characters."""
+
+    def __init__(self, max_line):
+        self.max_line = max_line
+        self.pending = ""
+        self.position = 0
+        self.kind = APPEND
+
+    def split(self, change):
+        if change.kind == REWRITE:
+            # the next line is marked as a rewrite, even if the rewrite itself holds no complete line
+            self.pending, self.position, self.kind = "", change.position, REWRITE
+        text = self.pending + change.text
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end < 0:
+                if len(text) - start < self.max_line:
+                    break
+                end = start + self.max_line - 1
+            line = text[start:end + 1]
+            yield TextChange(self.kind, self.position, line.rstrip("\r\n"))
+            self.kind = APPEND
+            self.position += len(line)
+            start = end + 1
+        self.pending = text[start:]
+
+
+def follow_control_text(autoit, title, text, controlId, interval=0.25, idle_timeout=None, lines=False,
+                        max_line=65536, from_start=False, block=4096, anchor=64, clock=time.time, sleep=time.sleep):
+    """Yields the new content of a control's text as it grows, see TextFollower.
+
+    :param autoit: AutoItX3 or a proxy with the same methods.
+    :param interval: seconds between polls.
+    :param idle_timeout: stop after this many seconds without new content; None follows until the window or control
+        goes away.
+    :param lines: yield one TextChange per complete line, without its line break, instead of one per poll. A partial
+        last line is held back until it is completed or reaches max_line characters.
+    :param from_start: deliver the text the control has at the start as well; by default it is the baseline.
+    :return: generator of TextChange
+    """
+    try:
+        handle = autoit.win_get_handle(title, text)
+    except ErrorFlagSet:
+        return
+    if not handle:
+        return
+    title, text = handle_title(handle), ""
+    follower = TextFollower(block, anchor)
+    splitter = _LineSplitter(max_line) if lines else None
+    first = True
+    changed_at = clock()
+    while True:
+        try:
+            current, error = call_with_error(autoit, "control_get_text", (title, text, controlId),
+                                             lambda current: current == "")
+        except ErrorFlagSet:
+            # raised instead of returned by checked instances
+            return
+        if error:
+            return
+        if first and not from_start:
+            follower.reset(current)
+            if splitter is not None:
+                # the partial last line is completed by what is appended to it
+                partial = current[current.rfind("\n") + 1:]
+                if len(partial) < max_line:
+                    splitter.pending = partial
+                splitter.position = len(current) - len(splitter.pending)
+            change = None
+        else:
+            change = follower.update(current)
+        first = False
+        if change is not None:
+            changed_at = clock()
+            if splitter is None:
+                yield change
+            else:
+                for line in splitter.split(change):
+                    yield line
+        elif idle_timeout is not None and clock() - changed_at >= idle_timeout:
+            return
+        sleep(interval)
@@ -0,0 +1,110 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+In-process stand-ins for the AutoItX3.Control COM object, for running code built on AutoItX3 without Windows:
+
+    from autoit.autoitx import AutoItX3
+    from autoit.testing import FakeAutoItX
+
+    fake = FakeAutoItX().on("ControlGetText", "8")
+    autoit = AutoItX3(backend=fake)
+    assert autoit.control_get_text("Calculator", "", 150) == "8"
+    assert fake.calls == [("ControlGetText", ("Calculator", "", 150))]
+"""
+import functools
+from .dispatch import DISPATCH_METHOD, DISPATCH_PROPERTYGET, LOCALE_USER_DEFAULT
+
+
+class FakeAutoItX(object):
+    """Accepts every AutoItX3.Control member and records the calls made to it.
+
+    Each call is appended to calls as (name, args) and answered from results: either a constant or a callable that
+    receives the call arguments. Members without a result return 1. The error flag is reset before every call to the
+    value registered with on() (default 0); callables may set fake.error themselves.
+    """
+    version = "3.3.16.1"
+
+    def __init__(self, results=None):
+        self.error = 0
+        self.calls = []
+        self.results = dict(results or {})
+        self.errors = {}
+
+    def on(self, name, result, error=0):
+        """Registers the result and error flag for a member.
+
+        :param name: AutoItX member name, e.g. "ControlGetText".
+        :param result: value to return or callable computing it from the call arguments.
+        :param error: value of the error flag after the call.
+        :return: the fake itself, for chaining
+        """
+        self.results[name] = result
+        self.errors[name] = error
+        return self
+
+    def count(self, name):
+        """Number of recorded calls of a member.
+        :rtype: int
+        """
+        return sum(1 for called, args in self.calls if called == name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self._invoke, name)
+
+    def _invoke(self, name, *args):
+        self.calls.append((name, args))
+        self.error = self.errors.get(name, 0)
+        result = self.results.get(name, 1)
+        if callable(result):
+            result = result(*args)
+        return result
+
+
+class CountingOleObject(object):
+    """Minimal IDispatch over a Python backend that counts name resolutions and invocations.
+
+    DISPIDs are handed out on first resolution of a name; Invoke forwards to the backend member of that name.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.resolutions = 0
+        self.invocations = 0
+        self._ids = {}
+        self._names = []
+
+    def GetIDsOfNames(self, name):
+        self.resolutions += 1
+        dispid = self._ids.get(name)
+        if dispid is None:
+            getattr(self.backend, name)
+            self._names.append(name)
+            dispid = self._ids[name] = len(self._names)
+        return dispid
+
+    def Invoke(self, dispid, lcid, flags, resultWanted, *args):
+        self.invocations += 1
+        member = getattr(self.backend, self._names[dispid - 1])
+        if flags & DISPATCH_METHOD:
+            return member(*args)
+        return member
+
+
+class FakeDispatch(object):
+    """Late-bound wrapper over an IDispatch that, like win32com's dynamic Dispatch, resolves the name on every access.
+    """
+    _properties = ("error", "version")
+
+    def __init__(self, oleobj):
+        self._oleobj_ = oleobj
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        dispid = self._oleobj_.GetIDsOfNames(name)
+        if name in self._properties:
+            return self._oleobj_.Invoke(dispid, LOCALE_USER_DEFAULT, DISPATCH_PROPERTYGET, True)
+        return functools.partial(self._oleobj_.Invoke, dispid, LOCALE_USER_DEFAULT,
+                                 DISPATCH_METHOD | DISPATCH_PROPERTYGET, True)
@@ -0,0 +1,200 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Text entry into controls with the fastest strategy that works.
+
+    result = type_text(autoit, "Untitled - Notepad", "", "Edit1", payload)
+    result.strategy     # "keys", "set_text" or "paste"
+    result.verified     # whether control_get_text showed the text afterwards
+
+Keystrokes cost one synthetic key per character, so they are only used for short texts. Longer texts are set with
+control_set_text where the control class supports it (edit controls), and pasted from the clipboard otherwise. The
+class is taken from a controlId naming it ("Edit1", "[CLASS:Edit; INSTANCE:1]") and read from the control's handle for
+any other controlId. The previous clipboard text is restored afterwards, and an empty clipboard emptied again; other
+clipboard content, such as an image, cannot be read through AutoItX and is replaced by the pasted text. If the result
+cannot be verified, the next strategy is tried; when inserting (replace=False) only if nothing was sent, as a retry
+would insert the text a second time.
+"""
+import os
+import time
+from collections import namedtuple
+from .batch import call_with_error
+from .errors import AutoItXError
+
+KEYS = "keys"
+SET_TEXT = "set_text"
+PASTE = "paste"
+STRATEGIES = (KEYS, SET_TEXT, PASTE)
+# control classes whose text WM_SETTEXT (control_set_text) replaces
+SET_TEXT_CLASSES = ("Edit", "RichEdit", "RICHEDIT", "WindowsForms10.EDIT", "TextBox")
+
+# ClipGet error flag for an empty clipboard; 2 means it holds something other than text, 3 and 4 that it is locked
+CLIPBOARD_EMPTY = 1
+
+TextEntry = namedtuple("TextEntry", "strategy verified tried")
+
+
+def control_class(controlId):
+    """Class name of a control given by ClassNameNN ("Edit1") or advanced description ("[CLASS:Edit; INSTANCE:1]"),
+    None for numeric ids and other descriptions.
+    :rtype: str
+    """
+    if not isinstance(controlId, str) or not controlId:
+        return None
+    if controlId.startswith("["):
+        for part in controlId.strip("[]").split(";"):
+            name, _, value = part.partition(":")
+            if name.strip().upper() == "CLASS":
+                return value.strip()
+        return None
+    return controlId.rstrip("0123456789") or None
+
+
+def window_class(handle):
+    """Class name of a window or control handle as returned by control_get_handle, None if it cannot be read, e.g.
+    off Windows.
+    :rtype: str
+    """
+    if os.name != "nt" or not handle:
+        return None
+    import ctypes
+    name = ctypes.create_unicode_buffer(256)
+    if not ctypes.windll.user32.GetClassNameW(ctypes.c_void_p(int(handle, 16)), name, len(name)):
+        return None
+    return name.value
+
+
+def query_control_class(autoit, title, text, controlId, class_name=window_class):
+    """Class name of a control: taken from the controlId where it names one, read from the control's handle
+    otherwise, e.g. for numeric, [ID:..] or [HANDLE:..] ids.
+
+    :param class_name: callable(handle) returning the class name of a handle, window_class by default.
+    :return: the class name, None if the control does not exist or its class cannot be read
+    :rtype: str
+    """
+    name = control_class(controlId)
+    if name is not None:
+        return name
+    try:
+        handle = autoit.control_get_handle(title, text, controlId)
+    except AutoItXError:
+        return None
+    return class_name(handle) if handle else None
+
+
+def supports_set_text(name):
+    """Whether control_set_text is known to work on a control class.
+    :rtype: bool
+    """
+    return name is not None and name.startswith(SET_TEXT_CLASSES)
+
+
+def choose_strategies(text, name, keystroke_limit=64):
+    """Strategies to try in order for a text and a control class.
+
+    :param name: class name of the control, see query_control_class; None if it is not known.
+    :rtype: list
+    """
+    if len(text) <= keystroke_limit:
+        return [KEYS, PASTE]
+    if supports_set_text(name):
+        return [SET_TEXT, PASTE]
+    return [PASTE]
+
+
+def _normalized(text):
+    return text.replace("\r\n", "\n") if isinstance(text, str) else text
+
+
+def read_clipboard(autoit):
+    """Text on the clipboard, None if it is empty or holds something else.
+    :rtype: str
+    """
+    text, error = _clip_get(autoit)
+    return None if error else text
+
+
+def _clip_get(autoit):
+    try:
+        return call_with_error(autoit, "clip_get", (), lambda text: text == "")
+    except AutoItXError as e:
+        return None, e.error
+
+
+def type_text(autoit, title, text, controlId, string, strategy=None, replace=True, keystroke_limit=64, chunk=256,
+              verify_timeout=1.0, class_name=window_class, clock=time.time, sleep=time.sleep):
+    """Enters text into a control and verifies it with control_get_text.
+
+    :param string: the text to enter, sent literally.
+    :param strategy: force one of KEYS, SET_TEXT or PASTE; by default chosen by choose_strategies.
+    :param replace: replace the control's text; otherwise keys and paste insert at the caret and set_text is not used.
+        Keys and paste select the existing text with Ctrl+A.
+    :param keystroke_limit: longest text sent as keystrokes.
+    :param chunk: keystrokes per control_send call of the keys strategy.
+    :param verify_timeout: seconds to wait for the control to show the text.
+    :param class_name: callable(handle) returning the class name of a handle, see query_control_class.
+    :return: TextEntry(strategy, verified, tried) with the strategy that ended the attempt and all strategies tried
+    :rtype: TextEntry
+    """
+    if strategy is not None:
+        if strategy not in STRATEGIES:
+            raise ValueError("unknown strategy %r" % (strategy,))
+        strategies = [strategy]
+    else:
+        # the class only matters for texts too long for keystrokes when replacing
+        if replace and len(string) > keystroke_limit:
+            name = query_control_class(autoit, title, text, controlId, class_name)
+        else:
+            name = None
+        strategies = choose_strategies(string, name, keystroke_limit)
+    tried = []
+    for name in strategies:
+        tried.append(name)
+        if name == KEYS:
+            if replace:
+                autoit.control_send(title, text, controlId, "^a{DEL}", 0)
+            sent = autoit.control_send_keys(title, text, controlId, string, 1, chunk)
+            verified = sent and _verify(autoit, title, text, controlId, string, replace, verify_timeout, clock, sleep)
+            if sent and not verified and not replace:
+                # the keys may have been inserted without the control showing them yet
+                return TextEntry(name, False, tried)
+        elif name == SET_TEXT:
+            sent = autoit.control_set_text(title, text, controlId, string)
+            verified = sent and _verify(autoit, title, text, controlId, string, True, verify_timeout, clock, sleep)
+        else:
+            verified = _paste(autoit, title, text, controlId, string, replace, verify_timeout, clock, sleep)
+        if verified:
+            return TextEntry(name, True, tried)
+    return TextEntry(tried[-1], False, tried)
+
+
+def _paste(autoit, title, text, controlId, string, replace, verify_timeout, clock, sleep):
+    previous, error = _clip_get(autoit)
+    try:
+        if not autoit.clip_put(string):
+            return False
+        autoit.control_focus(title, text, controlId)
+        if not autoit.control_send(title, text, controlId, "^a^v" if replace else "^v", 0):
+            return False
+        # the clipboard is only restored once the target has pasted, or the old text could be pasted instead
+        return _verify(autoit, title, text, controlId, string, replace, verify_timeout, clock, sleep)
+    finally:
+        if error == CLIPBOARD_EMPTY:
+            # AutoIt empties the clipboard on ClipPut("")
+            autoit.clip_put("")
+        elif not error and previous is not None:
+            autoit.clip_put(previous)
+
+
+def _verify(autoit, title, text, controlId, string, replace, timeout, clock, sleep):
+    expected = _normalized(string)
+    deadline = clock() + timeout
+    interval = 0.01
+    while True:
+        current = _normalized(autoit.control_get_text(title, text, controlId))
+        if isinstance(current, str) and (current == expected if replace else expected in current):
+            return True
+        if clock() >= deadline:
+            return False
+        sleep(interval)
+        interval = min(interval * 2, 0.2)
@@ -0,0 +1,152 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Lazy traversal of TreeView (SysTreeView32) controls.
+
+    tree = autoit.tree_view("Settings", "", "SysTreeView321")
+    for node in tree.walk(order="bfs", max_depth=2):
+        print(node.ref, "/".join(node.path))
+    tree.find("Network|*|Proxy")             # expands only the branches matching each segment
+
+Items are addressed by index references ("#0|#2") as ControlTreeView accepts them, so item texts containing "|" or
+duplicates do not matter. Item texts and child counts are fetched on first use and remembered, so walking again or
+searching after a walk does not repeat ControlTreeView calls; invalidate() forgets them after the tree changed.
+"""
+import fnmatch
+from collections import deque, namedtuple
+from .handles import handle_title
+from .window import ElementNotFound
+
+#: ref is the index reference of the item, path the tuple of item texts from the root down to it
+TreeNode = namedtuple("TreeNode", "ref path depth")
+
+BFS = "bfs"
+DFS = "dfs"
+# pattern segment matching any number of levels in find
+ANY_DEPTH = "**"
+
+
+def _segments(pattern):
+    return tuple(pattern.split("|")) if isinstance(pattern, str) else tuple(pattern)
+
+
+def _count(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class TreeView(object):
+    """A TreeView control whose items are fetched on demand and memoized."""
+
+    def __init__(self, autoit, title, text, controlId, expand=False):
+        """
+        :param autoit: AutoItX3 or a proxy with the same methods.
+        :param expand: expand every item before counting its children, for trees that populate children on expand.
+        :raises ElementNotFound: if no window matches
+        """
+        handle = autoit.win_get_handle(title, text)
+        if not handle:
+            raise ElementNotFound("no window matches %r" % title)
+        self._autoit = autoit
+        self.title = handle_title(handle)
+        self.controlId = controlId
+        self.expand = expand
+        self._texts = {}
+        self._counts = {}
+
+    def __repr__(self):
+        return "TreeView(%r, %r)" % (self.title, self.controlId)
+
+    def command(self, command, option1="", option2=""):
+        """Sends a ControlTreeView command to the control."""
+        return self._autoit.control_tree_view(self.title, "", self.controlId, command, option1, option2)
+
+    def text(self, ref):
+        """Text of an item, fetched once."""
+        try:
+            return self._texts[ref]
+        except KeyError:
+            value = self._texts[ref] = self.command("GetText", ref)
+            return value
+
+    def child_count(self, ref=""):
+        """Number of children of an item, "" being the root; fetched once."""
+        try:
+            return self._counts[ref]
+        except KeyError:
+            if self.expand and ref:
+                self.command("Expand", ref)
+            value = self._counts[ref] = _count(self.command("GetItemCount", ref))
+            return value
+
+    def children(self, node=None):
+        """Child nodes of a node, the top-level items for None.
+        :rtype: list
+        """
+        ref, path, depth = node if node is not None else ("", (), -1)
+        prefix = ref + "|" if ref else ""
+        refs = [prefix + "#%d" % index for index in range(self.child_count(ref))]
+        return [TreeNode(child, path + (self.text(child),), depth + 1) for child in refs]
+
+    def walk(self, order=BFS, max_depth=None, prune=None):
+        """Yields the nodes of the tree lazily, fetching each level only when the walk reaches it.
+
+        :param order: BFS (level by level) or DFS (pre-order).
+        :param max_depth: deepest level yielded, 0 being the top-level items; unlimited by default.
+        :param prune: optional callable(node) returning True for nodes whose children must not be fetched or yielded.
+        """
+        if order not in (BFS, DFS):
+            raise ValueError("order must be %r or %r" % (BFS, DFS))
+        # BFS takes nodes from the left, DFS from the right, so DFS keeps siblings in reverse order
+        arrange = (lambda nodes: nodes) if order == BFS else reversed
+        take = deque.popleft if order == BFS else deque.pop
+        pending = deque(arrange(self.children()))
+        while pending:
+            node = take(pending)
+            yield node
+            if (max_depth is not None and node.depth >= max_depth) or (prune is not None and prune(node)):
+                continue
+            pending.extend(arrange(self.children(node)))
+
+    def find_all(self, pattern):
+        """Nodes whose path matches a pattern of "|"-separated fnmatch segments, "**" matching any number of levels.
+        Only the children of items matching the pattern so far are fetched.
+        :rtype: list
+        """
+        return list(self._match(None, _segments(pattern)))
+
+    def find(self, pattern):
+        """First node in pre-order whose path matches a pattern, see find_all; None if there is none.
+        :rtype: TreeNode
+        """
+        return next(self._match(None, _segments(pattern)), None)
+
+    def _match(self, node, segments):
+        if not segments:
+            if node is not None:
+                yield node
+            return
+        segment, rest = segments[0], segments[1:]
+        if segment == ANY_DEPTH:
+            # "**" matches nothing here, or one level with the pattern still starting at "**"
+            seen = set()
+            for found in self._match(node, rest):
+                seen.add(found.ref)
+                yield found
+            for child in self.children(node):
+                for found in self._match(child, segments):
+                    if found.ref not in seen:
+                        seen.add(found.ref)
+                        yield found
+            return
+        for child in self.children(node):
+            if fnmatch.fnmatchcase(child.path[-1], segment):
+                for found in self._match(child, rest):
+                    yield found
+
+    def invalidate(self):
+        """Forgets the fetched texts and child counts."""
+        self._texts.clear()
+        self._counts.clear()
@@ -0,0 +1,261 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Waiting on many process, window and control conditions in one polling loop.
+
+    result = wait(autoit, [window_exists("Error"), process_gone(pid), statusbar_text("Setup", "Ready")], timeout=60)
+    if result:
+        result.first.condition      # the condition that ended the wait, with the probed value and seconds elapsed
+
+Each distinct probe (an AutoItX3 method and its arguments) is called once per round, however many conditions test
+its value. Every probe polls on its own schedule: its interval starts small and grows while the value stays the same,
+and drops back to the minimum when the value changes, so quiet probes cost little and active ones are seen quickly.
+Through an AutoItClient the probes of a round go out as one batch. autoit.aio.wait_async runs the same engine on an
+AsyncAutoItX3 without blocking the event loop.
+
+With mode=ANY the wait ends in the first round in which any condition holds, and all conditions holding in that
+round are returned. With mode=ALL it ends once every condition has held at least once. A probe that a checked
+instance rejects, e.g. the text of a window that does not exist, has the value None.
+"""
+import time
+from collections import OrderedDict, namedtuple
+from .change import _Backoff
+from .errors import AutoItXError
+
+ANY = "any"
+ALL = "all"
+# clock differences below this are treated as elapsed
+_RESOLUTION = 0.001
+
+Satisfied = namedtuple("Satisfied", "condition value elapsed")
+
+
+class WaitResult(namedtuple("WaitResult", "satisfied timed_out elapsed probes")):
+    """Outcome of a wait: the satisfied conditions in the order given, whether the timeout ended the wait, the
+    seconds taken and the number of probe calls made."""
+    __slots__ = ()
+
+    @property
+    def first(self):
+        """Satisfied record of the condition that held first, the first given of equals; None if none held.
+        :rtype: Satisfied
+        """
+        return min(self.satisfied, key=lambda satisfied: satisfied.elapsed) if self.satisfied else None
+
+    def __bool__(self):
+        return not self.timed_out
+    __nonzero__ = __bool__
+
+
+class Condition(object):
+    """A probe, i.e. an AutoItX3 method with its arguments, and a test of the value it returns."""
+
+    def __init__(self, method, args, test, description=None):
+        """
+        :param method: AutoItX3 method name, e.g. "win_exists".
+        :param args: arguments of the method; conditions with equal method and arguments share one probe.
+        :param test: callable(value) returning whether the condition holds.
+        """
+        self.method = method
+        self.args = tuple(args)
+        self.test = test
+        self.description = description or "%s%r" % (method, self.args)
+
+    @property
+    def probe(self):
+        return self.method, self.args
+
+    def __repr__(self):
+        return "Condition(%s)" % self.description
+
+
+def _matcher(expected):
+    if callable(expected):
+        return expected
+    if hasattr(expected, "search"):
+        return lambda value: isinstance(value, type(expected.pattern)) and expected.search(value) is not None
+    return lambda value: value == expected
+
+
+def process_exists(process):
+    """Holds while a process (name or PID) exists."""
+    return Condition("process_exists", (process,), bool, "process %r exists" % (process,))
+
+
+def process_gone(process):
+    """Holds while a process (name or PID) does not exist."""
+    return Condition("process_exists", (process,), lambda pid: not pid, "process %r gone" % (process,))
+
+
+def window_exists(title, text=""):
+    """Holds while a window matching title and text exists."""
+    return Condition("win_exists", (title, text), bool, "window %r exists" % (title,))
+
+
+def window_gone(title, text=""):
+    """Holds while no window matches title and text."""
+    return Condition("win_exists", (title, text), lambda found: not found, "window %r gone" % (title,))
+
+
+def window_active(title, text=""):
+    """Holds while a window matching title and text is active."""
+    return Condition("win_active", (title, text), bool, "window %r active" % (title,))
+
+
+def control_text(title, text, controlId, expected):
+    """Holds while a control's text matches expected: equal to a string, found by a compiled regular expression's
+    search, or accepted by a callable."""
+    return Condition("control_get_text", (title, text, controlId), _matcher(expected),
+                     "text of %r in %r matches %r" % (controlId, title, expected))
+
+
+def statusbar_text(title, expected, text="", part=1):
+    """Holds while the text of a status bar part matches expected, see control_text."""
+    return Condition("statusbar_get_text", (title, text, part), _matcher(expected),
+                     "status bar part %d of %r matches %r" % (part, title, expected))
+
+
+class _Probe(object):
+    __slots__ = ("backoff", "due", "value", "read")
+
+    def __init__(self, backoff):
+        self.backoff = backoff
+        self.due = 0.0
+        self.value = None
+        self.read = False
+
+
+class WaitEngine(object):
+    """Scheduler deciding which probes are due and which conditions hold; the caller runs the probes. Drivers:
+
+        engine = WaitEngine(conditions)
+        while True:
+            probes = engine.due()
+            engine.update(probes, [getattr(autoit, method)(*args) for method, args in probes])
+            if engine.done:
+                return engine.result()
+            sleep(engine.delay())
+    """
+
+    def __init__(self, conditions, mode=ANY, timeout=None, interval=0.05, max_interval=0.25, clock=time.time):
+        """
+        :param conditions: Condition instances.
+        :param mode: ANY or ALL.
+        :param timeout: seconds to wait, None waits indefinitely; with 0 the conditions are probed once.
+        :param interval: first polling interval of each probe in seconds, grown up to max_interval while its value
+            stays the same.
+        """
+        self.conditions = list(conditions)
+        if not self.conditions:
+            raise ValueError("no conditions to wait for")
+        if mode not in (ANY, ALL):
+            raise ValueError("mode must be %r or %r" % (ANY, ALL))
+        self.mode = mode
+        self._clock = clock
+        self._start = clock()
+        self._deadline = None if timeout is None else self._start + timeout
+        self._probes = OrderedDict()
+        for condition in self.conditions:
+            if condition.probe not in self._probes:
+                self._probes[condition.probe] = _Probe(_Backoff(interval, max_interval))
+        self._satisfied = {}
+        self.probes = 0
+
+    def due(self):
+        """Probes to call now, as (method, args).
+        :rtype: list
+        """
+        now = self._clock()
+        return [probe for probe, state in self._probes.items() if state.due <= now + _RESOLUTION]
+
+    def update(self, probes, values):
+        """Records the values of the probes returned by due() and tests the conditions depending on them."""
+        now = self._clock()
+        for probe, value in zip(probes, values):
+            state = self._probes[probe]
+            if state.read and value != state.value:
+                state.backoff.changed()
+            state.value, state.read = value, True
+            state.due = now + state.backoff.quiet()
+        self.probes += len(probes)
+        updated = set(probes)
+        for index, condition in enumerate(self.conditions):
+            if index in self._satisfied or condition.probe not in updated:
+                continue
+            value = self._probes[condition.probe].value
+            if condition.test(value):
+                self._satisfied[index] = Satisfied(condition, value, now - self._start)
+
+    @property
+    def complete(self):
+        if self.mode == ANY:
+            return bool(self._satisfied)
+        return len(self._satisfied) == len(self.conditions)
+
+    @property
+    def timed_out(self):
+        return self._deadline is not None and self._clock() >= self._deadline - _RESOLUTION
+
+    @property
+    def done(self):
+        return self.complete or self.timed_out
+
+    def delay(self):
+        """Seconds until the next probe is due or the timeout expires.
+        :rtype: float
+        """
+        now = self._clock()
+        until = min(state.due for state in self._probes.values())
+        if self._deadline is not None:
+            until = min(until, self._deadline)
+        return max(until - now, 0.0)
+
+    def result(self):
+        """:rtype: WaitResult"""
+        satisfied = [self._satisfied[index] for index in sorted(self._satisfied)]
+        return WaitResult(satisfied, not self.complete, self._clock() - self._start, self.probes)
+
+
+def read_probes(autoit, probes):
+    """Values of probes, None for those a checked instance rejects, each probe's failure being captured on its own:
+    a local AutoItX3 calls the probes in turn, a proxy such as AutoItClient runs them as one batch without error
+    reads, in which a rejected call is recorded with its error flag. A failing probe costs no extra calls.
+    :rtype: list
+    """
+    from .autoitx import AutoItX3
+    if not isinstance(autoit, AutoItX3):
+        with autoit.batch(read_errors=False) as batch:
+            for method, args in probes:
+                getattr(batch, method)(*args)
+        return probe_values(batch.results)
+    values = []
+    for method, args in probes:
+        try:
+            values.append(getattr(autoit, method)(*args))
+        except AutoItXError:
+            values.append(None)
+    return values
+
+
+def probe_values(results):
+    """Values of a batch of probes run with read_errors=False, None for the calls a checked instance rejected.
+    :rtype: list
+    """
+    return [None if error is not None else value for value, error in results]
+
+
+def wait(autoit, conditions, mode=ANY, timeout=None, interval=0.05, max_interval=0.25, clock=time.time,
+         sleep=time.sleep):
+    """Polls conditions until any (mode=ANY) or all (mode=ALL) of them held, see WaitEngine.
+
+    :param autoit: AutoItX3 or a proxy with the same methods, e.g. AutoItClient.
+    :return: WaitResult, false if the timeout expired first
+    :rtype: WaitResult
+    """
+    engine = WaitEngine(conditions, mode, timeout, interval, max_interval, clock)
+    while True:
+        probes = engine.due()
+        engine.update(probes, read_probes(autoit, probes))
+        if engine.done:
+            return engine.result()
+        sleep(engine.delay())
@@ -0,0 +1,244 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Change subscriptions on control and status bar texts, served by one polling thread.
+
+    def changed(subscription, previous, value):
+        print(subscription.window, previous, "->", value)
+
+    watcher = Watcher(autoit, interval=0.2)
+    watcher.watch("Build", "", "Edit1", changed)
+    watcher.watch_statusbar("Job 17", changed, min_interval=5)     # at most one callback per 5 seconds
+    with watcher:                                                   # starts and stops the poller thread
+        ...
+
+or autoit.watch("Build", "", "Edit1", changed), which uses autoit.watcher and starts it on first use.
+
+Every round resolves each watched window to its handle once and reads the probes of its controls by handle, so
+AutoIt matches each title once per round instead of once per control. Subscriptions with the same probe share one
+call. Callbacks run on the poller thread, only when the value differs from the last value delivered to that
+subscription; the first read is the baseline and is not delivered. While a subscription's min_interval has not
+passed since its last callback, changes are held back and the latest value is delivered once it has; a value that
+changes back meanwhile is not delivered at all. The value is None while the window does not exist, and while a
+checked instance rejects the probe, e.g. for a missing control.
+
+Through an AutoItClient each round is two batches, one for the handles and one for the probes. COM objects are
+apartment-threaded: pass a callable creating the AutoItX3 instead of an instance to create it on the poller thread.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from .dispatch import initialize_apartment, uninitialize_apartment
+from .handles import handle_title
+from .wait import read_probes
+
+WatchMetrics = namedtuple("WatchMetrics", "subscriptions windows probes rounds calls changes dispatched suppressed "
+                                          "errors last_round")
+
+
+class Subscription(object):
+    """A callback on the value of one probe of a window."""
+
+    def __init__(self, watcher, title, text, method, args, callback, min_interval):
+        self._watcher = watcher
+        self.window = (title, text)
+        self.method = method
+        self.args = tuple(args)
+        self.callback = callback
+        self.min_interval = min_interval
+        #: value last delivered to the callback, or the baseline
+        self.value = None
+        self.initialized = False
+        self.dispatched_at = None
+
+    @property
+    def probe(self):
+        return self.window, self.method, self.args
+
+    def cancel(self):
+        """Stops the subscription."""
+        self._watcher._remove(self)
+
+    def __repr__(self):
+        return "Subscription(%r, %s%r)" % (self.window[0], self.method, self.args)
+
+
+class Watcher(object):
+    """Polls the probes of all subscriptions in rounds and calls back on changes."""
+
+    def __init__(self, autoit, interval=0.1, clock=time.time):
+        """
+        :param autoit: AutoItX3 or a proxy with the same methods, or a callable returning one on the poller thread.
+        :param interval: seconds from the start of one round to the start of the next.
+        :param clock: time source, seconds as float.
+        """
+        self._autoit = autoit
+        # instance created by the factory, released when the poller thread ends
+        self._created = None
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._subscriptions = OrderedDict()
+        self._values = {}
+        self._thread = None
+        self._stopping = threading.Event()
+        #: exception of the last failed round or callback
+        self.last_error = None
+        self._rounds = self._calls = self._changes = self._dispatched = self._suppressed = self._errors = 0
+        self._last_round = 0.0
+
+    def watch(self, title, text, controlId, callback, min_interval=0):
+        """Subscribes to the text of a control (control_get_text).
+
+        :param callback: callable(subscription, previous, value) run on the poller thread.
+        :param min_interval: minimum seconds between two callbacks of this subscription.
+        :rtype: Subscription
+        """
+        return self.subscribe("control_get_text", title, text, (controlId,), callback, min_interval)
+
+    def watch_statusbar(self, title, callback, text="", part=1, min_interval=0):
+        """Subscribes to the text of a status bar part (statusbar_get_text), see watch.
+        :rtype: Subscription
+        """
+        return self.subscribe("statusbar_get_text", title, text, (part,), callback, min_interval)
+
+    def subscribe(self, method, title, text, args, callback, min_interval=0):
+        """Subscribes to the value of any AutoItX3 method taking (title, text, *args), see watch.
+        :rtype: Subscription
+        """
+        subscription = Subscription(self, title, text, method, args, callback, min_interval)
+        with self._lock:
+            self._subscriptions.setdefault(subscription.probe, []).append(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.probe, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.probe, None)
+                self._values.pop(subscription.probe, None)
+
+    def _instance(self):
+        if hasattr(self._autoit, "win_get_handle"):
+            return self._autoit
+        if self._created is None:
+            self._created = self._autoit()
+        return self._created
+
+    def poll(self):
+        """Runs one round on the calling thread.
+
+        :return: number of callbacks run
+        :rtype: int
+        """
+        started = self._clock()
+        with self._lock:
+            probes = list(self._subscriptions)
+        windows = list(OrderedDict.fromkeys(window for window, method, args in probes))
+        autoit = self._instance()
+        # a checked instance rejects a missing window; read_probes gives it None and reads the others
+        handles = dict(zip(windows, read_probes(autoit, [("win_get_handle", window) for window in windows])))
+        live = [probe for probe in probes if handles[probe[0]]]
+        values = dict.fromkeys(probes)
+        values.update(zip(live, read_probes(autoit, [(method, (handle_title(handles[window]), "") + args)
+                                                     for window, method, args in live])))
+        self._calls += len(windows) + len(live)
+        now = self._clock()
+        dispatched = 0
+        for probe in probes:
+            value = values[probe]
+            with self._lock:
+                subscriptions = list(self._subscriptions.get(probe, ()))
+                # a probe cancelled during the round is not remembered again
+                if not subscriptions:
+                    continue
+                if probe in self._values and self._values[probe] != value:
+                    self._changes += 1
+                self._values[probe] = value
+            for subscription in subscriptions:
+                dispatched += self._deliver(subscription, value, now)
+        self._rounds += 1
+        self._last_round = self._clock() - started
+        return dispatched
+
+    def _deliver(self, subscription, value, now):
+        if not subscription.initialized:
+            subscription.value, subscription.initialized = value, True
+            return 0
+        if value == subscription.value:
+            return 0
+        if subscription.dispatched_at is not None and now - subscription.dispatched_at < subscription.min_interval:
+            self._suppressed += 1
+            return 0
+        previous, subscription.value, subscription.dispatched_at = subscription.value, value, now
+        self._dispatched += 1
+        try:
+            subscription.callback(subscription, previous, value)
+        except Exception as e:
+            self._errors += 1
+            self.last_error = e
+        return 1
+
+    def metrics(self):
+        """Counters since the watcher was created: current subscriptions, windows and distinct probes; rounds,
+        AutoItX calls, probe value changes, callbacks run, changes held back by min_interval, failed rounds and
+        callbacks; and the seconds the last round took.
+        :rtype: WatchMetrics
+        """
+        with self._lock:
+            probes = list(self._subscriptions)
+            subscriptions = sum(len(found) for found in self._subscriptions.values())
+        return WatchMetrics(subscriptions, len(set(window for window, method, args in probes)), len(probes),
+                            self._rounds, self._calls, self._changes, self._dispatched, self._suppressed,
+                            self._errors, self._last_round)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts the poller thread, if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="AutoItX3 watcher")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stops the poller thread after the current round."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def _run(self):
+        initialized = initialize_apartment()
+        try:
+            while not self._stopping.is_set():
+                started = self._clock()
+                try:
+                    self.poll()
+                except Exception as e:
+                    self._errors += 1
+                    self.last_error = e
+                self._stopping.wait(max(self.interval - (self._clock() - started), 0))
+        finally:
+            # the COM object must be released inside the apartment it was created in; a restart creates a new one
+            created, self._created = self._created, None
+            if created is not None and hasattr(created, "_release"):
+                created._release()
+            created = None
+            if initialized:
+                uninitialize_apartment()
@@ -0,0 +1,234 @@
+from __future__ import absolute_import, division, print_function
+__author__ = 'florian.schaeffeler'
+"""
+Lazy window and control objects.
+
+    calc = autoit.window("Calculator")
+    display = calc.control(150)
+    display.text        # fetched on first access, then served from the object
+    display.refresh()   # re-fetches only the attributes read since the last refresh
+
+A Window resolves its handle once and addresses the window as "[HANDLE:...]" afterwards, so AutoIt does not re-match
+the title on every call; a Control is addressed by its handle the same way once Control.handle was read. Attributes
+are fetched on first access and kept until refresh(), which re-fetches exactly the attributes read since the previous
+refresh and drops the others so they are fetched again on their next access.
+"""
+from .errors import AutoItXError
+from .handles import handle_title
+
+
+class ElementNotFound(AutoItXError):
+    """No window or control matches."""
+
+
+class _lazy(object):
+    """Attribute fetched on first access and cached in the owner's _values."""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.name = fetch.__name__
+        self.__doc__ = fetch.__doc__
+
+    def __get__(self, element, owner):
+        if element is None:
+            return self
+        element._read.add(self.name)
+        values = element._values
+        try:
+            return values[self.name]
+        except KeyError:
+            value = values[self.name] = self.fetch(element)
+            return value
+
+
+class _Element(object):
+    __slots__ = ("_autoit", "_handle", "_values", "_read")
+
+    def __init__(self, autoit):
+        self._autoit = autoit
+        self._handle = None
+        self._values = {}
+        self._read = set()
+
+    def refresh(self):
+        """Re-fetches the attributes read since the last refresh; the other cached attributes are dropped."""
+        cls = type(self)
+        read, self._read = self._read, set()
+        self._values = dict((name, getattr(cls, name).fetch(self)) for name in read)
+
+    def invalidate(self, *names):
+        """Drops cached attributes (all of them if no names are given) so they are fetched on their next access."""
+        if names:
+            for name in names:
+                self._values.pop(name, None)
+        else:
+            self._values.clear()
+
+
+class Window(_Element):
+    """A top-level window addressed by title and text."""
+    __slots__ = ("title", "text")
+
+    def __init__(self, autoit, title, text=""):
+        _Element.__init__(self, autoit)
+        self.title = title
+        self.text = text
+
+    def __repr__(self):
+        return "Window(%r, %r)" % (self.title, self.text)
+
+    @property
+    def handle(self):
+        """Window handle, resolved on first access.
+        :raises ElementNotFound: if no window matches
+        """
+        if self._handle is None:
+            handle = self._autoit.win_get_handle(self.title, self.text)
+            if not handle:
+                raise ElementNotFound("no window matches %r" % self.title)
+            self._handle = handle
+        return self._handle
+
+    @property
+    def target(self):
+        """Title addressing exactly this window, "[HANDLE:...]".
+        :rtype: str
+        """
+        return handle_title(self.handle)
+
+    def control(self, controlId):
+        """Control of this window.
+        :rtype: Control
+        """
+        return Control(self, controlId)
+
+    @_lazy
+    def window_title(self):
+        """Full title of the window."""
+        return self._autoit.win_get_title(self.target, "")
+
+    @_lazy
+    def window_text(self):
+        """Text of the window."""
+        return self._autoit.win_get_text(self.target, "")
+
+    @_lazy
+    def state(self):
+        """State bitmask as returned by win_get_state."""
+        return self._autoit.win_get_state(self.target, "")
+
+    @_lazy
+    def rect(self):
+        """Rect(x, y, width, height) of the window."""
+        return self._autoit.win_get_rect(self.target, "")
+
+    @property
+    def exists(self):
+        """Whether the window exists; False also for a window whose handle cannot be resolved."""
+        try:
+            return bool(self.state & 1)
+        except ElementNotFound:
+            return False
+
+    @property
+    def visible(self):
+        return bool(self.state & 2)
+
+    @property
+    def enabled(self):
+        return bool(self.state & 4)
+
+    @property
+    def active(self):
+        return bool(self.state & 8)
+
+    @property
+    def minimized(self):
+        return bool(self.state & 16)
+
+    @property
+    def maximized(self):
+        return bool(self.state & 32)
+
+    def activate(self):
+        self.invalidate("state")
+        return self._autoit.win_activate(self.target, "")
+
+    def close(self):
+        self.invalidate()
+        return self._autoit.win_close(self.target, "")
+
+
+class Control(_Element):
+    """A control of a Window, addressed through the window's handle."""
+    __slots__ = ("window", "controlId")
+
+    def __init__(self, window, controlId):
+        _Element.__init__(self, window._autoit)
+        self.window = window
+        self.controlId = controlId
+
+    def __repr__(self):
+        return "%r.control(%r)" % (self.window, self.controlId)
+
+    @property
+    def handle(self):
+        """Control handle, resolved on first access.
+        :raises ElementNotFound: if the control does not exist
+        """
+        if self._handle is None:
+            handle = self._autoit.control_get_handle(self.window.target, "", self.controlId)
+            if not handle:
+                raise ElementNotFound("%r has no control %r" % (self.window, self.controlId))
+            self._handle = handle
+        return self._handle
+
+    @property
+    def target(self):
+        """controlId addressing this control: "[HANDLE:...]" once its handle is resolved, so AutoIt does not
+        search the window's controls again, and the controlId given until then.
+        :rtype: str or int
+        """
+        return self.controlId if self._handle is None else handle_title(self._handle)
+
+    @_lazy
+    def text(self):
+        """Text of the control."""
+        return self._autoit.control_get_text(self.window.target, "", self.target)
+
+    @_lazy
+    def position(self):
+        """(x, y) position of the control relative to its window."""
+        return self._autoit.control_get_pos(self.window.target, "", self.target)
+
+    @_lazy
+    def size(self):
+        """(width, height) of the control."""
+        return self._autoit.control_get_size(self.window.target, "", self.target)
+
+    @_lazy
+    def rect(self):
+        """Rect(x, y, width, height) of the control relative to its window."""
+        return self._autoit.control_get_rect(self.window.target, "", self.target)
+
+    @_lazy
+    def visible(self):
+        return bool(self._autoit.control_command(self.window.target, "", self.target, "IsVisible", ""))
+
+    @_lazy
+    def enabled(self):
+        return bool(self._autoit.control_command(self.window.target, "", self.target, "IsEnabled", ""))
+
+    def click(self, button="left", clicks=1):
+        return self._autoit.control_click(self.window.target, "", self.target, button, clicks)
+
+    def focus(self):
+        return self._autoit.control_focus(self.window.target, "", self.target)
+
+    def set_text(self, newText):
+        self.invalidate("text")
+        return self._autoit.control_set_text(self.window.target, "", self.target, newText)
+
+    def send(self, string, flag=0):
+        self.invalidate("text")
+        return self._autoit.control_send(self.window.target, "", self.target, string, flag)
@@ -0,0 +1,35 @@
+from __future__ import absolute_import, division, print_function
+"""
+Calls per second of AutoItX3 wrapper methods with and without DISPID caching, measured against a counting fake
+IDispatch so the numbers show the Python-side cost of name resolution rather than the DLL's.
+
+    python -m benchmarks.bench_dispatch [calls]
+"""
+import sys
+import timeit
+from autoit.autoitx import AutoItX3
+from autoit.testing import CountingOleObject, FakeAutoItX, FakeDispatch
+
+
+def bench(cache_dispids, calls):
+    oleobj = CountingOleObject(FakeAutoItX())
+    autoit = AutoItX3(backend=FakeDispatch(oleobj), cache_dispids=cache_dispids)
+
+    def loop():
+        for _ in range(calls // 2):
+            autoit.control_get_text("Calculator", "", 150)
+            autoit.win_exists("Calculator", "")
+
+    elapsed = min(timeit.repeat(loop, number=1, repeat=5))
+    return calls / elapsed, oleobj.resolutions
+
+
+def main(argv):
+    calls = int(argv[1]) if len(argv) > 1 else 20000
+    for cache_dispids in (False, True):
+        rate, resolutions = bench(cache_dispids, calls)
+        print("cache_dispids=%-5s %10.0f calls/s  GetIDsOfNames: %d" % (cache_dispids, rate, resolutions))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
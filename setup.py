@@ -36,6 +36,17 @@ if __name__ == "__main__":
         #package_data={'autoit': ['bin/AutoItX3.dll']},
         #data_files=[('bin/AutoIt3X', # install where to install within python installation in this case c:\Python27\
         #             ['bin/AutoItX3.dll'])],
+        python_requires='>=3.7',
+        classifiers=[
+            'Operating System :: Microsoft :: Windows',
+            'Programming Language :: Python :: 3',
+            'Programming Language :: Python :: 3 :: Only',
+            'Programming Language :: Python :: 3.7',
+            'Programming Language :: Python :: 3.8',
+            'Programming Language :: Python :: 3.9',
+            'Programming Language :: Python :: 3.10',
+            'Programming Language :: Python :: 3.11',
+        ],
         install_requires=['pywin32'],
         tests_require=['pytest'],
         cmdclass={'test': PyTest}
@@ -0,0 +1,196 @@
+from __future__ import absolute_import, division, print_function
+import asyncio
+import sys
+import threading
+import weakref
+import pytest
+from autoit import aio
+from autoit.aio import AsyncAutoItX3, launch_async, wait_async
+from autoit.autoitx import AutoItX3
+from autoit.batch import CallResult
+from autoit.errors import ErrorFlagSet
+from autoit.launcher import EXITED, AutoItBackend, Launcher, SubprocessBackend
+from autoit.testing import FakeAutoItX
+from autoit.wait import control_text, statusbar_text, window_exists
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX().on("ControlGetText", "8")
+
+
+
+class TestAsyncAutoItX3(object):
+
+    def test_autoit_released_before_leaving_apartment(self, fake, monkeypatch):
+        instances, alive = [], []
+        monkeypatch.setattr(aio, "initialize_apartment", lambda: True)
+        monkeypatch.setattr(aio, "uninitialize_apartment", lambda: alive.extend(ref() for ref in instances))
+
+        def factory():
+            instance = AutoItX3(backend=fake)
+            instances.append(weakref.ref(instance))
+            return instance
+        autoit = AsyncAutoItX3()
+        autoit._factory = factory
+        assert run(autoit.control_get_text("Calculator", "", 150)) == "8"
+        autoit.close()
+        assert len(instances) == 1 and alive == [None]
+
+    def test_release_drops_owned_com_object(self, fake):
+        autoit = AutoItX3()
+        autoit._backend = fake
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        autoit._release()
+        assert autoit._backend is None and autoit._invoker is None
+
+    def test_methods_run_on_worker_thread(self, fake):
+        threads = []
+        fake.on("WinExists", lambda title, text: threads.append(threading.current_thread()) or 1)
+
+        async def main():
+            async with AsyncAutoItX3(backend=fake) as autoit:
+                assert await autoit.control_get_text("Calculator", "", 150) == "8"
+                assert await autoit.win_exists("Calculator", "") == 1
+                assert await autoit.get("error") == 0
+        run(main())
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_exceptions_propagate(self, fake):
+        fake.on("ClipGet", "", error=1)
+
+        async def main():
+            async with AsyncAutoItX3(backend=fake, checked=True) as autoit:
+                with pytest.raises(ErrorFlagSet):
+                    await autoit.clip_get()
+        run(main())
+
+    def test_timeout_skips_queued_calls(self, fake):
+        release = threading.Event()
+        fake.on("ProcessWait", lambda process, timeout: release.wait(5))
+
+        async def main():
+            autoit = AsyncAutoItX3(backend=fake)
+            blocked = asyncio.ensure_future(autoit.process_wait("calc.exe"))
+            await asyncio.sleep(0)
+            with pytest.raises(asyncio.TimeoutError):
+                await autoit.win_exists("Calculator", "", call_timeout=0.05)
+            release.set()
+            assert await blocked is True
+            await autoit.aclose()
+        run(main())
+        assert fake.count("WinExists") == 0
+
+    def test_batch_is_one_round_trip(self, fake):
+        async def main():
+            autoit = AsyncAutoItX3(backend=fake)
+            async with autoit.batch() as b:
+                b.control_set_text("Form", "", "Edit1", "john")
+                b.control_get_text("Form", "", "Edit1")
+            await autoit.aclose()
+            return b.results
+        assert run(main()) == [CallResult(1, 0), CallResult("8", 0)]
+
+    def test_batch_rejects_proxy_methods(self):
+        with pytest.raises(AttributeError):
+            AsyncAutoItX3(backend=FakeAutoItX()).batch().submit
+
+    def test_wait_async(self, fake):
+        calls = []
+        fake.on("WinExists", lambda title, text: calls.append(title) or len(calls) > 6)
+
+        async def main():
+            async with AsyncAutoItX3(backend=fake) as autoit:
+                ticks = []
+
+                async def ticker():
+                    while True:
+                        ticks.append(1)
+                        await asyncio.sleep(0.001)
+                task = asyncio.ensure_future(ticker())
+                result = await wait_async(autoit, [window_exists("Done"), control_text("Form", "", "Edit1", "9")],
+                                          timeout=5, interval=0.001, max_interval=0.002)
+                task.cancel()
+                return result, ticks
+        result, ticks = run(main())
+        assert result.first.condition.description == "window 'Done' exists"
+        assert result.first.value is True
+        # the event loop kept running other coroutines during the wait
+        assert ticks
+        assert fake.count("WinExists") == fake.count("ControlGetText") == 7
+
+    def test_wait_async_checked_probe_errors(self, fake):
+        fake.on("StatusBarGetText", "", error=1)
+
+        async def main():
+            async with AsyncAutoItX3(backend=fake, checked=True) as autoit:
+                return await wait_async(autoit, [statusbar_text("Setup", "Ready"), window_exists("Setup")],
+                                        timeout=5)
+        result = run(main())
+        assert result.first.condition.method == "win_exists"
+        assert fake.count("StatusBarGetText") + fake.count("WinExists") == result.probes
+
+    def test_wait_async_skips_error_reads(self):
+        class Fake(FakeAutoItX):
+            reads = 0
+
+            @property
+            def error(self):
+                Fake.reads += 1
+                return 0
+
+            @error.setter
+            def error(self, value):
+                pass
+        fake = Fake().on("WinExists", 1)
+
+        async def main():
+            async with AsyncAutoItX3(backend=fake) as autoit:
+                return await wait_async(autoit, [window_exists("Done")], timeout=5)
+        assert run(main())
+        assert fake.count("WinExists") == 1 and Fake.reads == 0
+
+    def test_launch_async(self):
+        launcher = Launcher(SubprocessBackend(), max_concurrency=2)
+        for code in [0, 2]:
+            launcher.add('"%s" -c "raise SystemExit(%d)"' % (sys.executable, code))
+
+        async def main():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0.001)
+            task = asyncio.ensure_future(ticker())
+            results = await launch_async(launcher)
+            task.cancel()
+            return results, ticks
+        results, ticks = run(main())
+        assert [(result.status, result.exit_code) for result in results] == [(EXITED, 0), (EXITED, 2)]
+        assert ticks
+
+    def test_launch_async_calls_backend_off_the_loop(self):
+        threads, alive = set(), {4000: 3, 4001: 2, 4002: float("inf")}
+
+        def exists(pid):
+            threads.add(threading.get_ident())
+            alive[pid] -= 1
+            return pid if alive[pid] > 0 else 0
+        pids = iter([4000, 4001, 4002])
+        fake = FakeAutoItX().on("Run", lambda command, workingDir, flag: threads.add(threading.get_ident())
+                                or next(pids)).on("ProcessExists", exists)
+        launcher = Launcher(AutoItBackend(AutoItX3(backend=fake), handles=False, interval=0.01), max_concurrency=2)
+        for command in ["a.exe", "b.exe", "c.exe"]:
+            launcher.add(command)
+
+        async def main():
+            return threading.get_ident(), await launch_async(launcher, timeout=0.5, wait=0.05)
+        loop_thread, results = run(main())
+        assert [result.status for result in results[:2]] == [EXITED, EXITED]
+        # c.exe runs for ever and is still running at the timeout
+        assert results[2] is None and not launcher.done
+        assert len(threads) == 1 and loop_thread not in threads
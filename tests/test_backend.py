@@ -0,0 +1,44 @@
+from __future__ import absolute_import, division, print_function
+import sys
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestBackend(object):
+
+    def test_import_does_not_bind_com(self):
+        assert "win32com.client" not in sys.modules or sys.platform == "win32"
+
+    def test_backend_is_not_shared(self):
+        assert AutoItX3(backend=FakeAutoItX())._aux3 is not AutoItX3(backend=FakeAutoItX())._aux3
+
+    def test_sw_constants_are_static(self):
+        assert AutoItX3.SW_HIDE == 0
+        assert AutoItX3.SW_SHOWNORMAL == 1
+        assert AutoItX3.SW_MAXIMIZE == AutoItX3.SW_SHOWMAXIMIZED == 3
+        assert AutoItX3.SW_SHOWDEFAULT == 10
+
+    def test_calls_are_forwarded(self, fake, autoit):
+        fake.on("ControlGetText", "8")
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert fake.calls == [("ControlGetText", ("Calculator", "", 150))]
+
+    def test_error_flag(self, fake, autoit):
+        fake.on("ClipGet", "", error=1)
+        assert autoit.clip_get() == ""
+        assert autoit.error == 1
+
+    def test_mouse_get_pos(self, fake, autoit):
+        fake.on("MouseGetPosX", 3).on("MouseGetPosY", 4)
+        assert autoit.mouse_get_pos() == (3, 4)
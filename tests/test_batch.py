@@ -0,0 +1,89 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.batch import CallResult, call_reader, execute_batch
+from autoit.errors import AutoItXError
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX().on("ControlGetText", "john").on("ControlClick", 0, error=1)
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestBatch(object):
+
+    def test_results_pair_value_and_error(self, fake, autoit):
+        with autoit.batch() as b:
+            assert b.control_set_text("Form", "", "Edit1", "john") == 0
+            b.control_click("Form", "", "Button1")
+            b.control_get_text("Form", "", "Edit1")
+            assert fake.calls == []
+        assert b.results == [CallResult(1, 0), CallResult(0, 1), CallResult("john", 0)]
+        assert [name for name, args in fake.calls] == ["ControlSetText", "ControlClick", "ControlGetText"]
+
+    def test_stop_on_error(self, fake, autoit):
+        with autoit.batch(stop_on_error=True) as b:
+            b.control_click("Form", "", "Button1")
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult(0, 1)]
+        assert fake.count("ControlGetText") == 0
+
+    def test_without_error_reads(self, fake, autoit):
+        reads = []
+        get = autoit._get
+        autoit._get = lambda name: reads.append(name) or get(name)
+        with autoit.batch(read_errors=False) as b:
+            b.control_click("Form", "", "Button1")
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult(0, None), CallResult("john", None)]
+        assert reads == []
+        with pytest.raises(ValueError):
+            autoit.batch(stop_on_error=True, read_errors=False)
+
+    def test_checked_rejections_are_recorded(self, fake):
+        checked = AutoItX3(backend=fake.on("ClipGet", "", error=1), checked=True)
+        with checked.batch() as b:
+            b.clip_get()
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult("", 1), CallResult("john", 0)]
+        with checked.batch(read_errors=False) as b:
+            b.clip_get()
+            b.control_click("Form", "", "Button1")
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult("", 1), CallResult(0, 1), CallResult("john", None)]
+
+    def test_call_reader_raises_for_checked_rejections(self, fake):
+        class Proxy(object):
+            def batch(self, read_errors=True):
+                return AutoItX3(backend=fake, checked=True).batch(read_errors=read_errors)
+        fake.on("ClipGet", "", error=1)
+        assert call_reader(Proxy())([("control_get_text", ("Form", "", "Edit1"))]) == ["john"]
+        with pytest.raises(AutoItXError):
+            call_reader(Proxy())([("clip_get", ()), ("control_get_text", ("Form", "", "Edit1"))])
+
+    def test_not_run_on_exception(self, fake, autoit):
+        with pytest.raises(KeyError):
+            with autoit.batch() as b:
+                b.control_click("Form", "", "Button1")
+                raise KeyError()
+        assert b.results is None
+        assert fake.calls == []
+
+    def test_unknown_method(self, autoit):
+        with pytest.raises(AttributeError):
+            autoit.batch().ControlClick
+        with pytest.raises(AttributeError):
+            autoit.batch().error
+
+    def test_executor(self, autoit):
+        other = AutoItX3(backend=FakeAutoItX())
+        with autoit.batch(executor=lambda calls, stop: execute_batch(other, calls, stop)) as b:
+            b.win_exists("Form", "")
+        assert b.results == [CallResult(1, 0)]
+        assert other._aux3.calls == [("WinExists", ("Form", ""))]
@@ -0,0 +1,149 @@
+from __future__ import absolute_import, division, print_function
+import random
+import pytest
+from autoit import capture
+from autoit.capture import Frame, SyntheticSource, adler_pixels, colour_matches, to_colorref
+
+
+@pytest.fixture
+def screen():
+    generator = random.Random(7)
+    rows = [[generator.choice([0x000000, 0xFFFFFF, 0x808080, 0x102030]) for x in range(40)] for y in range(30)]
+    return Frame.from_rows(rows, left=100, top=50)
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(capture, "numpy", None)
+    return request.param
+
+
+def reference_search(frame, left, top, right, bottom, colour, shadeVariation=0, step=1):
+    if right < left:
+        xs = range(min(left, frame.right), max(right, frame.left) - 1, -step)
+    else:
+        xs = range(max(left, frame.left), min(right, frame.right) + 1, step)
+    if bottom < top:
+        ys = range(min(top, frame.bottom), max(bottom, frame.top) - 1, -step)
+    else:
+        ys = range(max(top, frame.top), min(bottom, frame.bottom) + 1, step)
+    for x in xs:
+        for y in ys:
+            if colour_matches(frame.pixel_get_color(x, y), colour, shadeVariation):
+                return x, y
+    return None
+
+
+def reference_checksum(frame, left, top, right, bottom, step=1):
+    a, b = 1, 0
+    for y in range(top, bottom + 1, step):
+        for x in range(left, right + 1, step):
+            a = (a + to_colorref(frame.pixel_get_color(x, y))) % 65521
+            b = (b + a) % 65521
+    return (b << 16) | a
+
+
+
+class TestCapture(object):
+
+    def test_frame_layout(self, screen):
+        assert (screen.right, screen.bottom) == (139, 79)
+        assert screen.buffer.itemsize == 4 and len(screen.buffer) == 40 * 30
+        with pytest.raises(ValueError):
+            Frame(0, 0, 2, 2, [0, 0, 0])
+
+    def test_pixel_get_color(self):
+        frame = Frame.from_rows([[0x010203, 0x040506]], left=10, top=20)
+        assert frame.pixel_get_color(11, 20) == 0x040506
+        assert frame.pixel_get_color(12, 20) == -1
+        assert frame.pixel_get_color(10, 19) == -1
+
+    def test_search_scans_columns_first(self, backend):
+        frame = Frame.from_rows([[0, 0, 0, 5],
+                                 [0, 0, 5, 0],
+                                 [0, 5, 0, 0]])
+        assert frame.pixel_search(0, 0, 3, 2, 5) == (1, 2)
+
+    def test_search_not_found(self, backend, screen):
+        assert screen.pixel_search(100, 50, 139, 79, 0x123456) is None
+
+    @pytest.mark.parametrize("shadeVariation, step", [(0, 1), (0, 3), (16, 1), (40, 2), (200, 1)])
+    def test_search_matches_reference(self, backend, screen, shadeVariation, step):
+        for colour in (0xFFFFFF, 0x102030, 0x0F2A2A, 0x7A8888):
+            expected = reference_search(screen, 105, 55, 130, 75, colour, shadeVariation, step)
+            assert screen.pixel_search(105, 55, 130, 75, colour, shadeVariation, step) == expected
+
+    @pytest.mark.parametrize("step", [1, 3])
+    @pytest.mark.parametrize("rectangle", [(130, 55, 105, 75), (105, 75, 130, 55), (130, 75, 105, 55),
+                                           (139, 79, 100, 50), (160, 90, 90, 40)])
+    def test_reversed_search(self, backend, screen, rectangle, step):
+        for colour in (0xFFFFFF, 0x102030, 0x808080):
+            expected = reference_search(screen, *(rectangle + (colour, 0, step)))
+            assert expected is not None
+            assert screen.pixel_search(*(rectangle + (colour, 0, step))) == expected
+        expected = [screen.pixel_search(*(rectangle + (colour, 0, step))) for colour in (0xFFFFFF, 0x102030)]
+        assert screen.pixel_search_many([rectangle], [0xFFFFFF, 0x102030], step) == [expected]
+        hits = screen.iter_pixel_search([rectangle], [0xFFFFFF, 0x102030], step, band=2)
+        assert sorted((colour, (x, y)) for region, colour, x, y in hits) == list(enumerate(expected))
+
+    def test_reversed_search_order(self, backend):
+        frame = Frame.from_rows([[5, 0, 0, 0],
+                                 [0, 0, 5, 0],
+                                 [0, 5, 0, 5]])
+        assert frame.pixel_search(3, 0, 0, 2, 5) == (3, 2)
+        assert frame.pixel_search(0, 2, 3, 0, 5) == (0, 0)
+        assert frame.pixel_search(2, 2, 0, 0, 5) == (2, 1)
+        assert frame.pixel_checksum(3, 2, 0, 0) == frame.pixel_checksum(0, 0, 3, 2)
+
+    def test_search_clips_to_frame(self, backend):
+        frame = Frame.filled(10, 10, 3, 3, 0xFF)
+        assert frame.pixel_search(0, 0, 100, 100, 0xFF) == (10, 10)
+        assert frame.pixel_search(50, 50, 100, 100, 0xFF) is None
+
+    @pytest.mark.parametrize("step", [1, 2, 5])
+    def test_checksum_matches_reference(self, backend, screen, step):
+        assert screen.pixel_checksum(100, 50, 139, 79, step) == reference_checksum(screen, 100, 50, 139, 79, step)
+
+    def test_checksum_detects_change(self, backend, screen):
+        before = screen.pixel_checksum(100, 50, 139, 79)
+        screen.pixels[5] ^= 1
+        assert screen.pixel_checksum(100, 50, 139, 79) != before
+
+    @pytest.mark.parametrize("step", [1, 2])
+    def test_search_many_matches_single_searches(self, backend, screen, step):
+        regions = [(100, 50, 119, 79), (120, 50, 139, 79), (105, 60, 110, 62), (500, 500, 600, 600)]
+        colours = [0xFFFFFF, (0x102030, 0), (0x0F2A2A, 16), (0x7A8888, 200), 0x123456]
+        specs = [colour if isinstance(colour, tuple) else (colour, 0) for colour in colours]
+        expected = [[screen.pixel_search(*(region + spec), step=step) for spec in specs] for region in regions]
+        assert screen.pixel_search_many(regions, colours, step) == expected
+
+    def test_iter_search_streams_in_scan_order(self, backend):
+        frame = Frame.from_rows([[0, 0, 3, 0],
+                                 [0, 2, 0, 0],
+                                 [1, 0, 0, 1]])
+        hits = frame.iter_pixel_search([(0, 0, 3, 2), (2, 0, 3, 2)], [1, 2, 3, 4], band=1)
+        assert next(hits) == (0, 0, 0, 2)
+        assert list(hits) == [(0, 1, 1, 1), (0, 2, 2, 0), (1, 2, 2, 0), (1, 0, 3, 2)]
+
+    def test_adler_pixels(self):
+        assert adler_pixels([]) == 1
+        assert adler_pixels([1, 2]) == ((2 + 4) << 16) | 4
+
+    def test_crop(self, screen):
+        frame = screen.crop(110, 60, 112, 61)
+        assert (frame.left, frame.top, frame.width, frame.height) == (110, 60, 3, 2)
+        assert frame.pixel_get_color(112, 61) == screen.pixel_get_color(112, 61)
+
+    def test_synthetic_source(self, screen):
+        source = SyntheticSource(lambda: screen)
+        frame = capture.capture(120, 60, 129, 69, source=source)
+        assert (frame.width, frame.height, source.grabs) == (10, 10, 1)
+        assert frame.pixel_checksum(120, 60, 129, 69) == screen.pixel_checksum(120, 60, 129, 69)
+
+    def test_as_array(self, screen):
+        pytest.importorskip("numpy")
+        array = screen.as_array()
+        assert array.shape == (30, 40)
+        assert array[2, 3] == screen.pixel_get_color(103, 52)
@@ -0,0 +1,105 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.capture import Frame, SyntheticSource
+from autoit.change import ChangeDetector, changed_area, wait_for_region_change, wait_for_region_stable
+from autoit.snapshot import Rect
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def screen():
+    return Frame.filled(0, 0, 100, 60, 0xFFFFFF)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def paint(screen, x, y, colour=0x000000):
+    screen.pixels[y * screen.width + x] = colour
+
+
+
+class TestChangeDetector(object):
+
+    def test_tiles_cover_region(self):
+        detector = ChangeDetector(10, 20, 109, 69, tile=32)
+        assert len(detector.tiles) == 4 * 2
+        assert detector.tiles[0] == Rect(10, 20, 32, 32)
+        assert detector.tiles[-1] == Rect(106, 52, 4, 18)
+        assert sum(tile.width * tile.height for tile in detector.tiles) == 100 * 50
+
+    def test_first_poll_is_baseline(self, screen):
+        detector = ChangeDetector(0, 0, 99, 59, source=SyntheticSource(screen))
+        assert detector.poll() == frozenset()
+        assert detector.poll() == frozenset()
+
+    def test_reports_dirty_tiles(self, screen):
+        detector = ChangeDetector(0, 0, 99, 59, tile=20, source=SyntheticSource(screen))
+        detector.poll()
+        paint(screen, 45, 5)
+        paint(screen, 99, 59)
+        assert detector.poll() == frozenset([Rect(40, 0, 20, 20), Rect(80, 40, 20, 20)])
+        assert detector.poll() == frozenset()
+
+    def test_region_offset_in_screen(self, screen):
+        detector = ChangeDetector(30, 10, 69, 49, tile=(20, 40), source=SyntheticSource(screen))
+        detector.poll()
+        paint(screen, 29, 10)
+        assert detector.poll() == frozenset()
+        paint(screen, 50, 49)
+        assert detector.poll() == frozenset([Rect(50, 10, 20, 40)])
+
+    def test_changed_area(self):
+        assert changed_area([]) is None
+        assert changed_area([Rect(40, 0, 20, 20), Rect(80, 40, 20, 20)]) == Rect(40, 0, 60, 60)
+
+
+class TestWait(object):
+
+    def test_change_detected(self, screen, clock):
+        def current():
+            if clock.now > 1:
+                paint(screen, 3, 3)
+            return screen
+        dirty = wait_for_region_change(0, 0, 99, 59, timeout=5, source=SyntheticSource(current),
+                                       clock=clock, sleep=clock.sleep)
+        assert dirty == frozenset([Rect(0, 0, 32, 32)])
+        assert clock.sleeps[1] > clock.sleeps[0]
+        assert max(clock.sleeps) <= 0.5
+
+    def test_change_timeout(self, screen, clock):
+        dirty = wait_for_region_change(0, 0, 99, 59, timeout=2, source=SyntheticSource(screen),
+                                       clock=clock, sleep=clock.sleep)
+        assert dirty == frozenset()
+        assert clock.now == pytest.approx(2)
+
+    def test_stable(self, screen, clock):
+        def current():
+            if clock.now < 1:
+                paint(screen, 3, 3, int(clock.now * 1000))
+            return screen
+        assert wait_for_region_stable(0, 0, 99, 59, stable_for=0.5, timeout=5, source=SyntheticSource(current),
+                                      clock=clock, sleep=clock.sleep) == 1
+        assert 1.4 <= clock.now < 1.6
+
+    def test_stable_timeout(self, screen, clock):
+        def current():
+            paint(screen, 3, 3, int(clock.now * 1000))
+            return screen
+        assert wait_for_region_stable(0, 0, 99, 59, stable_for=0.5, timeout=2, source=SyntheticSource(current),
+                                      clock=clock, sleep=clock.sleep) == 0
+        assert clock.now == pytest.approx(2)
@@ -0,0 +1,61 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.dispatch import CachedInvoker
+from autoit.testing import CountingOleObject, FakeAutoItX, FakeDispatch
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX().on("ControlGetText", "8")
+
+@pytest.fixture
+def oleobj(fake):
+    return CountingOleObject(fake)
+
+
+
+class TestCachedInvoker(object):
+
+    def test_dynamic_resolves_every_call(self, oleobj):
+        autoit = AutoItX3(backend=FakeDispatch(oleobj))
+        for _ in range(3):
+            assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert oleobj.resolutions == 3
+
+    def test_cached_resolves_once(self, oleobj):
+        autoit = AutoItX3(backend=FakeDispatch(oleobj), cache_dispids=True)
+        for _ in range(3):
+            assert autoit.control_get_text("Calculator", "", 150) == "8"
+            assert autoit.win_exists("Calculator", "") == 1
+        assert oleobj.resolutions == 2
+        assert oleobj.invocations == 6
+        assert sorted(autoit._invoker.dispids) == ["ControlGetText", "WinExists"]
+
+    def test_cached_property(self, fake, oleobj):
+        autoit = AutoItX3(backend=FakeDispatch(oleobj), cache_dispids=True)
+        fake.error = 1
+        assert autoit.error == 1
+        fake.error = 0
+        assert autoit.error == 0
+        assert oleobj.resolutions == 1
+
+    def test_unresolvable_member_uses_dynamic_path(self):
+        class Dispatch(object):
+            class _oleobj_(object):
+                @staticmethod
+                def GetIDsOfNames(name):
+                    raise LookupError(name)
+
+            def WinExists(self, title, text):
+                return 1
+
+        invoker = CachedInvoker(Dispatch())
+        assert invoker.call("WinExists", ("Calculator", "")) == 1
+        assert invoker.dispids == {}
+
+    def test_plain_backend_caches_bound_methods(self, fake):
+        autoit = AutoItX3(backend=fake, cache_dispids=True)
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert fake.count("ControlGetText") == 2
@@ -0,0 +1,62 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.errors import ERROR_SEMANTICS, ErrorFlagSet, FailureReturned, WaitTimedOut
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake, checked=True)
+
+
+
+class TestErrorSemantics(object):
+
+    @pytest.mark.parametrize("method", sorted(ERROR_SEMANTICS))
+    def test_table_names_the_called_member(self, method, fake):
+        wrapper = getattr(AutoItX3(backend=fake), method)
+        argcount = wrapper.__code__.co_argcount - 1 - len(wrapper.__defaults__ or ())
+        wrapper(*range(argcount))
+        assert [name for name, args in fake.calls] == [ERROR_SEMANTICS[method].member]
+
+    def test_error_flag_raises(self, fake, autoit):
+        fake.on("ClipGet", "", error=1)
+        with pytest.raises(ErrorFlagSet) as info:
+            autoit.clip_get()
+        assert info.value.method == "clip_get"
+        assert info.value.error == 1
+
+    def test_sentinel_raises_without_reading_error(self, fake, autoit):
+        reads = []
+        get = autoit._get
+        autoit._get = lambda name: reads.append(name) or get(name)
+        fake.on("ControlClick", 0)
+        with pytest.raises(FailureReturned):
+            autoit.control_click("Calculator", "", 135)
+        fake.on("PixelGetColor", -1)
+        with pytest.raises(FailureReturned):
+            autoit.pixel_get_color(0, 0)
+        assert reads == []
+
+    def test_timeout(self, fake, autoit):
+        fake.on("ProcessWait", 0)
+        with pytest.raises(WaitTimedOut):
+            autoit.process_wait("calc.exe", 1)
+
+    def test_always_succeeds_is_not_checked(self, fake, autoit):
+        fake.on("WinExists", 0, error=1)
+        assert autoit.win_exists("Calculator", "") == 0
+
+    def test_success_passes_through(self, fake, autoit):
+        fake.on("ControlGetText", "8")
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert autoit.control_click("Calculator", "", 135) == 1
+
+    def test_unchecked_does_not_raise(self, fake):
+        fake.on("ClipGet", "", error=1)
+        assert AutoItX3(backend=fake).clip_get() == ""
@@ -0,0 +1,142 @@
+from __future__ import absolute_import, division, print_function
+import threading
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.errors import ErrorFlagSet
+from autoit.handles import HandleCache, is_cacheable
+from autoit.testing import FakeAutoItX
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def windows():
+    return {"Calculator": "0x0001", "Notepad": "0x0002"}
+
+@pytest.fixture
+def fake(windows):
+    return (FakeAutoItX()
+            .on("WinGetHandle", lambda title, text: windows.get(title, ""))
+            .on("WinExists", lambda title, text: int(title[len("[HANDLE:"):-1] in windows.values())))
+
+@pytest.fixture
+def cache(clock):
+    return HandleCache(ttl=10, maxsize=2, clock=clock)
+
+@pytest.fixture
+def autoit(fake, cache):
+    return AutoItX3(backend=fake, handle_cache=cache)
+
+
+
+class TestHandleCache(object):
+
+    def test_resolves_once(self, fake, autoit):
+        autoit.control_click("Calculator", "", 135)
+        autoit.control_click("Calculator", "", 93)
+        assert fake.calls == [("WinGetHandle", ("Calculator", "")),
+                              ("ControlClick", ("[HANDLE:0x0001]", "", 135, "left", 1, AutoItX3.LOWEST_INT,
+                                                AutoItX3.LOWEST_INT)),
+                              ("ControlClick", ("[HANDLE:0x0001]", "", 93, "left", 1, AutoItX3.LOWEST_INT,
+                                                AutoItX3.LOWEST_INT))]
+
+    def test_unknown_window_is_passed_through(self, fake, autoit):
+        autoit.control_get_text("Paint", "", 1)
+        assert fake.calls[-1] == ("ControlGetText", ("Paint", "", 1))
+        assert autoit.handle_cache.stats().size == 0
+
+    def test_dynamic_titles_are_not_cached(self, fake, autoit):
+        autoit.win_activate("[ACTIVE]")
+        autoit.control_focus("", "", 1)
+        assert fake.count("WinGetHandle") == 0
+        assert not is_cacheable(12)
+        assert not is_cacheable("[HANDLE:0x0001]")
+
+    def test_revalidated_after_ttl(self, fake, autoit, clock, windows):
+        autoit.control_click("Calculator", "", 135)
+        clock.now = 11
+        autoit.control_click("Calculator", "", 135)
+        assert fake.count("WinExists") == 1
+        assert fake.count("WinGetHandle") == 1
+        windows["Calculator"] = "0x0003"
+        clock.now = 22
+        autoit.control_click("Calculator", "", 135)
+        assert fake.calls[-1][1][0] == "[HANDLE:0x0003]"
+        assert fake.count("WinGetHandle") == 2
+
+    def test_lru_bound(self, fake, autoit, windows):
+        windows["Paint"] = "0x0004"
+        for title in ("Calculator", "Notepad", "Calculator", "Paint"):
+            autoit.win_active(title)
+        assert autoit.handle_cache.stats().size == 2
+        autoit.win_active("Calculator")
+        autoit.win_active("Notepad")
+        assert fake.count("WinGetHandle") == 4
+
+    def test_evict_and_options(self, fake, autoit):
+        autoit.win_active("Calculator")
+        autoit.handle_cache.evict("Calculator")
+        autoit.win_active("Calculator")
+        autoit.auto_it_set_option("WinTitleMatchMode", 2)
+        autoit.win_active("Calculator")
+        assert fake.count("WinGetHandle") == 3
+
+    @pytest.mark.parametrize("method", ["win_close", "win_kill"])
+    def test_closing_evicts(self, fake, autoit, method):
+        autoit.win_active("Calculator")
+        getattr(autoit, method)("Calculator")
+        assert fake.calls[-1][1][0] == "[HANDLE:0x0001]"
+        assert autoit.handle_cache.stats().size == 0
+
+    def test_failed_call_on_closed_window_is_repeated(self, fake, autoit, windows):
+        fake.on("ControlGetText", lambda title, text, controlId: "8" if title == "[HANDLE:0x0003]" else "", error=1)
+        autoit.win_active("Calculator")
+        # the window is replaced within the ttl
+        windows["Calculator"] = "0x0003"
+        assert autoit.control_get_text("Calculator", "", 150) == "8"
+        assert [name for name, args in fake.calls[2:]] == ["ControlGetText", "WinExists", "WinGetHandle",
+                                                           "ControlGetText"]
+
+    def test_failed_call_on_live_window_keeps_error(self, fake, autoit):
+        fake.on("ControlGetText", "", error=1)
+        assert autoit.control_get_text("Calculator", "", 150) == ""
+        assert fake.count("WinExists") == 1
+        # the flag was read before WinExists reset it
+        assert autoit.error == 1
+        fake.on("ControlGetText", "")
+        assert autoit.control_get_text("Calculator", "", 150) == "" and autoit.error == 0
+        assert fake.count("WinExists") == 1
+
+    def test_checked_failure_on_closed_window(self, fake, cache, windows):
+        autoit = AutoItX3(backend=fake, handle_cache=cache, checked=True)
+        fake.on("ControlGetText", "", error=1)
+        autoit.win_active("Calculator")
+        windows.pop("Calculator")
+        with pytest.raises(ErrorFlagSet):
+            autoit.control_get_text("Calculator", "", 150)
+        assert fake.calls[-1] == ("ControlGetText", ("Calculator", "", 150))
+        assert cache.stats().size == 0
+
+    def test_counters_are_consistent_across_threads(self, fake, cache):
+        autoit = AutoItX3(backend=fake, handle_cache=cache)
+
+        def resolve():
+            for _ in range(500):
+                cache.resolve(autoit._raw_call, "Calculator", "")
+        threads = [threading.Thread(target=resolve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats.hits + stats.misses == 2000
@@ -0,0 +1,79 @@
+from __future__ import absolute_import, division, print_function
+import random
+import pytest
+from autoit import capture
+from autoit.capture import Frame
+from autoit.image import Match, check_order, find_image
+
+
+@pytest.fixture
+def screen():
+    generator = random.Random(3)
+    rows = [[generator.choice([0x000000, 0xFFFFFF, 0x808080]) for x in range(60)] for y in range(40)]
+    return Frame.from_rows(rows, left=200, top=100)
+
+@pytest.fixture
+def icon():
+    return Frame.from_rows([[0xFF0000, 0x00FF00, 0xFF0000],
+                            [0x0000FF, 0x123456, 0x0000FF],
+                            [0xFF0000, 0x00FF00, 0xFF0000]])
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(capture, "numpy", None)
+    return request.param
+
+
+def stamp(screen, template, x, y, shift=0):
+    for dy in range(template.height):
+        for dx in range(template.width):
+            value = template.pixels[dy * template.width + dx]
+            screen.pixels[(y + dy) * screen.width + x + dx] = value + shift if value & 0xFF < 0xF0 else value - shift
+
+
+
+class TestFindImage(object):
+
+    def test_check_order(self, icon):
+        order = check_order(icon)
+        assert order[0] == (1, 1, 0x123456)
+        assert [pixel[2] for pixel in order[-4:]] == [0xFF0000] * 4
+        assert check_order(icon, step=2)[:4] == [(0, 0, 0xFF0000), (0, 2, 0xFF0000), (2, 0, 0xFF0000),
+                                                 (2, 2, 0xFF0000)]
+
+    def test_not_found(self, backend, screen, icon):
+        result = find_image(screen, icon)
+        assert not result and result.best is None and result.matches == []
+
+    @pytest.mark.parametrize("step", [1, 2])
+    def test_exact(self, backend, screen, icon, step):
+        stamp(screen, icon, 20, 30)
+        result = find_image(screen, icon, step=step)
+        assert result.matches == [Match(220, 130, 0)]
+        assert result.candidates >= 1 and result.elapsed >= 0
+
+    def test_first_exact_or_all(self, backend, screen, icon):
+        stamp(screen, icon, 40, 5)
+        stamp(screen, icon, 0, 37)
+        assert find_image(screen, icon).matches == [Match(240, 105, 0)]
+        assert find_image(screen, icon, find_all=True).matches == [Match(240, 105, 0), Match(200, 137, 0)]
+
+    def test_tolerance(self, backend, screen, icon):
+        stamp(screen, icon, 10, 10, shift=6)
+        stamp(screen, icon, 30, 20, shift=2)
+        assert not find_image(screen, icon, tolerance=1)
+        result = find_image(screen, icon, tolerance=8)
+        assert result.matches == [Match(210, 110, 6), Match(230, 120, 2)]
+        assert result.best == Match(230, 120, 2)
+
+    def test_region_and_rows(self, backend, screen, icon):
+        stamp(screen, icon, 10, 10)
+        rows = [list(icon.pixels[row * 3:row * 3 + 3]) for row in range(3)]
+        assert find_image(screen, rows, region=(205, 105, 220, 120)).best == Match(210, 110, 0)
+        assert not find_image(screen, rows, region=(211, 105, 260, 139))
+
+    def test_template_larger_than_frame(self, backend, icon):
+        assert find_image(Frame.filled(0, 0, 2, 2), icon).candidates == 0
@@ -0,0 +1,173 @@
+from __future__ import absolute_import, division, print_function
+import os
+import pytest
+from autoit.ini import IniFile
+
+CONTENT = (
+    "; settings\r\n"
+    "[Server]\r\n"
+    "Host = example.org \r\n"
+    "Port=8080\r\n"
+    "port=9999\r\n"
+    "Name=\"quoted value\"\r\n"
+    "\r\n"
+    "[Empty]\r\n"
+    "\r\n"
+    "[server]\r\n"
+    "Host=ignored\r\n"
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "app.ini"
+    path.write_bytes(CONTENT.encode("utf-8"))
+    return str(path)
+
+
+
+class TestRead(object):
+    def test_values(self, path):
+        ini = IniFile(path)
+        assert ini.read("Server", "Host", "") == "example.org"
+        assert ini.read("SERVER", "port", "") == "8080"
+        assert ini.read("Server", "Name", "") == "quoted value"
+        assert ini.read("Server", "Missing", "default") == "default"
+        assert ini.read("Missing", "Host", "default") == "default"
+
+    def test_missing_file(self, tmp_path):
+        ini = IniFile(str(tmp_path / "missing.ini"))
+        assert ini.read("Server", "Host", "default") == "default"
+        assert ini.read_section("Server") == []
+        assert ini.delete("Server") == 0
+
+    def test_read_section(self, path):
+        ini = IniFile(path)
+        assert ini.read_section("server") == [("Host", "example.org"), ("Port", "8080"), ("Name", "quoted value")]
+        assert ini.read_section("Empty") == []
+        assert ini.section_names() == ["Server", "Empty", "server"]
+
+    def test_parsed_once(self, path):
+        ini = IniFile(path)
+        for _ in range(10):
+            ini.read("Server", "Host", "")
+            ini.read_section("Server")
+        assert ini.parses == 1
+
+    def test_reparsed_after_change(self, path):
+        ini = IniFile(path)
+        assert ini.read("Server", "Port", "") == "8080"
+        with open(path, "ab") as f:
+            f.write(b"[New]\r\nKey=1\r\n")
+        assert ini.read("New", "Key", "") == "1"
+        assert ini.parses == 2
+
+    def test_utf16(self, tmp_path):
+        path = tmp_path / "wide.ini"
+        path.write_bytes(u"[S]\r\nKey=été\r\n".encode("utf-16"))
+        ini = IniFile(str(path))
+        assert ini.read("S", "Key", "") == u"été"
+        ini.write("S", "Other", u"ü")
+        ini.flush()
+        assert path.read_bytes().decode("utf-16") == u"[S]\r\nKey=été\r\nOther=ü\r\n"
+
+
+class TestWrite(object):
+    def test_buffered_until_flush(self, path):
+        ini = IniFile(path)
+        assert ini.write("Server", "Port", 9090) == 1
+        assert ini.read("Server", "Port", "") == "9090"
+        assert ini.dirty
+        assert IniFile(path).read("Server", "Port", "") == "8080"
+        assert ini.flush()
+        assert not ini.dirty
+        assert not ini.flush()
+        assert IniFile(path).read("Server", "Port", "") == "9090"
+
+    def test_layout_kept(self, path):
+        ini = IniFile(path)
+        ini.write("Server", "Port", "1")
+        ini.write("Server", "Timeout", "30")
+        ini.write("Other", "Key", "value")
+        ini.flush()
+        with open(path, "rb") as f:
+            assert f.read().decode("utf-8") == (
+                "; settings\r\n"
+                "[Server]\r\n"
+                "Host = example.org \r\n"
+                "Port=1\r\n"
+                "port=9999\r\n"
+                "Name=\"quoted value\"\r\n"
+                "Timeout=30\r\n"
+                "\r\n"
+                "[Empty]\r\n"
+                "\r\n"
+                "[server]\r\n"
+                "Host=ignored\r\n"
+                "\r\n"
+                "[Other]\r\n"
+                "Key=value\r\n"
+            )
+        assert ini.parses == 1
+
+    def test_creates_file(self, tmp_path):
+        path = str(tmp_path / "new.ini")
+        with IniFile(path) as ini:
+            ini.write("S", "Key", "value")
+        with open(path, "rb") as f:
+            assert f.read() == b"[S]\r\nKey=value\r\n"
+        assert [name for name in os.listdir(str(tmp_path))] == ["new.ini"]
+
+    def test_appended_sections_separated(self, tmp_path):
+        path = str(tmp_path / "new.ini")
+        with IniFile(path) as ini:
+            ini.write("A", "Key", "1")
+            ini.write("B", "Key", "2")
+            ini.write("A", "Other", "3")
+        with open(path, "rb") as f:
+            assert f.read() == b"[A]\r\nKey=1\r\nOther=3\r\n\r\n[B]\r\nKey=2\r\n"
+
+    @pytest.mark.parametrize("section, key, value", [("S", "Key", "1\r\n[Injected]"), ("S", "Key", "a\nB=2"),
+                                                     ("S", "Key\n", "1"), ("S]\r\n[T", "Key", "1")])
+    def test_line_breaks_rejected(self, path, section, key, value):
+        ini = IniFile(path)
+        with pytest.raises(ValueError):
+            ini.write(section, key, value)
+        assert not ini.dirty
+
+    def test_not_flushed_on_exception(self, path):
+        with pytest.raises(RuntimeError):
+            with IniFile(path) as ini:
+                ini.write("Server", "Port", "1")
+                raise RuntimeError
+        assert IniFile(path).read("Server", "Port", "") == "8080"
+
+    def test_concurrent_change_merged(self, path):
+        ini = IniFile(path)
+        ini.write("Server", "Port", "1")
+        other = IniFile(path)
+        other.write("Server", "Host", "other.org")
+        other.flush()
+        ini.flush()
+        check = IniFile(path)
+        assert check.read("Server", "Port", "") == "1"
+        assert check.read("Server", "Host", "") == "other.org"
+
+
+class TestDelete(object):
+    def test_key(self, path):
+        ini = IniFile(path)
+        assert ini.delete("Server", "Port") == 1
+        # the first occurrence is removed, the duplicate becomes visible like after IniDelete
+        assert ini.read("Server", "Port", "") == "9999"
+        assert ini.delete("Server", "Missing") == 1
+        ini.flush()
+        assert IniFile(path).read("Server", "Port", "") == "9999"
+
+    def test_section(self, path):
+        ini = IniFile(path)
+        assert ini.delete("Server") == 1
+        assert ini.read("Server", "Host", "") == "ignored"
+        ini.flush()
+        with open(path, "rb") as f:
+            assert f.read().decode("utf-8") == "; settings\r\n[Empty]\r\n\r\n[server]\r\nHost=ignored\r\n"
@@ -0,0 +1,97 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.keys import KeySyntaxError, KeyToken, compile_keys, escape_keys, parse_keys
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestParse(object):
+
+    def test_tokens(self):
+        assert parse_keys("^a{DEL}+{TAB 3}!{F4}{SHIFTDOWN}{NUMLOCK toggle}{ASC 065}") == (
+            KeyToken("a", "^", 1, None), KeyToken("DEL", "", 1, None), KeyToken("TAB", "+", 3, None),
+            KeyToken("F4", "!", 1, None), KeyToken("SHIFTDOWN", "", 1, None), KeyToken("NUMLOCK", "", 1, "toggle"),
+            KeyToken("ASC", "", 1, "065"))
+
+    def test_literal_braces(self):
+        assert [token.key for token in parse_keys("{+}{^}{!}{#}{{}{}}")] == list("+^!#{}")
+        assert parse_keys("{a 4}") == (KeyToken("a", "", 4, None),)
+
+    def test_names_are_case_insensitive(self):
+        assert parse_keys("{enter}{Tab 2}") == (KeyToken("ENTER", "", 1, None), KeyToken("TAB", "", 2, None))
+
+    @pytest.mark.parametrize("keys, position", [("ab{ENTER", 2), ("{}", 0), ("{NOPE}", 0), ("x{TAB lots}", 1),
+                                                ("{ASC}", 0), ("^^a", 1), ("abc+", 4)])
+    def test_malformed(self, keys, position):
+        with pytest.raises(KeySyntaxError) as info:
+            parse_keys(keys)
+        assert info.value.position == position
+
+    def test_raw(self):
+        assert [token.key for token in parse_keys("^{a}", flag=1)] == list("^{a}")
+        with pytest.raises(ValueError):
+            parse_keys("a", flag=2)
+
+    def test_escape_round_trip(self):
+        text = "1+1=2 {really}! #^"
+        assert "".join(token.key for token in parse_keys(escape_keys(text))) == text
+
+
+class TestSequence(object):
+
+    def test_cached(self):
+        assert compile_keys("^a{DEL}") is compile_keys("^a{DEL}")
+        assert compile_keys("^a{DEL}", 1) is not compile_keys("^a{DEL}")
+
+    def test_keystrokes_and_estimate(self):
+        sequence = compile_keys("^a{DEL}Hello{TAB 3}{ENTER}")
+        assert sequence.keystrokes == 11
+        assert sequence.estimate(5, 5) == pytest.approx(12 * 0.01)
+        assert sequence.estimate(0, 0) == 0
+
+    def test_chunks(self):
+        sequence = compile_keys("^a{DEL}Hello{TAB 3}{ENTER}")
+        assert sequence.chunks(5) == ["^a{DEL}Hel", "lo{TAB 3}", "{ENTER}"]
+        assert sequence.chunks(100) == ["^a{DEL}Hello{TAB 3}{ENTER}"]
+
+    def test_chunks_split_repeats_and_keep_escapes(self):
+        assert compile_keys("{TAB 7}").chunks(3) == ["{TAB 3}", "{TAB 3}", "{TAB}"]
+        assert compile_keys("{+}{{}").chunks(1) == ["{+}", "{{}"]
+        assert compile_keys("{+}ab", 1).chunks(2) == ["{+", "}a", "b"]
+
+
+class TestAutoItX3(object):
+
+    def test_send_keys_validates_before_sending(self, fake, autoit):
+        with pytest.raises(KeySyntaxError):
+            autoit.send_keys("abc{ENTER")
+        assert fake.calls == []
+
+    def test_send_keys_chunked(self, fake, autoit):
+        assert autoit.send_keys("{TAB 5}x", chunk=2) == 1
+        assert fake.calls == [("Send", ("{TAB 2}", 0)), ("Send", ("{TAB 2}", 0)), ("Send", ("{TAB}x", 0))]
+
+    def test_control_send_keys_stops_on_failure(self, fake, autoit):
+        sent = []
+        fake.on("ControlSend", lambda title, text, controlId, string, flag: sent.append(string) or len(sent) < 2)
+        assert autoit.control_send_keys("Form", "", "Edit1", "abcdef", chunk=2) == 0
+        assert sent == ["ab", "cd"]
+        fake.on("ControlSend", 1)
+        assert autoit.control_send_keys("Form", "", "Edit1", "abcdef", chunk=2) == 1
+
+    def test_send_estimate_follows_options(self, autoit):
+        assert autoit.send_estimate("abc") == pytest.approx(0.03)
+        autoit.auto_it_set_option("SendKeyDelay", 20)
+        autoit.auto_it_set_option("SendKeyDownDelay", 0)
+        assert autoit.options == {"sendkeydelay": 20, "sendkeydowndelay": 0}
+        assert autoit.send_estimate("+a{TAB 2}") == pytest.approx(0.08)
@@ -0,0 +1,171 @@
+from __future__ import absolute_import, division, print_function
+import sys
+import time
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.launcher import CANCELLED, EXITED, FAILED, TIMED_OUT, AutoItBackend, Launcher, SubprocessBackend
+from autoit.testing import FakeAutoItX
+
+
+class FakeBackend(object):
+    """Programs named "<name>:<seconds>" exiting with code <seconds> after that many seconds of a fake clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.running = {}
+        self.peak = 0
+        self.waits = []
+        self.terminated = []
+        self.closed = []
+        self.pids = 1000
+
+    def clock(self):
+        return self.now
+
+    def start(self, command, workingDir="", flag=1):
+        if command.startswith("missing"):
+            return None, 0
+        self.pids += 1
+        self.running[command] = self.now + float(command.split(":")[1])
+        self.peak = max(self.peak, len(self.running))
+        return command, self.pids
+
+    def wait(self, tokens, timeout):
+        self.waits.append(list(tokens))
+        ends = [self.running[token] for token in tokens]
+        self.now = max(self.now, min(min(ends), self.now + timeout))
+        return dict((token, int(float(token.split(":")[1]))) for token in tokens if self.running[token] <= self.now)
+
+    def terminate(self, token):
+        self.terminated.append(token)
+
+    def close(self, token):
+        self.closed.append(token)
+        del self.running[token]
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend()
+
+@pytest.fixture
+def launcher(backend):
+    return Launcher(backend, max_concurrency=2, clock=backend.clock)
+
+
+
+class TestLauncher(object):
+
+    def test_concurrency_limit_and_results(self, launcher, backend):
+        for command in ["a:3", "b:1", "c:1", "d:5"]:
+            launcher.add(command)
+        results = launcher.run()
+        assert [(result.name, result.status, result.exit_code) for result in results] == [
+            ("a:3", EXITED, 3), ("b:1", EXITED, 1), ("c:1", EXITED, 1), ("d:5", EXITED, 5)]
+        assert backend.peak == 2
+        assert [result.started for result in results] == [0.0, 0.0, 1.0, 2.0]
+        assert [result.elapsed for result in results] == [3.0, 1.0, 1.0, 5.0]
+        # one shared wait over all running jobs per step
+        assert all(len(tokens) <= 2 for tokens in backend.waits)
+        assert backend.now == 7.0
+
+    def test_as_completed_order(self, launcher):
+        for command in ["slow:4", "fast:1"]:
+            launcher.add(command)
+        assert [result.name for result in launcher.as_completed()] == ["fast:1", "slow:4"]
+
+    def test_failed_start(self, launcher):
+        launcher.add("missing.exe", name="missing")
+        launcher.add("a:1")
+        assert [(result.name, result.status, result.pid) for result in launcher.run()][0] == ("missing", FAILED, 0)
+
+    def test_job_timeout(self, launcher, backend):
+        launcher.add("hang:100", timeout=10)
+        launcher.add("a:1")
+        results = launcher.run()
+        assert results[0].status == TIMED_OUT and results[0].exit_code is None
+        assert results[0].elapsed == 10.0
+        assert backend.terminated == ["hang:100"]
+        assert results[1].status == EXITED
+
+    def test_run_timeout_cancels_queued(self, backend):
+        launcher = Launcher(backend, max_concurrency=1, clock=backend.clock)
+        for command in ["a:2", "b:2", "c:2"]:
+            launcher.add(command)
+        results = launcher.run(timeout=3)
+        assert [result.status for result in results[:1]] == [EXITED]
+        assert results[1] is None
+        assert results[2].status == CANCELLED
+
+    def test_max_concurrency(self):
+        with pytest.raises(ValueError):
+            Launcher(FakeBackend(), max_concurrency=0)
+
+
+class TestSubprocessBackend(object):
+
+    def test_runs_processes_concurrently(self, tmp_path):
+        launcher = Launcher(SubprocessBackend(), max_concurrency=3)
+        for code in [0, 3, 0]:
+            launcher.add('"%s" -c "import time; time.sleep(0.3); raise SystemExit(%d)"' % (sys.executable, code),
+                         workingDir=str(tmp_path))
+        started = time.time()
+        results = launcher.run()
+        assert time.time() - started < 0.85
+        assert [(result.status, result.exit_code) for result in results] == [(EXITED, 0), (EXITED, 3), (EXITED, 0)]
+        assert all(result.pid for result in results)
+
+    def test_missing_program(self):
+        launcher = Launcher(SubprocessBackend())
+        launcher.add("/nonexistent/program")
+        assert launcher.run()[0].status == FAILED
+
+    def test_timeout_kills(self):
+        launcher = Launcher(SubprocessBackend())
+        launcher.add('"%s" -c "import time; time.sleep(30)"' % sys.executable, timeout=0.2)
+        result = launcher.run()[0]
+        assert result.status == TIMED_OUT and result.elapsed < 5
+
+
+class TestAutoItBackend(object):
+
+    def test_polls_process_exists(self):
+        fake = FakeAutoItX()
+        pids = iter([4000, 4001])
+        alive = {4000: 3, 4001: 1}
+
+        def exists(pid):
+            alive[pid] -= 1
+            return pid if alive[pid] > 0 else 0
+        fake.on("Run", lambda command, workingDir, flag: next(pids))
+        fake.on("ProcessExists", exists)
+        backend = AutoItBackend(AutoItX3(backend=fake), handles=False, sleep=lambda seconds: None)
+        launcher = Launcher(backend)
+        launcher.add("setup.exe /quiet", "C:\\Temp", 0)
+        launcher.add("other.exe")
+        results = launcher.run()
+        assert [(result.pid, result.status, result.exit_code) for result in results] == [(4000, EXITED, None),
+                                                                                          (4001, EXITED, None)]
+        assert fake.calls[0] == ("Run", ("setup.exe /quiet", "C:\\Temp", 0))
+
+    def test_run_failure(self):
+        fake = FakeAutoItX().on("Run", 0, error=1)
+        launcher = Launcher(AutoItBackend(AutoItX3(backend=fake), handles=False))
+        launcher.add("missing.exe")
+        assert [result[:5] for result in launcher.run()] == [("missing.exe", "missing.exe", 0, FAILED, None)]
+
+    def test_run_failure_checked(self):
+        fake = FakeAutoItX().on("Run", 0, error=1)
+        launcher = AutoItX3(backend=fake, checked=True).run_many()
+        launcher.add("missing.exe")
+        launcher.add("other.exe")
+        results = launcher.run()
+        assert [(result.command, result.status) for result in results] == [("missing.exe", FAILED),
+                                                                          ("other.exe", FAILED)]
+        assert launcher.done
+
+    def test_autoit_run_many(self):
+        fake = FakeAutoItX().on("Run", 0, error=1)
+        launcher = AutoItX3(backend=fake).run_many(max_concurrency=3)
+        assert launcher.max_concurrency == 3 and isinstance(launcher.backend, AutoItBackend)
+        assert not launcher.backend.handles
@@ -0,0 +1,93 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.listview import ListViewCache, iter_list_view_rows
+from autoit.server import AutoItClient, AutoItServer
+from autoit.testing import FakeAutoItX
+
+
+class FakeListView(object):
+
+    def __init__(self, rows, columns):
+        self.grid = [["r%dc%d" % (row, column) for column in range(columns)] for row in range(rows)]
+
+    def __call__(self, title, text, controlId, command, option1="", option2=""):
+        if command == "GetItemCount":
+            return str(len(self.grid))
+        if command == "GetSubItemCount":
+            return str(len(self.grid[0]))
+        if command == "GetText":
+            return self.grid[option1][option2]
+        return 0
+
+
+@pytest.fixture
+def listview():
+    return FakeListView(25, 4)
+
+@pytest.fixture
+def fake(listview):
+    return (FakeAutoItX()
+            .on("WinGetHandle", lambda title, text: "0x00A1" if title == "Results" else "")
+            .on("ControlListView", listview))
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestListView(object):
+
+    def test_all_rows(self, fake, autoit, listview):
+        rows = list(autoit.iter_list_view_rows("Results", "", "SysListView321", page_size=10))
+        assert rows == [tuple(row) for row in listview.grid]
+        assert all(args[0] == "[HANDLE:0x00A1]" for name, args in fake.calls[1:])
+
+    def test_projection_and_range(self, fake, autoit):
+        rows = list(autoit.iter_list_view_rows("Results", "", "SysListView321", columns=(3, 1), start=5, stop=8))
+        assert rows == [("r5c3", "r5c1"), ("r6c3", "r6c1"), ("r7c3", "r7c1")]
+        assert fake.count("ControlListView") == 1 + 3 * 2
+
+    def test_lazy_pages(self, fake, autoit):
+        rows = autoit.iter_list_view_rows("Results", "", "SysListView321", columns=(0,), page_size=10)
+        assert next(rows) == ("r0c0",)
+        assert fake.count("ControlListView") == 1 + 10
+
+    def test_missing_window(self, autoit):
+        assert list(autoit.iter_list_view_rows("Nope", "", "SysListView321")) == []
+
+    def test_cache_rereads_changed_rows_only(self, fake, autoit, listview):
+        cache = ListViewCache()
+        first = list(iter_list_view_rows(autoit, "Results", "", "SysListView321", cache=cache))
+        assert len(cache) == 25
+        listview.grid[7] = ["changed", "a", "b", "c"]
+        calls = fake.count("ControlListView")
+        second = list(iter_list_view_rows(autoit, "Results", "", "SysListView321", cache=cache))
+        assert second[7] == ("changed", "a", "b", "c") and second[:7] == first[:7]
+        # counts, 25 signatures and the three other columns of the changed row
+        assert fake.count("ControlListView") - calls == 2 + 25 + 3
+        assert (cache.hits, cache.misses) == (24, 26)
+
+    def test_cache_keeps_windows_apart(self, fake, autoit, listview):
+        other = FakeListView(25, 4)
+        for row in other.grid:
+            row[1] = "other"
+        grids = {"[HANDLE:0x00A1]": listview, "[HANDLE:0x00B2]": other}
+        fake.on("WinGetHandle", lambda title, text: {"Results": "0x00A1", "Results 2": "0x00B2"}.get(title, ""))
+        fake.on("ControlListView", lambda title, *args: grids[title](title, *args))
+        cache = ListViewCache()
+        first = list(iter_list_view_rows(autoit, "Results", "", "SysListView321", cache=cache))
+        second = list(iter_list_view_rows(autoit, "Results 2", "", "SysListView321", cache=cache))
+        assert first == [tuple(row) for row in listview.grid]
+        assert second == [tuple(row) for row in other.grid]
+        assert cache.hits == 0
+
+    def test_client_reads_pages_as_batches(self, fake, listview, tmp_path):
+        server = AutoItServer(str(tmp_path / "autoit.sock"), factory=lambda: AutoItX3(backend=fake)).start()
+        try:
+            with AutoItClient(server.address, timeout=5) as client:
+                rows = list(iter_list_view_rows(client, "Results", "", "SysListView321", page_size=10))
+        finally:
+            server.shutdown()
+        assert rows == [tuple(row) for row in listview.grid]
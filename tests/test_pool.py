@@ -0,0 +1,165 @@
+from __future__ import absolute_import, division, print_function
+import threading
+import pytest
+from autoit import pool as pool_module
+from autoit.autoitx import AutoItX3
+from autoit.pool import AutoItX3Pool, LocalHandle, PoolTimeout
+from autoit.testing import FakeAutoItX
+
+
+class Disconnected(Exception):
+    hresult = -2147417848
+
+
+class DeadServer(object):
+    def __getattr__(self, name):
+        raise Disconnected(name)
+
+
+def kill(autoit):
+    autoit._backend = DeadServer()
+    autoit._invoker = None
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def backends():
+    return []
+
+@pytest.fixture
+def factory(backends):
+    def factory():
+        backends.append(FakeAutoItX())
+        return AutoItX3(backend=backends[-1])
+    return factory
+
+
+
+class TestAutoItX3Pool(object):
+
+    def test_handles_are_reused(self, factory, backends):
+        pool = AutoItX3Pool(factory, size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+        assert len(backends) == 1
+        assert pool.stats().checkouts == 2
+
+    def test_checkout_timeout(self, factory):
+        pool = AutoItX3Pool(factory, size=1)
+        autoit = pool.checkout()
+        with pytest.raises(PoolTimeout):
+            pool.checkout(timeout=0.01)
+        pool.checkin(autoit)
+        assert pool.stats().in_use == 0
+
+    def test_waiters_are_woken(self, factory):
+        pool = AutoItX3Pool(factory, size=1)
+        autoit = pool.checkout()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.checkout(timeout=5)))
+        waiter.start()
+        pool.checkin(autoit)
+        waiter.join()
+        assert got == [autoit]
+        assert pool.stats().wait_count == 1
+
+    def test_failed_health_check_rebinds(self, factory, backends):
+        clock = Clock()
+        pool = AutoItX3Pool(factory, size=1, check_interval=10, clock=clock)
+        with pool.connection() as autoit:
+            kill(autoit)
+        clock.now = 5
+        with pool.connection() as same:
+            assert same is autoit
+        clock.now = 20
+        with pool.connection() as rebound:
+            assert rebound is not autoit
+            assert rebound.version == FakeAutoItX.version
+        stats = pool.stats()
+        assert (stats.failed_checks, stats.rebinds) == (1, 1)
+
+    def test_call_retries_on_disconnect(self, factory, backends):
+        pool = AutoItX3Pool(factory, size=1)
+        with pool.connection() as autoit:
+            kill(autoit)
+        assert pool.call("win_exists", "Calculator", "") == 1
+        assert pool.stats().rebinds == 1
+
+    def test_other_errors_do_not_rebind(self, factory):
+        pool = AutoItX3Pool(factory, size=1)
+        with pytest.raises(ValueError):
+            with pool.connection():
+                raise ValueError()
+        assert pool.stats().rebinds == 0
+
+    def test_local_handles_per_thread(self, factory):
+        pool = AutoItX3Pool(factory)
+        handles = []
+        thread = threading.Thread(target=lambda: handles.append(pool.local()))
+        thread.start()
+        thread.join()
+        assert pool.local() is pool.local()
+        assert pool.local() is not handles[0]
+        assert pool.stats().threads == 2
+
+    def test_local_rebinds_and_retries_on_disconnect(self, factory, backends):
+        pool = AutoItX3Pool(factory, check_interval=30)
+        handle = pool.local()
+        dead = handle.autoit
+        kill(dead)
+        assert handle.win_exists("Calculator", "") == 1
+        assert handle.autoit is not dead
+        assert pool.local() is handle and isinstance(handle, LocalHandle)
+        assert handle.error == 0
+        assert pool.stats().rebinds == 1
+        assert [name for name, args in backends[-1].calls] == ["WinExists"]
+
+    def test_rebind_releases_old_handle(self, backends):
+        clock = Clock()
+        released = []
+
+        class Handle(AutoItX3):
+            def _release(self):
+                released.append(self)
+        pool = AutoItX3Pool(lambda: Handle(backend=FakeAutoItX()), size=1, check_interval=10, clock=clock)
+        with pool.connection() as autoit:
+            kill(autoit)
+        clock.now = 20
+        with pool.connection() as rebound:
+            assert rebound is not autoit
+        assert released == [autoit]
+
+    def test_release_local_leaves_apartment(self, factory, monkeypatch):
+        apartments = []
+        monkeypatch.setattr(pool_module, "initialize_apartment", lambda: apartments.append("enter") or True)
+        monkeypatch.setattr(pool_module, "uninitialize_apartment", lambda: apartments.append("leave"))
+        pool = AutoItX3Pool(factory)
+
+        def work():
+            pool.local().win_exists("Calculator", "")
+            pool.release_local()
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        assert apartments == ["enter", "leave"]
+        assert pool.stats().threads == 0
+        pool.release_local()
+        assert apartments == ["enter", "leave"]
+
+    def test_utilisation(self, factory):
+        clock = Clock()
+        pool = AutoItX3Pool(factory, size=2, clock=clock)
+        autoit = pool.checkout()
+        clock.now = 10
+        pool.checkin(autoit)
+        clock.now = 20
+        assert pool.stats().utilisation == pytest.approx(0.25)
@@ -0,0 +1,123 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit import processes
+from autoit.autoitx import AutoItX3
+from autoit.errors import ErrorFlagSet
+from autoit.processes import ProcessIndex, StaticSource
+from autoit.testing import FakeAutoItX
+
+PROCESSES = [(4, "System"), (812, "svchost.exe"), (1200, "SvcHost.exe"), (964, "svchost.exe"),
+             (3000, "kiosk.exe")]
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def source():
+    return StaticSource(PROCESSES)
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+
+class TestProcessIndex(object):
+    def test_exists_many_one_snapshot(self, source, clock):
+        index = ProcessIndex(source, clock=clock)
+        assert index.exists_many(["svchost.exe", "KIOSK.EXE", "missing.exe", 964, 5]) == [1200, 3000, 0, 964, 0]
+        assert index.exists("system") == 4
+        assert index.pids("SVCHOST.EXE") == [812, 964, 1200]
+        assert source.snapshots == 1
+
+    def test_ttl(self, source, clock):
+        index = ProcessIndex(source, ttl=2.0, clock=clock)
+        index.exists("kiosk.exe")
+        clock.now = 1.9
+        index.exists("kiosk.exe")
+        assert source.snapshots == 1
+        clock.now = 2.0
+        index.exists("kiosk.exe")
+        assert source.snapshots == 2
+
+    def test_explicit_refresh(self, clock):
+        processes = list(PROCESSES)
+        source = StaticSource(lambda: processes)
+        index = ProcessIndex(source, ttl=None, clock=clock)
+        assert index.exists("new.exe") == 0
+        processes.append((5000, "new.exe"))
+        clock.now = 100.0
+        assert index.exists("new.exe") == 0
+        index.refresh()
+        assert index.exists("new.exe") == 5000
+        assert index.snapshots == 2
+
+    def test_close_many_highest_pid(self, source, clock):
+        index = ProcessIndex(source, clock=clock)
+        assert index.close_many(["svchost.exe", "svchost.exe", "missing.exe", 3000, 3000]) == [1200, 964, 0, 3000, 0]
+        assert source.terminated == [1200, 964, 3000]
+        assert index.exists_many(["svchost.exe", "kiosk.exe"]) == [812, 0]
+        assert source.snapshots == 1
+
+    def test_close_failed(self, source, clock):
+        index = ProcessIndex(source, clock=clock)
+        assert index.close("kiosk.exe", close=lambda pid: False) == 0
+        assert index.exists("kiosk.exe") == 3000
+
+    def test_close_raising_autoit_error(self, source, clock):
+        index = ProcessIndex(source, clock=clock)
+
+        def close(pid):
+            if pid == 1200:
+                raise ErrorFlagSet("process_close failed", "process_close", 0, 1)
+            return True
+        assert index.close_many(["kiosk.exe", "svchost.exe", 964], close=close) == [3000, 0, 964]
+        assert index.exists_many(["kiosk.exe", "svchost.exe"]) == [0, 1200]
+
+    def test_lookups_not_blocked_while_closing(self, source, clock):
+        index = ProcessIndex(source, clock=clock)
+        held = []
+
+        def close(pid):
+            if index._lock.acquire(False):
+                index._lock.release()
+            else:
+                held.append(pid)
+            # a snapshot taken before the close still answers
+            return pid if index.exists("svchost.exe") else 0
+        assert index.close_many(["svchost.exe", "kiosk.exe"], close=close) == [1200, 3000]
+        assert held == []
+        assert index.exists_many(["svchost.exe", "kiosk.exe"]) == [964, 0]
+
+
+class TestAutoItX3(object):
+    def test_process_exists_many(self, source):
+        autoit = AutoItX3(backend=FakeAutoItX())
+        autoit.process_index = ProcessIndex(source)
+        assert autoit.process_exists_many(["svchost.exe", "missing.exe"]) == [1200, 0]
+        assert autoit.process_exists_many([3000]) == [3000]
+        assert source.snapshots == 1
+
+    def test_process_close_many(self, source):
+        fake = FakeAutoItX()
+        fake.on("ProcessClose", 1)
+        autoit = AutoItX3(backend=fake)
+        autoit.process_index = ProcessIndex(source)
+        assert autoit.process_close_many(["svchost.exe", "kiosk.exe", "missing.exe"]) == [1200, 3000, 0]
+        assert [args for name, args in fake.calls] == [(1200,), (3000,)]
+        assert source.terminated == []
+
+    def test_injected_backend_without_index(self, monkeypatch):
+        monkeypatch.setattr(processes, "default_source", lambda: pytest.fail("local process table used"))
+        fake = FakeAutoItX().on("ProcessExists", lambda process: {"svchost.exe": 1200, 3000: 3000}.get(process, 0))
+        autoit = AutoItX3(backend=fake, checked=True)
+        assert autoit.process_exists_many(["svchost.exe", "missing.exe", 3000]) == [1200, 0, 3000]
+        assert autoit.process_close_many(["svchost.exe", "svchost.exe", "missing.exe"]) == [1200, 0, 0]
+        assert fake.calls[-1] == ("ProcessClose", (1200,)) and fake.count("ProcessClose") == 1
+        assert autoit.process_index is None
@@ -0,0 +1,118 @@
+from __future__ import absolute_import, division, print_function
+import json
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.errors import ErrorFlagSet
+from autoit.registry import RegKey, RegValue, reg_diff, reg_walk
+from autoit.server import AutoItClient, AutoItServer
+from autoit.testing import FakeAutoItX
+
+
+class FakeRegistry(object):
+    """Keys as {path: ({value name: value}, [subkey names])}."""
+
+    def __init__(self, fake, keys):
+        self.fake = fake
+        self.keys = keys
+        fake.on("RegEnumKey", lambda key, instance: self.enum(key, instance, 1))
+        fake.on("RegEnumVal", lambda key, instance: self.enum(key, instance, 0))
+        fake.on("RegRead", self.read)
+
+    def enum(self, key, instance, part):
+        if key not in self.keys:
+            self.fake.error = 1
+            return ""
+        names = sorted(self.keys[key][part])
+        if instance > len(names):
+            self.fake.error = -1
+            return ""
+        return names[instance - 1]
+
+    def read(self, key, name):
+        values = self.keys.get(key, ({}, []))[0]
+        if name not in values:
+            self.fake.error = -1
+            return 1
+        return values[name]
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def registry(fake):
+    return FakeRegistry(fake, {
+        "HKLM\\SW": ({"": "default", "Version": "1.0"}, ["App", "Tools"]),
+        "HKLM\\SW\\App": ({"Count": 1, "Flags": 0}, ["Plugins"]),
+        "HKLM\\SW\\App\\Plugins": ({"Path": "C:\\p"}, []),
+        "HKLM\\SW\\Tools": ({}, []),
+    })
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestRegistry(object):
+
+    def test_walk(self, fake, registry, autoit):
+        assert list(autoit.reg_walk("HKLM\\SW")) == [
+            RegKey("HKLM\\SW", 0), RegValue("HKLM\\SW", "", "default"), RegValue("HKLM\\SW", "Version", "1.0"),
+            RegKey("HKLM\\SW\\App", 1), RegValue("HKLM\\SW\\App", "Count", 1), RegValue("HKLM\\SW\\App", "Flags", 0),
+            RegKey("HKLM\\SW\\App\\Plugins", 2), RegValue("HKLM\\SW\\App\\Plugins", "Path", "C:\\p"),
+            RegKey("HKLM\\SW\\Tools", 1)]
+
+    def test_error_flag_read_only_when_ambiguous(self, registry, autoit):
+        reads = []
+        get = autoit._get
+        autoit._get = lambda name: reads.append(name) or get(name)
+        list(autoit.reg_walk("HKLM\\SW"))
+        # the empty default value name, the end of the 8 enumerations and the DWORD 1
+        assert reads == ["error"] * 10
+
+    def test_depth_and_keys_only(self, registry, autoit):
+        assert list(autoit.reg_walk("HKLM\\SW", depth=1, values=False)) == [
+            RegKey("HKLM\\SW", 0), RegKey("HKLM\\SW\\App", 1), RegKey("HKLM\\SW\\Tools", 1)]
+
+    def test_missing_root(self, registry, autoit):
+        with pytest.raises(ErrorFlagSet):
+            list(autoit.reg_walk("HKLM\\Nope"))
+
+    def test_unreadable_subkey_is_skipped(self, registry, autoit):
+        registry.keys["HKLM\\SW"][1].append("Locked")
+        assert RegKey("HKLM\\SW\\Locked", 1) in list(autoit.reg_walk("HKLM\\SW"))
+
+    def test_checked_instance(self, fake, registry):
+        autoit = AutoItX3(backend=fake, checked=True)
+        assert len(list(autoit.reg_walk("HKLM\\SW"))) == 9
+
+    @pytest.mark.parametrize("checked", [False, True])
+    def test_walk_through_client(self, fake, registry, autoit, tmp_path, checked):
+        server = AutoItServer(str(tmp_path / "autoit.sock"), lambda: AutoItX3(backend=fake, checked=checked),
+                              workers=2).start()
+        try:
+            with AutoItClient(server.address, timeout=5) as client:
+                assert list(reg_walk(client, "HKLM\\SW")) == list(autoit.reg_walk("HKLM\\SW"))
+                with pytest.raises(ErrorFlagSet):
+                    list(reg_walk(client, "HKLM\\Missing"))
+        finally:
+            server.shutdown()
+
+    def test_snapshot_and_diff(self, registry, autoit):
+        before = autoit.reg_snapshot("HKLM\\SW")
+        assert before["keys"][""] == {"": "default", "Version": "1.0"}
+        assert json.loads(json.dumps(before)) == before
+        registry.keys["HKLM\\SW"][0]["Version"] = "2.0"
+        registry.keys["HKLM\\SW\\App"][0].pop("Flags")
+        registry.keys["HKLM\\SW\\App"][0]["Mode"] = "fast"
+        registry.keys["HKLM\\SW"][1].remove("Tools")
+        registry.keys["HKLM\\SW"][1].append("New")
+        registry.keys["HKLM\\SW\\New"] = ({"x": 5}, [])
+        diff = reg_diff(before, autoit.reg_snapshot("HKLM\\SW"))
+        assert diff.added_keys == ["New"] and diff.removed_keys == ["Tools"]
+        assert diff.added_values == [("App", "Mode", "fast"), ("New", "x", 5)]
+        assert diff.removed_values == [("App", "Flags", 0)]
+        assert diff.changed_values == [("", "Version", "1.0", "2.0")]
+        assert reg_diff(before, before) == ([], [], [], [], [])
@@ -0,0 +1,318 @@
+from __future__ import absolute_import, division, print_function
+import collections
+import io
+import socket
+import threading
+import time
+import weakref
+import pytest
+from autoit import server as server_module
+from autoit.autoitx import AutoItX3
+from autoit.batch import CallResult
+from autoit.errors import ErrorFlagSet
+from autoit.protocol import (AUTH, CALL, HEADER, ProtocolError, challenge, decode, encode, pack_frame, read_frame,
+                             respond, verify)
+from autoit.server import AuthenticationError, AutoItClient, AutoItServer, RemoteError, main
+from autoit.snapshot import Rect
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX().on("ControlGetText", "8")
+
+@pytest.fixture
+def server(fake, tmp_path):
+    server = AutoItServer(str(tmp_path / "autoit.sock"), lambda: AutoItX3(backend=fake, checked=True), workers=2)
+    server.start()
+    yield server
+    server.shutdown()
+
+@pytest.fixture
+def client(server):
+    with AutoItClient(server.address, timeout=5) as client:
+        yield client
+
+
+
+class TestProtocol(object):
+
+    @pytest.mark.parametrize("value", [None, True, False, 0, -1, 2 ** 70, 1.5, u"t\xe4xt", b"\x00\xff",
+                                       [1, [2]], (1, u"a"), {u"k": [None]}])
+    def test_roundtrip(self, value):
+        assert decode(encode(value)) == value
+        assert type(decode(encode(value))) is type(value)
+
+    def test_frames(self):
+        stream = io.BytesIO(pack_frame(7, CALL, [u"win_exists", [u"a", u""], {}]) + pack_frame(8, CALL, None))
+        assert read_frame(stream) == (7, CALL, [u"win_exists", [u"a", u""], {}])
+        assert read_frame(stream) == (8, CALL, None)
+        assert read_frame(stream) is None
+
+    def test_truncated_frame(self):
+        with pytest.raises(ProtocolError):
+            read_frame(io.BytesIO(pack_frame(1, CALL, u"text")[:-1]))
+
+    def test_malformed_payload(self):
+        with pytest.raises(ProtocolError):
+            decode(b"s\x00\x00\x00\x09abc")
+        with pytest.raises(ProtocolError):
+            decode(b"?")
+
+    @pytest.mark.parametrize("payload", [
+        b"m\x00\x00\x00\x01l\x00\x00\x00\x00N",  # unhashable dict key
+        b"I\x00\x00\x00\x02x1",  # bad digits
+        b"l\x00\x00\x00\x01" * 100000 + b"N",  # deeper than any recursion limit
+        b"l\x00\x00\x00\x01" * 33 + b"N",
+    ], ids=["unhashable key", "bad digits", "recursion", "too deep"])
+    def test_malformed_structure(self, payload):
+        with pytest.raises(ProtocolError):
+            decode(payload)
+
+    def test_nesting_limit(self):
+        value = None
+        for _ in range(32):
+            value = [value]
+        assert decode(encode(value)) == value
+
+    def test_handshake_answer(self):
+        nonce = challenge()
+        assert verify(u"s\xe4cret", nonce, respond(u"s\xe4cret".encode("utf-8"), nonce))
+        assert not verify(u"secret", nonce, respond(u"other", nonce))
+        assert not verify(u"secret", nonce, u"not bytes")
+        assert verify(None, nonce, respond(None, nonce))
+
+    def test_records(self):
+        rect = Rect(1, 2, 30, 40)
+        assert decode(encode(rect)) == rect
+        assert type(decode(encode(rect))) is Rect
+        results = decode(encode([CallResult(rect, 0)]))
+        assert type(results[0]) is CallResult and type(results[0].value) is Rect
+        # foreign named tuples and records of modules not loaded arrive as plain tuples
+        foreign = collections.namedtuple("Foreign", "a b")(1, 2)
+        assert type(decode(encode(foreign))) is tuple
+        unknown = encode(rect).replace(b"autoit.snapshot.Rect", b"autoit.snapshop.Rect")
+        assert type(decode(unknown)) is tuple and decode(unknown) == (1, 2, 30, 40)
+
+
+class TestServer(object):
+
+    def test_calls(self, client):
+        assert client.control_get_text("Calculator", "", 150) == "8"
+        assert client.get("version") == FakeAutoItX.version
+        assert client.mouse_get_pos() == (1, 1)
+        assert type(client.control_get_rect("Calculator", "", 150)) is Rect
+
+    def test_connections_run_concurrently(self, fake, server, client):
+        release = threading.Event()
+        fake.on("ProcessWaitClose", lambda process, timeout: release.wait(5) and 1)
+        waiting = client.submit("process_wait_close", "calc.exe", 60)
+        with AutoItClient(server.address, timeout=5) as other:
+            assert other.win_exists("Calculator", "") == 1
+        assert not waiting.done()
+        release.set()
+        assert waiting.result(5) == 1
+
+    def test_pipelined_requests_keep_their_order(self, fake, client):
+        done = []
+        fake.on("ControlSetText", lambda *args: time.sleep(0.2) or done.append("set") or 1)
+        fake.on("ControlClick", lambda *args: done.append("click") or 1)
+        setting = client.submit("control_set_text", "Form", "", "Edit1", "john")
+        clicking = client.submit("control_click", "Form", "", "Button1")
+        assert clicking.result(5) == 1 and setting.result(5) == 1
+        assert done == ["set", "click"]
+
+    def test_error_read_on_the_worker_of_the_last_call(self, tmp_path):
+        factory = lambda: AutoItX3(backend=FakeAutoItX().on("WinActivate", 0, error=1))
+        server = AutoItServer(str(tmp_path / "error.sock"), factory, workers=2).start()
+        try:
+            with AutoItClient(server.address, timeout=5) as first, AutoItClient(server.address, timeout=5) as second:
+                for _ in range(5):
+                    assert first.win_activate("Form") == 0
+                    assert second.win_exists("Form", "") == 1
+                    assert second.get("error") == 0
+                    assert first.get("error") == 1
+        finally:
+            server.shutdown()
+
+    def test_errors(self, fake, client):
+        fake.on("ClipGet", "", error=1)
+        with pytest.raises(ErrorFlagSet) as info:
+            client.clip_get()
+        assert info.value.method == "clip_get"
+        with pytest.raises(RemoteError):
+            client.call("_call", "Shutdown", 1)
+        assert fake.count("Shutdown") == 0
+
+    def test_batch(self, client):
+        with client.batch() as b:
+            b.control_set_text("Form", "", "Edit1", "john")
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult(1, 0), CallResult("8", 0)]
+
+    def test_batch_without_error_reads(self, fake, client):
+        fake.on("WinActivate", 0, error=1)
+        with client.batch(read_errors=False) as b:
+            b.win_activate("Form")
+            b.control_get_text("Form", "", "Edit1")
+        assert b.results == [CallResult(0, None), CallResult("8", None)]
+
+    def test_pending_calls_fail_on_shutdown(self, fake, server, client):
+        fake.on("Sleep", lambda delay: threading.Event().wait(1))
+        sleeping = client.submit("sleep", 1000)
+        server.shutdown()
+        with pytest.raises(IOError):
+            sleeping.result(5)
+
+    def test_autoit_released_before_leaving_apartment(self, fake, tmp_path, monkeypatch):
+        instances, alive = [], []
+        monkeypatch.setattr(server_module, "initialize_apartment", lambda: True)
+        monkeypatch.setattr(server_module, "uninitialize_apartment", lambda: alive.extend(ref() for ref in instances))
+
+        def factory():
+            instance = AutoItX3(backend=fake)
+            instances.append(weakref.ref(instance))
+            return instance
+        server = AutoItServer(str(tmp_path / "release.sock"), factory, workers=1).start()
+        with AutoItClient(server.address, timeout=5) as client:
+            assert client.control_get_text("Calculator", "", 150) == "8"
+        server.shutdown()
+        server._threads[0].join(5)
+        assert len(instances) == 1 and alive == [None]
+
+    def test_request_queue_is_bounded(self, fake, tmp_path, monkeypatch):
+        monkeypatch.setattr(server_module, "MAX_QUEUED", 2)
+        release, sizes = threading.Event(), []
+        server = AutoItServer(str(tmp_path / "bounded.sock"), lambda: AutoItX3(backend=fake), workers=1).start()
+        fake.on("ControlClick", lambda *args: sizes.append(server._queues[0].qsize()) or release.wait(5) and 1)
+        try:
+            with AutoItClient(server.address, timeout=5) as client:
+                clicks = [client.submit("control_click", "Form", "", "Button1") for _ in range(10)]
+                time.sleep(0.2)
+                assert server._queues[0].qsize() == 2
+                release.set()
+                assert [click.result(5) for click in clicks] == [1] * 10
+        finally:
+            server.shutdown()
+        assert max(sizes) <= 2
+
+    def test_malformed_frame_closes_connection(self, fake, server, monkeypatch):
+        crashed = []
+        monkeypatch.setattr(threading, "excepthook", crashed.append)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(server.address)
+        stream = sock.makefile("rb")
+        nonce = read_frame(stream)[2]
+        sock.sendall(pack_frame(0, AUTH, respond(None, nonce)))
+        assert read_frame(stream)[2] is True
+        payload = b"l\x00\x00\x00\x01" * 100000 + b"N"
+        sock.sendall(HEADER.pack(len(payload), 1, CALL) + payload)
+        assert read_frame(stream) is None
+        stream.close()
+        sock.close()
+        with AutoItClient(server.address, timeout=5) as client:
+            assert client.control_get_text("Calculator", "", 150) == "8"
+        assert crashed == []
+
+    def test_unix_socket_path_reused(self, fake, tmp_path):
+        path = str(tmp_path / "restart.sock")
+        AutoItServer(path, lambda: AutoItX3(backend=fake), workers=1).start().shutdown()
+        assert not (tmp_path / "restart.sock").exists()
+        # a socket file left by a server that did not shut down
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = AutoItServer(path, lambda: AutoItX3(backend=fake), workers=1).start()
+        try:
+            with pytest.raises(socket.error):
+                AutoItServer(path, lambda: AutoItX3(backend=fake), workers=1)
+            with AutoItClient(server.address, timeout=5) as client:
+                assert client.control_get_text("Calculator", "", 150) == "8"
+        finally:
+            server.shutdown()
+
+    def test_serve_forever_idles_after_disconnect(self, fake, tmp_path):
+        server = AutoItServer(str(tmp_path / "serve.sock"), lambda: AutoItX3(backend=fake), workers=1)
+        serving = threading.Thread(target=server.serve_forever)
+        serving.start()
+        try:
+            for _ in range(3):
+                with AutoItClient(server.address, timeout=5) as client:
+                    assert client.control_get_text("Calculator", "", 150) == "8"
+            # connection readers are not kept around
+            assert len(server._threads) == 2
+            started = time.process_time()
+            time.sleep(0.5)
+            assert time.process_time() - started < 0.25
+        finally:
+            server.shutdown()
+            serving.join(5)
+        assert not serving.is_alive()
+
+
+class TestSecurity(object):
+
+    def test_tcp_requires_secret(self, fake):
+        with pytest.raises(ValueError):
+            AutoItServer(("127.0.0.1", 0), lambda: AutoItX3(backend=fake))
+
+    def test_tcp_refuses_remote_hosts(self, fake):
+        with pytest.raises(ValueError):
+            AutoItServer(("0.0.0.0", 0), lambda: AutoItX3(backend=fake), secret="s3cret")
+        server = AutoItServer(("0.0.0.0", 0), lambda: AutoItX3(backend=fake), secret="s3cret", allow_remote=True)
+        server.shutdown()
+
+    def test_tcp_with_secret(self, fake):
+        server = AutoItServer(("127.0.0.1", 0), lambda: AutoItX3(backend=fake), workers=1, secret="s3cret").start()
+        try:
+            with AutoItClient(server.address, timeout=5, secret="s3cret") as client:
+                assert client.control_get_text("Calculator", "", 150) == "8"
+            with pytest.raises(AuthenticationError):
+                AutoItClient(server.address, timeout=5, secret="guess")
+            with pytest.raises(AuthenticationError):
+                AutoItClient(server.address, timeout=5)
+        finally:
+            server.shutdown()
+        assert fake.count("ControlGetText") == 1
+
+    def test_rejected_client_sends_no_calls(self, fake, tmp_path):
+        server = AutoItServer(str(tmp_path / "secret.sock"), lambda: AutoItX3(backend=fake), secret="s3cret").start()
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(server.address)
+            stream = sock.makefile("rb")
+            # skips the handshake and goes straight to a call
+            sock.sendall(pack_frame(1, CALL, [u"run", [u"calc.exe"], {}]))
+            assert read_frame(stream)[1] == AUTH
+            response = read_frame(stream)
+            assert response is not None and response[2][0] == u"AuthenticationError"
+            assert read_frame(stream) is None
+            stream.close()
+            sock.close()
+        finally:
+            server.shutdown()
+        assert fake.count("Run") == 0
+
+    def test_handshake_frame_limit(self, fake, tmp_path):
+        server = AutoItServer(str(tmp_path / "limit.sock"), lambda: AutoItX3(backend=fake), secret="s3cret").start()
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(server.address)
+            stream = sock.makefile("rb")
+            assert read_frame(stream)[1] == AUTH
+            # announces a large answer; the server hangs up without waiting for it
+            sock.settimeout(2)
+            sock.sendall(HEADER.pack(1024 * 1024, 0, AUTH) + b"b")
+            assert read_frame(stream) is None
+            stream.close()
+            sock.close()
+        finally:
+            server.shutdown()
+
+    def test_main_refuses_unsafe_listeners(self, monkeypatch):
+        monkeypatch.delenv("AUTOIT_SERVER_SECRET", raising=False)
+        with pytest.raises(SystemExit):
+            main(["--listen", "127.0.0.1:0"])
+        monkeypatch.setenv("AUTOIT_SERVER_SECRET", "s3cret")
+        with pytest.raises(SystemExit):
+            main(["--listen", "0.0.0.0:0"])
@@ -0,0 +1,79 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.snapshot import ControlState, InconsistentRead, Rect
+from autoit.testing import FakeAutoItX
+
+
+@pytest.fixture
+def fake():
+    return (FakeAutoItX()
+            .on("WinGetHandle", lambda title, text: "0x0001" if title == "Form" else "")
+            .on("ControlGetPosX", 10).on("ControlGetPosY", 20)
+            .on("ControlGetPosWidth", 30).on("ControlGetPosHeight", 40)
+            .on("WinGetPosX", 1).on("WinGetPosY", 2).on("WinGetPosWidth", 3).on("WinGetPosHeight", 4)
+            .on("ControlCommand", lambda title, text, controlId, command, option: int(command == "IsVisible"))
+            .on("ControlGetText", "john"))
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestSnapshot(object):
+
+    def test_control_get_rect(self, fake, autoit):
+        assert autoit.control_get_rect("Form", "", "Edit1") == Rect(10, 20, 30, 40)
+        assert len(fake.calls) == 4
+
+    def test_win_get_rect(self, autoit):
+        assert autoit.win_get_rect("Form") == Rect(1, 2, 3, 4)
+
+    def test_consistent_retries_torn_reads(self, fake, autoit):
+        xs = iter([10, 15, 15, 15])
+        fake.on("ControlGetPosX", lambda *args: next(xs))
+        assert autoit.control_get_rect("Form", "", "Edit1", consistent=True) == Rect(15, 20, 30, 40)
+        assert fake.calls[0] == ("WinGetHandle", ("Form", ""))
+        assert all(args[0] == "[HANDLE:0x0001]" for name, args in fake.calls[1:])
+        assert fake.count("ControlGetPosX") == 3
+
+    def test_consistent_rereads_size(self, fake, autoit):
+        widths = iter([30, 35, 35])
+        fake.on("ControlGetPosWidth", lambda *args: next(widths))
+        assert autoit.control_get_rect("Form", "", "Edit1", consistent=True) == Rect(10, 20, 35, 40)
+
+    def test_consistent_raises_when_exhausted(self, fake, autoit):
+        xs = iter(range(100))
+        fake.on("WinGetPosX", lambda *args: next(xs))
+        with pytest.raises(InconsistentRead):
+            autoit.win_get_rect("Form", consistent=True)
+
+    def test_mouse_get_pos(self, fake, autoit):
+        xs = iter([5, 6, 6])
+        fake.on("MouseGetPosX", lambda: next(xs)).on("MouseGetPosY", 7)
+        assert autoit.mouse_get_pos(consistent=True) == (6, 7)
+        assert fake.count("MouseGetPosY") == 3
+
+    def test_consistent_missing_window(self, autoit):
+        assert autoit.control_get_rect("Paint", "", "Edit1", consistent=True) is None
+        assert autoit.win_get_rect("Paint", consistent=True) is None
+
+    def test_bulk_pins_each_window_once(self, fake, autoit):
+        controls = [("Form", "", "Edit%d" % number) for number in range(5)] + [("Paint", "", "Edit1")]
+        rects = autoit.control_get_rects(controls, consistent=True)
+        assert rects == [Rect(10, 20, 30, 40)] * 5 + [None]
+        assert fake.count("WinGetHandle") == 2
+
+    def test_control_get_state(self, fake, autoit):
+        assert autoit.control_get_state("Form", "", "Edit1") == ControlState(True, False, "john")
+        states = autoit.control_get_states([("Form", "", "Edit1"), ("Form", "", "Edit2")])
+        assert states == [ControlState(True, False, "john")] * 2
+        assert fake.count("WinGetHandle") == 0
+        states = autoit.control_get_states([("Form", "", "Edit1"), ("Form", "", "Edit2"), ("Paint", "", "Edit1")],
+                                           consistent=True)
+        assert states == [ControlState(True, False, "john")] * 2 + [None]
+        assert fake.count("WinGetHandle") == 2
+
+    def test_rect_through_window_object(self, autoit):
+        assert autoit.window("Form").control("Edit1").rect == Rect(10, 20, 30, 40)
@@ -0,0 +1,129 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.server import AutoItClient, AutoItServer
+from autoit.tail import APPEND, REWRITE, TextChange, TextFollower, follow_control_text
+from autoit.testing import FakeAutoItX
+
+
+class Log(object):
+    """Edit control whose text is the next of a list of texts on every read, gone after the last one."""
+
+    def __init__(self, fake, texts):
+        self.fake = fake
+        self.texts = list(texts)
+        fake.on("WinGetHandle", "0x10")
+        fake.on("ControlGetText", self.read)
+
+    def read(self, title, text, controlId):
+        assert title == "[HANDLE:0x10]"
+        if not self.texts:
+            self.fake.error = 1
+            return ""
+        return self.texts.pop(0)
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+def follow(autoit, **options):
+    return list(follow_control_text(autoit, "Log", "", "Edit1", sleep=lambda seconds: None, **options))
+
+
+
+class TestTextFollower(object):
+
+    def test_append(self):
+        follower = TextFollower(block=4, anchor=2)
+        assert follower.update("abc") == TextChange(APPEND, 0, "abc")
+        assert follower.update("abc") is None
+        assert follower.update("abcdefghij") == TextChange(APPEND, 3, "defghij")
+        assert follower.length == 10
+
+    def test_truncation(self):
+        follower = TextFollower(block=4, anchor=2)
+        follower.update("abcdefghij")
+        assert follower.update("") == TextChange(REWRITE, 0, "")
+        assert follower.update("new") == TextChange(APPEND, 0, "new")
+
+    def test_rewrite_from_first_changed_block(self):
+        follower = TextFollower(block=4, anchor=2)
+        follower.update("abcdefghijkl")
+        assert follower.update("abcdeXghijk") == TextChange(REWRITE, 4, "eXghijk")
+        assert follower.update("abcdeXgh") == TextChange(REWRITE, 8, "")
+
+    def test_change_before_unchanged_anchor_not_seen(self):
+        follower = TextFollower(block=4, anchor=2)
+        follower.update("abcdefghijkl")
+        assert follower.update("abcdeXghijkl") is None
+        assert follower.update("abcdeXghijklmn") == TextChange(APPEND, 12, "mn")
+
+    def test_memory_is_hashes(self):
+        follower = TextFollower(block=4, anchor=2)
+        follower.update("x" * 100)
+        assert len(follower._blocks) == 25
+        assert not [value for value in vars(follower).values() if isinstance(value, str)]
+
+
+class TestFollowControlText(object):
+
+    def test_yields_only_new_text(self, autoit, fake):
+        Log(fake, ["old\r\n", "old\r\n", "old\r\nnew 1\r\n", "old\r\nnew 1\r\nnew 2\r\n"])
+        assert follow(autoit) == [TextChange(APPEND, 5, "new 1\r\n"), TextChange(APPEND, 12, "new 2\r\n")]
+
+    def test_from_start(self, autoit, fake):
+        Log(fake, ["old\r\n", "old\r\nnew\r\n"])
+        assert [change.text for change in follow(autoit, from_start=True)] == ["old\r\n", "new\r\n"]
+
+    def test_lines(self, autoit, fake):
+        Log(fake, ["a\r\nparti", "a\r\npartial line\r\nb", "a\r\npartial line\r\nb\r\nc\r\n"])
+        assert follow(autoit, lines=True) == [TextChange(APPEND, 3, "partial line"), TextChange(APPEND, 17, "b"),
+                                               TextChange(APPEND, 20, "c")]
+
+    def test_lines_after_rewrite(self, autoit, fake):
+        Log(fake, ["a\nb\n", "", "x\ny"])
+        assert follow(autoit, lines=True) == [TextChange(REWRITE, 0, "x")]
+
+    def test_long_partial_line_is_bounded(self, autoit, fake):
+        Log(fake, ["", "abcdefgh", "abcdefghij\n"])
+        assert [change.text for change in follow(autoit, lines=True, max_line=3)] == ["abc", "def", "ghij"]
+
+    def test_idle_timeout(self, autoit, fake):
+        fake.on("WinGetHandle", "0x10")
+        fake.on("ControlGetText", "same")
+        ticks = iter(range(100))
+        changes = list(follow_control_text(autoit, "Log", "", "Edit1", idle_timeout=5, clock=lambda: next(ticks),
+                                           sleep=lambda seconds: None))
+        assert changes == []
+        assert fake.count("ControlGetText") == 5
+
+    def test_missing_window(self, autoit, fake):
+        fake.on("WinGetHandle", "")
+        assert follow(autoit) == []
+        assert fake.count("ControlGetText") == 0
+
+    def test_autoit_method_is_local(self, autoit, fake):
+        Log(fake, ["a", "ab"])
+        assert list(autoit.follow_control_text("Log", "", "Edit1", interval=0)) == [TextChange(APPEND, 1, "b")]
+
+    def test_checked_instance_ends_when_control_goes(self, fake):
+        Log(fake, ["a", "ab"])
+        assert follow(AutoItX3(backend=fake, checked=True)) == [TextChange(APPEND, 1, "b")]
+        fake.on("WinGetHandle", "", error=1)
+        assert follow(AutoItX3(backend=fake, checked=True)) == []
+
+    @pytest.mark.parametrize("checked", [False, True])
+    def test_through_client(self, fake, tmp_path, checked):
+        Log(fake, ["a", "ab", "abc"])
+        server = AutoItServer(str(tmp_path / "autoit.sock"), lambda: AutoItX3(backend=fake, checked=checked)).start()
+        try:
+            with AutoItClient(server.address, timeout=5) as client:
+                assert [change.text for change in follow(client)] == ["b", "c"]
+        finally:
+            server.shutdown()
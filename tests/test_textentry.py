@@ -0,0 +1,147 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.testing import FakeAutoItX
+from autoit.textentry import (KEYS, PASTE, SET_TEXT, TextEntry, choose_strategies, control_class, query_control_class,
+                              type_text)
+
+
+IMAGE = object()
+
+
+class FakeDesktop(object):
+    """An edit control and the clipboard."""
+
+    def __init__(self, fake, settable=True, clipboard=None):
+        self.fake = fake
+        self.text = "old"
+        self.clipboard = clipboard
+        self.settable = settable
+        fake.on("ControlGetText", lambda title, text, controlId: self.text)
+        fake.on("ControlSetText", self.set_text)
+        fake.on("ControlSend", self.send)
+        fake.on("ClipGet", self.clip_get)
+        fake.on("ClipPut", self.clip_put)
+
+    def set_text(self, title, text, controlId, newText):
+        if self.settable:
+            self.text = newText
+        return 1
+
+    def send(self, title, text, controlId, string, flag):
+        if flag:
+            self.text += string
+        elif string == "^a{DEL}":
+            self.text = ""
+        elif string == "^a^v":
+            self.text = self.clipboard
+        return 1
+
+    def clip_get(self):
+        self.fake.error = 1 if self.clipboard is None else 2 if self.clipboard is IMAGE else 0
+        return self.clipboard if isinstance(self.clipboard, str) else ""
+
+    def clip_put(self, value):
+        self.clipboard = value or None
+        return 1
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+def ticking():
+    """clock and sleep for type_text, advancing one second per clock reading."""
+    clock = iter(range(1000))
+    return dict(clock=lambda: next(clock), sleep=lambda seconds: None)
+
+
+
+class TestStrategy(object):
+
+    @pytest.mark.parametrize("controlId, expected", [("Edit1", "Edit"), ("RichEdit20W2", "RichEdit20W"),
+                                                     ("[CLASS:Edit; INSTANCE:2]", "Edit"), ("[ID:15]", None),
+                                                     (15, None)])
+    def test_control_class(self, controlId, expected):
+        assert control_class(controlId) == expected
+
+    def test_choose(self):
+        assert choose_strategies("short", "Edit") == [KEYS, PASTE]
+        assert choose_strategies("x" * 100, "Edit") == [SET_TEXT, PASTE]
+        assert choose_strategies("x" * 100, "Scintilla") == [PASTE]
+        assert choose_strategies("x" * 100, None) == [PASTE]
+
+    def test_query_control_class(self, fake, autoit):
+        fake.on("ControlGetHandle", lambda title, text, controlId: "0x0010" if controlId == 15 else "")
+        classes = {"0x0010": "Edit"}.get
+        assert query_control_class(autoit, "Form", "", "Edit1", classes) == "Edit"
+        assert fake.calls == []
+        assert query_control_class(autoit, "Form", "", 15, classes) == "Edit"
+        assert query_control_class(autoit, "Form", "", "[ID:16]", classes) is None
+
+
+class TestTypeText(object):
+
+    def test_short_text_as_keys(self, fake, autoit):
+        desktop = FakeDesktop(fake)
+        assert autoit.type_text("Form", "", "Edit1", "a+b") == TextEntry(KEYS, True, [KEYS])
+        assert desktop.text == "a+b"
+        assert ("ControlSend", ("Form", "", "Edit1", "a+b", 1)) in fake.calls
+
+    def test_long_text_set(self, fake, autoit):
+        desktop = FakeDesktop(fake)
+        payload = "line\r\n" * 3000
+        assert autoit.type_text("Form", "", "Edit1", payload) == TextEntry(SET_TEXT, True, [SET_TEXT])
+        assert fake.count("ControlSend") == 0 and desktop.text == payload
+
+    def test_falls_back_to_paste_and_restores_clipboard(self, fake, autoit):
+        desktop = FakeDesktop(fake, settable=False, clipboard="keep me")
+        payload = "x" * 20000
+        assert type_text(autoit, "Form", "", "Edit1", payload, **ticking()) == TextEntry(PASTE, True, [SET_TEXT, PASTE])
+        assert desktop.text == payload
+        assert desktop.clipboard == "keep me"
+
+    def test_numeric_id_of_an_edit_control_is_set(self, fake, autoit):
+        desktop = FakeDesktop(fake)
+        fake.on("ControlGetHandle", "0x0010")
+        payload = "z" * 100
+        entry = type_text(autoit, "Form", "", 15, payload, class_name={"0x0010": "Edit"}.get)
+        assert entry == TextEntry(SET_TEXT, True, [SET_TEXT])
+        assert desktop.text == payload
+
+    def test_non_text_clipboard_is_left_alone(self, fake, autoit):
+        desktop = FakeDesktop(fake, clipboard=IMAGE)
+        payload = "y" * 100
+        assert autoit.type_text("Form", "", "Custom1", payload).strategy == PASTE
+        assert desktop.clipboard == payload
+        assert fake.count("ClipPut") == 1
+
+    def test_empty_clipboard_is_emptied_again(self, fake, autoit):
+        desktop = FakeDesktop(fake, clipboard=None)
+        assert autoit.type_text("Form", "", "Custom1", "y" * 100).strategy == PASTE
+        assert desktop.clipboard is None and fake.calls[-1] == ("ClipPut", ("",))
+
+    def test_unverified(self, fake, autoit):
+        FakeDesktop(fake, settable=False)
+        fake.on("ControlSend", 1)
+        result = type_text(autoit, "Form", "", "Edit1", "z" * 100, verify_timeout=2, **ticking())
+        assert result == TextEntry(PASTE, False, [SET_TEXT, PASTE])
+
+    def test_unverified_insert_is_not_repeated(self, fake, autoit):
+        desktop = FakeDesktop(fake)
+        # a control that does not show its text yet
+        fake.on("ControlGetText", "old")
+        result = type_text(autoit, "Form", "", "Edit1", "abc", replace=False, **ticking())
+        assert result == TextEntry(KEYS, False, [KEYS])
+        assert desktop.text == "oldabc" and fake.count("ClipPut") == 0
+
+    def test_forced_strategy(self, fake, autoit):
+        FakeDesktop(fake)
+        assert autoit.type_text("Form", "", "Edit1", "abc", strategy=PASTE).strategy == PASTE
+        with pytest.raises(ValueError):
+            autoit.type_text("Form", "", "Edit1", "abc", strategy="telepathy")
@@ -0,0 +1,95 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.testing import FakeAutoItX
+from autoit.treeview import DFS, TreeNode
+from autoit.window import ElementNotFound
+
+TREE = [("Network", [("Adapters", [("Ethernet", []), ("Wi-Fi", [])]),
+                     ("Proxy", [("Manual", [])])]),
+        ("Display", [("Resolution", []), ("Proxy", [])]),
+        ("Storage", [])]
+
+
+class FakeTreeView(object):
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def item(self, ref):
+        children, text = self.tree, None
+        for part in ref.split("|") if ref else []:
+            text, children = children[int(part.lstrip("#"))]
+        return text, children
+
+    def __call__(self, title, text, controlId, command, option1="", option2=""):
+        if command == "GetItemCount":
+            return str(len(self.item(option1)[1]))
+        if command == "GetText":
+            return self.item(option1)[0]
+        return 1
+
+
+@pytest.fixture
+def fake():
+    return (FakeAutoItX()
+            .on("WinGetHandle", lambda title, text: "0x0B0B" if title == "Settings" else "")
+            .on("ControlTreeView", FakeTreeView(TREE)))
+
+@pytest.fixture
+def tree(fake):
+    return AutoItX3(backend=fake).tree_view("Settings", "", "SysTreeView321")
+
+
+def texts(nodes):
+    return ["/".join(node.path) for node in nodes]
+
+
+
+class TestTreeView(object):
+
+    def test_bfs(self, tree):
+        assert texts(tree.walk()) == ["Network", "Display", "Storage", "Network/Adapters", "Network/Proxy",
+                                      "Display/Resolution", "Display/Proxy", "Network/Adapters/Ethernet",
+                                      "Network/Adapters/Wi-Fi", "Network/Proxy/Manual"]
+
+    def test_dfs_and_refs(self, tree):
+        nodes = list(tree.walk(order=DFS))
+        assert texts(nodes)[:4] == ["Network", "Network/Adapters", "Network/Adapters/Ethernet",
+                                    "Network/Adapters/Wi-Fi"]
+        assert nodes[2] == TreeNode("#0|#0|#0", ("Network", "Adapters", "Ethernet"), 2)
+
+    def test_max_depth_does_not_fetch_deeper(self, fake, tree):
+        assert len(list(tree.walk(max_depth=0))) == 3
+        assert fake.count("ControlTreeView") == 1 + 3
+
+    def test_prune(self, fake, tree):
+        nodes = list(tree.walk(prune=lambda node: node.path[0] == "Network"))
+        assert texts(nodes) == ["Network", "Display", "Storage", "Display/Resolution", "Display/Proxy"]
+        assert ("ControlTreeView", ("[HANDLE:0x0B0B]", "", "SysTreeView321", "GetItemCount", "#0", "")) \
+            not in fake.calls
+
+    def test_memoized(self, fake, tree):
+        list(tree.walk())
+        calls = fake.count("ControlTreeView")
+        list(tree.walk(order=DFS))
+        assert tree.find("Network|Proxy|Manual").ref == "#0|#1|#0"
+        assert fake.count("ControlTreeView") == calls
+        tree.invalidate()
+        list(tree.walk())
+        assert fake.count("ControlTreeView") == 2 * calls
+
+    def test_find_expands_matching_branches_only(self, fake, tree):
+        assert tree.find("Network|P*|Manual") == TreeNode("#0|#1|#0", ("Network", "Proxy", "Manual"), 2)
+        counted = [args[4] for name, args in fake.calls if name == "ControlTreeView" and args[3] == "GetItemCount"]
+        assert counted == ["", "#0", "#0|#1"]
+        assert tree.find("Network|Nothing") is None
+
+    def test_find_all_any_depth(self, tree):
+        assert texts(tree.find_all("**|Proxy")) == ["Network/Proxy", "Display/Proxy"]
+        assert texts(tree.find_all("Network|**|W*")) == ["Network/Adapters/Wi-Fi"]
+        assert texts(tree.find_all(["Display", "*"])) == ["Display/Resolution", "Display/Proxy"]
+
+    def test_missing_window(self, fake):
+        with pytest.raises(ElementNotFound):
+            AutoItX3(backend=fake).tree_view("Nope", "", "SysTreeView321")
@@ -0,0 +1,171 @@
+from __future__ import absolute_import, division, print_function
+import re
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.testing import FakeAutoItX
+from autoit.wait import (ALL, ANY, Condition, WaitEngine, control_text, process_exists, process_gone, statusbar_text,
+                         wait, window_active, window_exists, window_gone)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+def after(clock, seconds, before, later):
+    """Fake member returning before until the clock reaches seconds, later from then on."""
+    return lambda *args: later if clock.now >= seconds else before
+
+
+
+class TestConditions(object):
+
+    def test_probes_and_tests(self):
+        assert process_exists("a.exe").probe == ("process_exists", ("a.exe",))
+        assert process_exists("a.exe").test(12) and not process_exists("a.exe").test(0)
+        assert process_gone(12).test(0)
+        assert window_exists("Error").probe == ("win_exists", ("Error", ""))
+        assert window_gone("Error").test(0)
+        assert window_active("Error", "text").probe == ("win_active", ("Error", "text"))
+        assert statusbar_text("Setup", "Ready").probe == ("statusbar_get_text", ("Setup", "", 1))
+
+    def test_text_matchers(self):
+        assert control_text("A", "", "Edit1", "done").test("done")
+        assert not control_text("A", "", "Edit1", "done").test("done.")
+        assert control_text("A", "", "Edit1", re.compile(r"\d+ files")).test("copied 12 files")
+        assert not control_text("A", "", "Edit1", re.compile(r"\d+ files")).test(0)
+        assert control_text("A", "", "Edit1", lambda text: text.endswith("%")).test("50%")
+
+    def test_requires_conditions(self):
+        with pytest.raises(ValueError):
+            WaitEngine([])
+        with pytest.raises(ValueError):
+            WaitEngine([window_exists("A")], mode="first")
+
+
+class TestWait(object):
+
+    def test_any_returns_first_condition(self, fake, autoit, clock):
+        fake.on("WinExists", 0)
+        fake.on("ProcessExists", after(clock, 1.0, 812, 0))
+        fake.on("StatusBarGetText", "Working")
+        result = wait(autoit, [window_exists("Error"), process_gone("setup.exe"), statusbar_text("Setup", "Ready")],
+                      clock=clock, sleep=clock.sleep)
+        assert result and not result.timed_out
+        assert [satisfied.condition.description for satisfied in result.satisfied] == ["process 'setup.exe' gone"]
+        assert result.first.value == 0
+        assert 1.0 <= result.first.elapsed < 1.3
+
+    def test_all_conditions_latched(self, fake, autoit, clock):
+        fake.on("WinExists", after(clock, 0.5, 0, 1))
+        fake.on("ProcessExists", after(clock, 2.0, 812, 0))
+        result = wait(autoit, [window_exists("Done"), process_gone("setup.exe")], mode=ALL, clock=clock,
+                      sleep=clock.sleep)
+        assert result
+        assert [satisfied.value for satisfied in result.satisfied] == [1, 0]
+        assert result.first.condition.method == "win_exists"
+
+    def test_timeout(self, fake, autoit, clock):
+        fake.on("WinExists", 0)
+        result = wait(autoit, [window_exists("Error")], timeout=2.0, clock=clock, sleep=clock.sleep)
+        assert not result and result.timed_out
+        assert result.satisfied == [] and result.first is None
+        assert 2.0 <= clock.now < 2.01
+
+    def test_timeout_zero_probes_once(self, fake, autoit, clock):
+        fake.on("WinExists", 0)
+        assert not wait(autoit, [window_exists("Error")], timeout=0, clock=clock, sleep=clock.sleep)
+        assert fake.count("WinExists") == 1
+
+    def test_identical_probes_deduplicated(self, fake, autoit, clock):
+        fake.on("ControlGetText", after(clock, 1.0, "Loading", "Ready"))
+        conditions = [control_text("App", "", "Static1", "Ready"), control_text("App", "", "Static1", "Failed"),
+                      control_text("App", "", "Static1", re.compile("Ready|Failed"))]
+        result = wait(autoit, conditions, clock=clock, sleep=clock.sleep)
+        assert [satisfied.condition for satisfied in result.satisfied] == [conditions[0], conditions[2]]
+        assert fake.count("ControlGetText") == result.probes
+
+    def test_backoff_per_probe(self, fake, autoit, clock):
+        fake.on("WinExists", 0)
+        fake.on("ControlGetText", lambda *args: "%d%%" % int(clock.now * 10))
+        wait(autoit, [window_exists("Error"), control_text("App", "", "Static1", "100%")], timeout=10,
+             interval=0.01, max_interval=0.5, clock=clock, sleep=clock.sleep)
+        # the window probe slows down to max_interval, the changing text keeps being polled quickly
+        assert fake.count("WinExists") < 40
+        assert fake.count("ControlGetText") > 4 * fake.count("WinExists")
+
+    def test_through_proxy_batch(self, fake, clock):
+        batches = []
+
+        class Proxy(object):
+            def batch(self, read_errors=True):
+                batch = AutoItX3(backend=fake).batch(read_errors=read_errors)
+                batches.append(batch)
+                return batch
+        fake.on("WinExists", after(clock, 0.1, 0, 1))
+        fake.on("ProcessExists", 4)
+        result = wait(Proxy(), [window_exists("A"), process_gone(4)], mode=ANY, clock=clock, sleep=clock.sleep)
+        assert result.first.condition.method == "win_exists"
+        assert len(batches) > 1 and all(len(batch.results) == 2 for batch in batches)
+        # the probes are read without the error flag
+        assert all(result.error is None for batch in batches for result in batch.results)
+
+    def test_checked_probe_errors_are_none(self, fake, clock):
+        autoit = AutoItX3(backend=fake, checked=True)
+        fake.on("StatusBarGetText", "", error=1)
+        fake.on("WinExists", after(clock, 0.5, 0, 1))
+        seen = []
+        status = Condition("statusbar_get_text", ("Setup", "", 1), lambda value: seen.append(value))
+        result = wait(autoit, [status, window_exists("Setup")], clock=clock, sleep=clock.sleep)
+        assert result.first.condition.method == "win_exists"
+        assert seen and set(seen) == {None}
+        # the failing probe is not read again, nor are the others
+        assert fake.count("StatusBarGetText") == len(seen)
+        assert fake.count("WinExists") == result.probes - len(seen)
+
+    def test_checked_probe_errors_through_a_proxy(self, fake, clock):
+        batches = []
+
+        class Proxy(object):
+            def batch(self, read_errors=True):
+                batches.append(AutoItX3(backend=fake, checked=True).batch(read_errors=read_errors))
+                return batches[-1]
+        fake.on("StatusBarGetText", "", error=1)
+        fake.on("WinExists", after(clock, 0.5, 0, 1))
+        result = wait(Proxy(), [statusbar_text("Setup", "Ready"), window_exists("Setup")], clock=clock,
+                      sleep=clock.sleep)
+        assert result.first.condition.method == "win_exists"
+        assert fake.count("StatusBarGetText") + fake.count("WinExists") == result.probes
+        assert all(call.error is None for batch in batches for call in batch.results if call.value != "")
+
+    def test_default_interval(self, fake, autoit, clock):
+        fake.on("WinExists", 0)
+        wait(autoit, [window_exists("Error")], timeout=1, clock=clock, sleep=clock.sleep)
+        assert clock.sleeps[0] == 0.05
+
+    def test_custom_condition(self, fake, autoit, clock):
+        fake.on("WinGetState", after(clock, 0.2, 1, 15))
+        minimized = Condition("win_get_state", ("App", ""), lambda state: state & 16 == 0 and state & 8)
+        assert wait(autoit, [minimized], clock=clock, sleep=clock.sleep).first.value == 15
@@ -0,0 +1,234 @@
+from __future__ import absolute_import, division, print_function
+import threading
+import weakref
+import pytest
+from autoit import watch
+from autoit.autoitx import AutoItX3, wrapper_methods
+from autoit.testing import FakeAutoItX
+from autoit.watch import Watcher
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Screen(object):
+    """Control and status bar texts of fake windows, by handle."""
+
+    def __init__(self, fake):
+        self.handles = {"Build": "0x10", "Job": "0x20"}
+        self.texts = {("0x10", "Edit1"): "a", ("0x10", "Edit2"): "x", ("0x20", 1): "Working"}
+        fake.on("WinGetHandle", lambda title, text: self.handles.get(title, ""))
+        fake.on("ControlGetText", self.text)
+        fake.on("StatusBarGetText", self.text)
+
+    def text(self, title, text, item):
+        return self.texts[(title[len("[HANDLE:"):-1], item)]
+
+
+@pytest.fixture
+def fake():
+    return FakeAutoItX()
+
+@pytest.fixture
+def screen(fake):
+    return Screen(fake)
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def recorder(changes):
+    return lambda subscription, previous, value: changes.append((subscription.args[0], previous, value))
+
+
+
+class TestWatcher(object):
+
+    def test_callbacks_on_change_only(self, autoit, screen, clock):
+        changes = []
+        watcher = Watcher(autoit, clock=clock)
+        watcher.watch("Build", "", "Edit1", recorder(changes))
+        watcher.watch_statusbar("Job", recorder(changes))
+        assert watcher.poll() == 0
+        assert watcher.poll() == 0
+        screen.texts[("0x10", "Edit1")] = "ab"
+        screen.texts[("0x20", 1)] = "Ready"
+        assert watcher.poll() == 2
+        assert changes == [("Edit1", "a", "ab"), (1, "Working", "Ready")]
+
+    def test_windows_resolved_once_and_probes_coalesced(self, fake, autoit, screen, clock):
+        watcher = Watcher(autoit, clock=clock)
+        for _ in range(3):
+            watcher.watch("Build", "", "Edit1", recorder([]))
+        watcher.watch("Build", "", "Edit2", recorder([]))
+        watcher.poll()
+        assert fake.count("WinGetHandle") == 1
+        assert fake.count("ControlGetText") == 2
+        assert [args for name, args in fake.calls if name == "ControlGetText"] == [
+            ("[HANDLE:0x10]", "", "Edit1"), ("[HANDLE:0x10]", "", "Edit2")]
+        metrics = watcher.metrics()
+        assert (metrics.subscriptions, metrics.windows, metrics.probes, metrics.rounds,
+                metrics.calls) == (4, 1, 2, 1, 3)
+
+    def test_missing_window(self, fake, autoit, screen, clock):
+        changes = []
+        watcher = Watcher(autoit, clock=clock)
+        watcher.watch("Build", "", "Edit1", recorder(changes))
+        watcher.poll()
+        del screen.handles["Build"]
+        watcher.poll()
+        assert changes == [("Edit1", "a", None)]
+        assert fake.count("ControlGetText") == 1
+
+    def test_checked_instance_missing_window_and_control(self, fake, screen, clock):
+        def handle(title, text):
+            fake.error = int(title not in screen.handles)
+            return screen.handles.get(title, "")
+        fake.on("WinGetHandle", handle)
+        changes = []
+        watcher = Watcher(AutoItX3(backend=fake, checked=True), clock=clock)
+        watcher.watch("Build", "", "Edit1", recorder(changes))
+        watcher.watch_statusbar("Job", recorder(changes))
+        watcher.poll()
+        del screen.handles["Build"]
+        screen.texts[("0x20", 1)] = "Ready"
+        watcher.poll()
+        fake.on("StatusBarGetText", "", error=1)
+        watcher.poll()
+        assert changes == [("Edit1", "a", None), (1, "Working", "Ready"), (1, "Ready", None)]
+        assert watcher.metrics().errors == 0 and watcher.last_error is None
+
+    def test_owned_backend_factory_keeps_options(self, monkeypatch):
+        autoit = AutoItX3(cache_dispids=True, checked=True, handle_cache=True)
+        autoit.options["wintitlematchmode"] = 2
+        replayed = []
+        monkeypatch.setattr(AutoItX3, "auto_it_set_option",
+                            lambda self, option, param: replayed.append((option, param)))
+        clone = autoit._clone()
+        assert (clone._cache_dispids, clone._checked, clone.handle_cache) == (True, True, autoit.handle_cache)
+        assert clone._owns_backend and replayed == [("wintitlematchmode", 2)]
+
+    def test_rate_limit_delivers_latest(self, autoit, screen, clock):
+        changes = []
+        watcher = Watcher(autoit, clock=clock)
+        watcher.watch("Build", "", "Edit1", recorder(changes), min_interval=5)
+        watcher.poll()
+        for second, value in enumerate(["b", "c", "d", "e"], 1):
+            clock.now = second
+            screen.texts[("0x10", "Edit1")] = value
+            watcher.poll()
+        assert changes == [("Edit1", "a", "b")]
+        clock.now = 6
+        watcher.poll()
+        assert changes == [("Edit1", "a", "b"), ("Edit1", "b", "e")]
+        assert watcher.metrics().suppressed == 3
+
+    def test_change_back_not_delivered(self, autoit, screen, clock):
+        changes = []
+        watcher = Watcher(autoit, clock=clock)
+        watcher.watch("Build", "", "Edit1", recorder(changes), min_interval=5)
+        watcher.poll()
+        screen.texts[("0x10", "Edit1")] = "b"
+        watcher.poll()
+        screen.texts[("0x10", "Edit1")] = "c"
+        watcher.poll()
+        screen.texts[("0x10", "Edit1")] = "b"
+        clock.now = 10
+        watcher.poll()
+        assert changes == [("Edit1", "a", "b")]
+
+    def test_cancel_and_callback_errors(self, autoit, screen, clock):
+        changes = []
+
+        def fail(subscription, previous, value):
+            raise RuntimeError("boom")
+        watcher = Watcher(autoit, clock=clock)
+        kept = watcher.watch("Build", "", "Edit1", recorder(changes))
+        failing = watcher.watch("Build", "", "Edit1", fail)
+        watcher.poll()
+        screen.texts[("0x10", "Edit1")] = "b"
+        watcher.poll()
+        assert changes == [("Edit1", "a", "b")]
+        assert watcher.metrics().errors == 1 and isinstance(watcher.last_error, RuntimeError)
+        failing.cancel()
+        kept.cancel()
+        assert watcher.metrics().subscriptions == 0
+        watcher.poll()
+        assert watcher.metrics().probes == 0
+
+    def test_autoit_watch_runs_poller_thread(self, autoit, fake, screen):
+        changed = threading.Event()
+        polling = []
+
+        def factory():
+            polling.append(AutoItX3(backend=fake))
+            return polling[-1]
+        subscription = autoit.watch("Build", "", "Edit1", lambda *args: changed.set(), factory=factory)
+        try:
+            autoit.watcher.interval = 0.01
+            assert autoit.watcher.running
+            while autoit.watcher.metrics().rounds == 0:
+                changed.wait(0.01)
+            screen.texts[("0x10", "Edit1")] = "b"
+            assert changed.wait(5)
+            assert subscription.value == "b"
+            assert len(polling) == 1 and polling[0] is not autoit
+        finally:
+            autoit.watcher.stop()
+        assert not autoit.watcher.running
+
+    def test_autoit_watch_never_polls_the_instance(self, autoit, screen):
+        with pytest.raises(ValueError):
+            autoit.watch("Build", "", "Edit1", recorder([]))
+        assert autoit.watcher is None
+        owned = AutoItX3()
+        owned.watch("Build", "", "Edit1", recorder([]))
+        owned.watcher.stop()
+        assert owned.watcher._autoit == owned._clone
+
+    def test_cancel_during_round_not_remembered(self, autoit, screen, clock):
+        watcher = Watcher(autoit, clock=clock)
+        subscription = watcher.watch("Build", "", "Edit1", recorder([]))
+        screen.texts[("0x10", "Edit1")] = "a"
+        read = screen.text
+
+        def cancelling(title, text, item):
+            subscription.cancel()
+            return read(title, text, item)
+        autoit._backend.on("ControlGetText", cancelling)
+        watcher.poll()
+        assert watcher._values == {} and watcher.metrics().probes == 0
+
+    def test_created_instance_released_before_leaving_apartment(self, fake, screen, monkeypatch):
+        instances, alive = [], []
+        monkeypatch.setattr(watch, "initialize_apartment", lambda: True)
+        monkeypatch.setattr(watch, "uninitialize_apartment", lambda: alive.extend(ref() for ref in instances))
+
+        def factory():
+            instance = AutoItX3(backend=fake)
+            instances.append(weakref.ref(instance))
+            return instance
+        watcher = Watcher(factory, interval=0.01)
+        watcher.watch("Build", "", "Edit1", recorder([]))
+        with watcher:
+            while watcher.metrics().rounds == 0:
+                threading.Event().wait(0.01)
+        assert len(instances) == 1 and alive == [None]
+        # a restarted poller creates its instance again
+        with watcher:
+            while len(instances) == 1:
+                threading.Event().wait(0.01)
+
+    def test_watch_not_mirrored(self):
+        assert "watch" not in wrapper_methods()
@@ -0,0 +1,86 @@
+from __future__ import absolute_import, division, print_function
+import pytest
+from autoit.autoitx import AutoItX3
+from autoit.testing import FakeAutoItX
+from autoit.window import ElementNotFound
+
+
+@pytest.fixture
+def fake():
+    return (FakeAutoItX()
+            .on("WinGetHandle", lambda title, text: "0x0001" if title == "Calculator" else "")
+            .on("ControlGetHandle", lambda title, text, controlId: "0x0010" if controlId == 150 else "")
+            .on("ControlGetText", "8")
+            .on("ControlGetPosX", 10).on("ControlGetPosY", 20)
+            .on("WinGetState", 15))
+
+@pytest.fixture
+def autoit(fake):
+    return AutoItX3(backend=fake)
+
+
+
+class TestWindow(object):
+
+    def test_handles_are_resolved_once(self, fake, autoit):
+        display = autoit.window("Calculator").control(150)
+        assert display.handle == "0x0010"
+        assert display.handle == "0x0010"
+        assert fake.count("WinGetHandle") == 1
+        assert fake.calls[-1] == ("ControlGetHandle", ("[HANDLE:0x0001]", "", 150))
+
+    def test_not_found(self, autoit):
+        with pytest.raises(ElementNotFound):
+            autoit.window("Paint").handle
+        with pytest.raises(ElementNotFound):
+            autoit.window("Calculator").control(1).handle
+
+    def test_attributes_are_lazy(self, fake, autoit):
+        display = autoit.window("Calculator").control(150)
+        assert fake.calls == []
+        assert display.text == "8"
+        assert display.text == "8"
+        assert display.position == (10, 20)
+        assert fake.count("ControlGetText") == 1
+        assert fake.count("ControlGetPosX") == 1
+
+    def test_refresh_refetches_only_read_attributes(self, fake, autoit):
+        display = autoit.window("Calculator").control(150)
+        display.text
+        display.position
+        display.refresh()
+        assert fake.count("ControlGetText") == 2
+        display.text
+        display.refresh()
+        assert fake.count("ControlGetText") == 3
+        assert fake.count("ControlGetPosX") == 2
+        display.position
+        assert fake.count("ControlGetPosX") == 3
+
+    def test_actions_invalidate(self, fake, autoit):
+        display = autoit.window("Calculator").control(150)
+        display.text
+        display.set_text("9")
+        fake.on("ControlGetText", "9")
+        assert display.text == "9"
+
+    def test_window_state(self, autoit):
+        calc = autoit.window("Calculator")
+        assert calc.exists and calc.visible and calc.enabled and calc.active
+        assert not calc.minimized
+
+    def test_resolved_control_is_addressed_by_handle(self, fake, autoit):
+        display = autoit.window("Calculator").control(150)
+        display.text
+        assert fake.calls[-1] == ("ControlGetText", ("[HANDLE:0x0001]", "", 150))
+        display.handle
+        display.click()
+        assert fake.calls[-1][1][:3] == ("[HANDLE:0x0001]", "", "[HANDLE:0x0010]")
+
+    def test_missing_window_does_not_exist(self, fake, autoit):
+        assert not autoit.window("Paint").exists
+        assert fake.count("WinGetState") == 0
+
+    def test_slots(self, autoit):
+        with pytest.raises(AttributeError):
+            autoit.window("Calculator").control(150).colour = 1